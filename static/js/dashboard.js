@@ -0,0 +1,109 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Animate stats on load
+    animateStats();
+
+    // Add loading states to buttons
+    addButtonLoadingStates();
+
+    // Initialize tooltips if Bootstrap is available
+    if (typeof bootstrap !== 'undefined') {
+        var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+        var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+            return new bootstrap.Tooltip(tooltipTriggerEl);
+        });
+    }
+});
+
+function animateStats() {
+    const statNumbers = document.querySelectorAll('.stat-number');
+
+    statNumbers.forEach(stat => {
+        const finalValue = parseInt(stat.textContent);
+        let currentValue = 0;
+        const increment = Math.ceil(finalValue / 20);
+        const timer = setInterval(() => {
+            currentValue += increment;
+            if (currentValue >= finalValue) {
+                stat.textContent = finalValue;
+                clearInterval(timer);
+            } else {
+                stat.textContent = currentValue;
+            }
+        }, 50);
+    });
+}
+
+function confirmCancel(type) {
+    return confirm(`Are you sure you want to cancel this ${type}? This action cannot be undone.`);
+}
+
+function addButtonLoadingStates() {
+    const buttons = document.querySelectorAll('.btn-book, .btn-cancel');
+
+    buttons.forEach(button => {
+        button.addEventListener('click', function() {
+            const originalText = this.innerHTML;
+            const loadingText = this.classList.contains('btn-cancel') ?
+                '<i class="fas fa-spinner fa-spin me-2"></i>Canceling...' :
+                '<i class="fas fa-spinner fa-spin me-2"></i>Loading...';
+
+            this.innerHTML = loadingText;
+            this.disabled = true;
+
+            // Re-enable after 3 seconds in case of issues
+            setTimeout(() => {
+                this.innerHTML = originalText;
+                this.disabled = false;
+            }, 3000);
+        });
+    });
+}
+
+// Add smooth scroll to sections
+function scrollToSection(sectionId) {
+    document.getElementById(sectionId).scrollIntoView({
+        behavior: 'smooth',
+        block: 'start'
+    });
+}
+
+// Show success message after booking
+function showSuccessMessage(message) {
+    const alert = document.createElement('div');
+    alert.className = 'alert alert-success alert-dismissible fade show position-fixed';
+    alert.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alert.innerHTML = `
+        <i class="fas fa-check-circle me-2"></i>${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    document.body.appendChild(alert);
+
+    setTimeout(() => {
+        if (alert.parentNode) {
+            alert.parentNode.removeChild(alert);
+        }
+    }, 5000);
+}
+
+// Check for success parameter in URL
+const urlParams = new URLSearchParams(window.location.search);
+const success = urlParams.get('success');
+if (success) {
+    let message = 'Operation completed successfully!';
+    switch(success) {
+        case 'flight_booked':
+            message = 'Flight booked successfully!';
+            break;
+        case 'hotel_booked':
+            message = 'Hotel reservation confirmed!';
+            break;
+        case 'package_booked':
+            message = 'Travel package booked successfully!';
+            break;
+        case 'cancelled':
+            message = 'Booking cancelled successfully!';
+            break;
+    }
+    showSuccessMessage(message);
+}
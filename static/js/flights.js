@@ -0,0 +1,46 @@
+// Add current date as minimum date for date picker
+document.addEventListener('DOMContentLoaded', function() {
+    const dateInput = document.querySelector('input[type="date"]');
+    if (dateInput) {
+        const today = new Date().toISOString().split('T')[0];
+        dateInput.min = today;
+    }
+
+    // Add form validation
+    const searchForm = document.querySelector('.search-form');
+    if (searchForm) {
+        searchForm.addEventListener('submit', function(e) {
+            const source = document.getElementById('id_source').value;
+            const destination = document.getElementById('id_destination').value;
+            const date = document.getElementById('id_date').value;
+
+            if (!source || !destination || !date) {
+                e.preventDefault();
+                alert('Please fill in all search fields');
+                return false;
+            }
+
+            if (source === destination) {
+                e.preventDefault();
+                alert('Source and destination cannot be the same');
+                return false;
+            }
+        });
+    }
+
+    // Add loading animation to book buttons
+    const bookButtons = document.querySelectorAll('.btn-book');
+    bookButtons.forEach(button => {
+        button.addEventListener('click', function(e) {
+            const originalText = this.innerHTML;
+            this.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Processing...';
+            this.disabled = true;
+
+            // Re-enable after 3 seconds in case of issues
+            setTimeout(() => {
+                this.innerHTML = originalText;
+                this.disabled = false;
+            }, 3000);
+        });
+    });
+});
@@ -0,0 +1,97 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Set minimum dates for date pickers
+    const checkinInput = document.getElementById('checkin');
+    const checkoutInput = document.getElementById('checkout');
+
+    if (checkinInput && checkoutInput) {
+        const today = new Date().toISOString().split('T')[0];
+        checkinInput.min = today;
+
+        // Update checkout minimum date when checkin changes
+        checkinInput.addEventListener('change', function() {
+            const checkinDate = new Date(this.value);
+            checkinDate.setDate(checkinDate.getDate() + 1);
+            checkoutInput.min = checkinDate.toISOString().split('T')[0];
+
+            // If checkout is before new minimum, clear it
+            if (checkoutInput.value && new Date(checkoutInput.value) <= new Date(this.value)) {
+                checkoutInput.value = '';
+            }
+        });
+    }
+
+    // Form validation
+    const searchForm = document.querySelector('.search-form');
+    if (searchForm) {
+        searchForm.addEventListener('submit', function(e) {
+            const city = document.querySelector('#id_city')?.value;
+            const checkin = checkinInput?.value;
+            const checkout = checkoutInput?.value;
+
+            if (!city || !checkin || !checkout) {
+                e.preventDefault();
+                alert('Please fill in all search fields');
+                return false;
+            }
+
+            if (new Date(checkout) <= new Date(checkin)) {
+                e.preventDefault();
+                alert('Check-out date must be after check-in date');
+                return false;
+            }
+        });
+    }
+
+    // Add loading animation to book buttons
+    const bookButtons = document.querySelectorAll('.btn-book-hotel');
+    bookButtons.forEach(button => {
+        button.addEventListener('click', function(e) {
+            const originalText = this.innerHTML;
+            this.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Processing...';
+            this.style.pointerEvents = 'none';
+
+            // Re-enable after 3 seconds in case of issues
+            setTimeout(() => {
+                this.innerHTML = originalText;
+                this.style.pointerEvents = 'auto';
+            }, 3000);
+        });
+    });
+
+    // Lazy loading for images
+    if ('IntersectionObserver' in window) {
+        const imageObserver = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    const img = entry.target;
+                    img.src = img.dataset.src || img.src;
+                    img.classList.remove('lazy');
+                    imageObserver.unobserve(img);
+                }
+            });
+        });
+
+        document.querySelectorAll('img[loading="lazy"]').forEach(img => {
+            imageObserver.observe(img);
+        });
+    }
+});
+
+// Process amenities from data attribute
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.amenities-list').forEach(amenitiesList => {
+        const amenitiesText = amenitiesList.getAttribute('data-amenities');
+        if (amenitiesText) {
+            const amenities = amenitiesText.split(',');
+            amenitiesList.innerHTML = '';
+            amenities.slice(0, 8).forEach(amenity => { // Limit to 8 amenities
+                if (amenity.trim()) {
+                    const span = document.createElement('span');
+                    span.className = 'amenity-tag';
+                    span.textContent = amenity.trim();
+                    amenitiesList.appendChild(span);
+                }
+            });
+        }
+    });
+});
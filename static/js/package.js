@@ -0,0 +1,71 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Process hotel amenities
+    document.querySelectorAll('.hotel-amenities').forEach(amenitiesDiv => {
+        const amenitiesText = amenitiesDiv.getAttribute('data-amenities');
+        if (amenitiesText) {
+            const amenities = amenitiesText.split(',').slice(0, 4); // Show first 4 amenities
+            amenitiesDiv.innerHTML = amenities.map(amenity => {
+                if (amenity.trim()) {
+                    return `<span class="badge bg-light text-dark me-1 mb-1">${amenity.trim()}</span>`;
+                }
+            }).join('');
+
+            // Add "more" indicator if there are more amenities
+            if (amenitiesText.split(',').length > 4) {
+                amenitiesDiv.innerHTML += '<span class="badge bg-primary">+More</span>';
+            }
+        }
+    });
+
+    // Form validation
+    const searchForm = document.querySelector('.search-form');
+    if (searchForm) {
+        searchForm.addEventListener('submit', function(e) {
+            const formData = new FormData(this);
+            let hasData = false;
+
+            for (let [key, value] of formData.entries()) {
+                if (value.trim() !== '') {
+                    hasData = true;
+                    break;
+                }
+            }
+
+            if (!hasData) {
+                e.preventDefault();
+                alert('Please fill in search criteria');
+                return false;
+            }
+        });
+    }
+
+    // Smooth scroll to sections
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+
+    // Book package button animation
+    const bookButton = document.querySelector('.btn-book-package');
+    if (bookButton) {
+        bookButton.addEventListener('click', function(e) {
+            const originalText = this.innerHTML;
+            this.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Processing Package...';
+            this.style.pointerEvents = 'none';
+
+            // Re-enable after 3 seconds in case of issues
+            setTimeout(() => {
+                this.innerHTML = originalText;
+                this.style.pointerEvents = 'auto';
+            }, 3000);
+        });
+    }
+});
@@ -0,0 +1,144 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Form validation
+    const searchForm = document.querySelector('.search-form');
+    if (searchForm) {
+        searchForm.addEventListener('submit', function(e) {
+            const formInputs = this.querySelectorAll('input, select');
+            let hasValue = false;
+
+            formInputs.forEach(input => {
+                if (input.value.trim() !== '') {
+                    hasValue = true;
+                }
+            });
+
+            if (!hasValue) {
+                e.preventDefault();
+                showNotification('Please enter search criteria', 'warning');
+                return false;
+            }
+        });
+    }
+
+    // Smooth scroll animations
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.animationPlayState = 'running';
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.place-card').forEach(card => {
+        card.style.animationPlayState = 'paused';
+        observer.observe(card);
+    });
+
+    // Search button animation
+    const searchButton = document.querySelector('.btn-search-places');
+    if (searchButton) {
+        searchButton.addEventListener('click', function() {
+            const originalText = this.innerHTML;
+            this.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Searching...';
+            this.disabled = true;
+
+            setTimeout(() => {
+                this.innerHTML = originalText;
+                this.disabled = false;
+            }, 2000);
+        });
+    }
+
+    // Image lazy loading error handling
+    document.querySelectorAll('.place-image').forEach(img => {
+        img.addEventListener('error', function() {
+            this.src = '/static/images/placeholder-place.jpg'; // Add a placeholder image
+            this.alt = 'Image not available';
+        });
+    });
+});
+
+// Toggle favorite function
+function toggleFavorite(button) {
+    const icon = button.querySelector('i');
+    const isLiked = icon.classList.contains('fas');
+
+    if (isLiked) {
+        icon.classList.remove('fas', 'fa-heart');
+        icon.classList.add('far', 'fa-heart');
+        button.style.background = 'white';
+        button.style.color = 'var(--primary-color)';
+        showNotification('Removed from favorites', 'info');
+    } else {
+        icon.classList.remove('far', 'fa-heart');
+        icon.classList.add('fas', 'fa-heart');
+        button.style.background = '#e74c3c';
+        button.style.color = 'white';
+        button.style.borderColor = '#e74c3c';
+        showNotification('Added to favorites', 'success');
+    }
+
+    // Add a little animation
+    button.style.transform = 'scale(1.2)';
+    setTimeout(() => {
+        button.style.transform = 'scale(1)';
+    }, 200);
+}
+
+// Show notification function
+function showNotification(message, type = 'info') {
+    const notification = document.createElement('div');
+    notification.className = `alert alert-${type} position-fixed`;
+    notification.style.cssText = `
+        top: 20px;
+        right: 20px;
+        z-index: 9999;
+        min-width: 300px;
+        animation: slideInRight 0.3s ease;
+    `;
+    notification.innerHTML = `
+        <i class="fas fa-${type === 'success' ? 'check-circle' : type === 'warning' ? 'exclamation-triangle' : 'info-circle'} me-2"></i>
+        ${message}
+    `;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.style.animation = 'slideOutRight 0.3s ease';
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+// Add CSS for notification animations
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideInRight {
+        from {
+            transform: translateX(100%);
+            opacity: 0;
+        }
+        to {
+            transform: translateX(0);
+            opacity: 1;
+        }
+    }
+
+    @keyframes slideOutRight {
+        from {
+            transform: translateX(0);
+            opacity: 1;
+        }
+        to {
+            transform: translateX(100%);
+            opacity: 0;
+        }
+    }
+`;
+document.head.appendChild(style);
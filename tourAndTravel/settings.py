@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # First to see the response, so it compresses the finished body.
+    "travelapp.middleware.TextGZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -64,8 +66,17 @@ TEMPLATES = [
         "DIRS": [
             TEMPLATE_DIR,
         ],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Compile each template once per process instead of per render.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -99,6 +110,37 @@ DATABASES = {
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# Use a shared backend (Redis or Memcached) when running several processes,
+# so cache invalidations are seen by all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tour-and-travel",
+    }
+}
+
+# Seconds a cached flight search result is kept. Entries are invalidated
+# as soon as a flight on the route changes, so this only bounds memory.
+FLIGHT_SEARCH_CACHE_TIMEOUT = 300
+
+# Where direct flight searches are answered from: "orm" queries the
+# database through the shared cache above; "timetable" keeps per-process
+# array snapshots of each searched route and date (travelapp.timetable).
+FLIGHT_SEARCH_ENGINE = "orm"
+
+# Days ahead the materialize_flights command creates the dated flights of
+# recurring schedules for. Later flights are searched in the schedules and
+# only stored when booked.
+FLIGHT_SCHEDULE_HORIZON_DAYS = 90
+
+# Seconds the home and attraction pages rendered for anonymous visitors are
+# kept. Entries are invalidated when a city or attraction changes.
+PAGE_CACHE_SECONDS = 600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -139,5 +181,28 @@ STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "root")
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
+# collectstatic stores files under content-hashed names with gzip (and,
+# when the brotli package is installed, brotli) copies of text assets.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "travelapp.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Minutes an unpaid booking keeps its seats or rooms before the
+# release_expired_holds command gives them back.
+INVENTORY_HOLD_MINUTES = 15
+
+# Discount percentage used for the estimated prices of ranked packages in
+# the package search.
+PACKAGE_DISCOUNT_PERCENT = 0
+
+# Seconds browsers and shared caches may reuse a flight, hotel or places
+# search result page.
+SEARCH_CACHE_SECONDS = 60
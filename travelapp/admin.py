@@ -1,14 +1,247 @@
 from django.contrib import admin
-from travelapp.models import Flight,Airline,Hotel,City,TouristAttraction,FlightBooking,HotelBooking,PackageBooking,BookingPayment
-
-# Register your models here.
-admin.site.register(Flight)
-admin.site.register(Airline)
-admin.site.register(Hotel)
-admin.site.register(City)
-admin.site.register(TouristAttraction)
-admin.site.register(FlightBooking)
-admin.site.register(HotelBooking)
-admin.site.register(PackageBooking)
-admin.site.register(BookingPayment)
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from travelapp.models import (
+    Airline,
+    Amenity,
+    BookingPayment,
+    City,
+    Flight,
+    FlightBooking,
+    FlightSchedule,
+    Hotel,
+    HotelBooking,
+    HotelRoomInventory,
+    InventoryHold,
+    PackageBooking,
+    TouristAttraction,
+)
 
+# Tables smaller than this are counted exactly; counting them is cheap.
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_row_count(model):
+    """The database's own estimate of ``model``'s row count, if it keeps one.
+
+    PostgreSQL and MySQL keep one in their catalogs; SQLite only after
+    ``ANALYZE``. Returns ``None`` when there is no estimate.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the size of large, unfiltered changelists.
+
+    An exact ``COUNT(*)`` over millions of bookings is a full scan on every
+    changelist page; the database's statistics answer in constant time.
+    Filtered and searched changelists are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow without bound."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Newest first through the primary key index, without sorting the table.
+    ordering = ["-pk"]
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ["name", "country", "airport_code"]
+    search_fields = ["=airport_code", "^name"]
+
+
+@admin.register(Airline)
+class AirlineAdmin(admin.ModelAdmin):
+    list_display = ["name", "code"]
+    search_fields = ["=code", "^name"]
+
+
+@admin.register(Flight)
+class FlightAdmin(LargeTableAdmin):
+    list_display = [
+        "flight_number",
+        "airline",
+        "source_city",
+        "destination_city",
+        "flight_date",
+        "departure_time",
+        "available_seats",
+        "status",
+    ]
+    list_select_related = ["airline", "source_city", "destination_city"]
+    list_filter = ["status", "airline"]
+    search_fields = ["=flight_number"]
+    autocomplete_fields = ["airline", "source_city", "destination_city"]
+    raw_id_fields = ["schedule"]
+
+
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = [
+        "flight_number",
+        "airline",
+        "source_city",
+        "destination_city",
+        "days_of_week",
+        "departure_time",
+        "valid_from",
+        "valid_until",
+    ]
+    list_select_related = ["airline", "source_city", "destination_city"]
+    list_filter = ["airline"]
+    search_fields = ["=flight_number"]
+    autocomplete_fields = ["airline", "source_city", "destination_city"]
+
+
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ["name", "slug", "bit"]
+    search_fields = ["^name"]
+    readonly_fields = ["slug", "bit"]
+
+    def has_add_permission(self, request):
+        # Amenities join the catalog, with a free bit, from hotels' lists.
+        return False
+
+
+@admin.register(Hotel)
+class HotelAdmin(admin.ModelAdmin):
+    list_display = ["name", "city", "star_rating", "price_per_night", "total_rooms"]
+    list_select_related = ["city"]
+    list_filter = ["star_rating"]
+    search_fields = ["^name"]
+    autocomplete_fields = ["city"]
+
+
+@admin.register(HotelRoomInventory)
+class HotelRoomInventoryAdmin(LargeTableAdmin):
+    list_display = ["hotel", "room_type", "night", "total_rooms", "booked_rooms"]
+    list_select_related = ["hotel__city"]
+    list_filter = ["room_type"]
+    raw_id_fields = ["hotel"]
+
+
+@admin.register(TouristAttraction)
+class TouristAttractionAdmin(admin.ModelAdmin):
+    list_display = ["name", "city", "category", "entry_fee"]
+    list_select_related = ["city"]
+    list_filter = ["category"]
+    search_fields = ["^name"]
+    autocomplete_fields = ["city"]
+
+
+@admin.register(FlightBooking)
+class FlightBookingAdmin(LargeTableAdmin):
+    list_display = [
+        "booking_reference",
+        "user",
+        "flight",
+        "passenger_count",
+        "travel_class",
+        "total_price",
+        "status",
+        "booking_date",
+    ]
+    list_select_related = ["user", "flight__source_city", "flight__destination_city"]
+    list_filter = ["status", "travel_class"]
+    search_fields = ["=booking_reference", "=user__username"]
+    raw_id_fields = ["user", "flight"]
+
+
+@admin.register(HotelBooking)
+class HotelBookingAdmin(LargeTableAdmin):
+    list_display = [
+        "booking_reference",
+        "user",
+        "hotel",
+        "check_in_date",
+        "check_out_date",
+        "rooms_count",
+        "total_price",
+        "status",
+    ]
+    list_select_related = ["user", "hotel__city"]
+    list_filter = ["status"]
+    search_fields = ["=booking_reference", "=user__username"]
+    raw_id_fields = ["user", "hotel"]
+
+
+@admin.register(PackageBooking)
+class PackageBookingAdmin(LargeTableAdmin):
+    list_display = [
+        "booking_reference",
+        "user",
+        "total_price",
+        "status",
+        "booking_date",
+    ]
+    list_select_related = ["user"]
+    list_filter = ["status"]
+    search_fields = ["=booking_reference", "=user__username"]
+    raw_id_fields = ["user", "flight_booking", "hotel_booking"]
+
+
+@admin.register(InventoryHold)
+class InventoryHoldAdmin(LargeTableAdmin):
+    list_display = ["__str__", "flight", "hotel", "quantity", "status", "expires_at"]
+    list_select_related = [
+        "flight__source_city",
+        "flight__destination_city",
+        "hotel__city",
+    ]
+    list_filter = ["status"]
+    raw_id_fields = ["flight_booking", "hotel_booking", "flight", "hotel"]
+
+
+@admin.register(BookingPayment)
+class BookingPaymentAdmin(LargeTableAdmin):
+    list_display = [
+        "transaction_id",
+        "amount",
+        "payment_method",
+        "status",
+        "payment_date",
+    ]
+    list_filter = ["status", "payment_method"]
+    search_fields = ["=transaction_id"]
+    raw_id_fields = ["flight_booking", "hotel_booking", "package_booking"]
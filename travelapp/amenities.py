@@ -0,0 +1,171 @@
+"""Hotel amenities as a catalog and a per-hotel bitmask.
+
+``Hotel.amenities`` stays the comma-separated list shown to guests. Each
+name in it is an ``Amenity`` of the catalog, which owns one bit, and the
+hotel's ``amenity_mask`` has the bits of all its amenities set. "Has WiFi,
+a pool and parking" is then the single test ``amenity_mask & m = m``
+rather than one ``LIKE`` scan per amenity.
+
+Saving a hotel computes its mask from the in-process ``amenity_bits`` map.
+Names not in the catalog yet join it once the save commits, and every
+hotel listing them gets their bits. Imports catalog new names in bulk, and
+the ``index_amenities`` command catches up with hotels written any other
+way, e.g. with SQL. New names get the free bits, most listed first; once
+all ``Amenity.MAX_AMENITIES`` bits are taken, further names are still
+listed but cannot be filtered on. Names are cut to the length the catalog
+stores.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.text import slugify
+
+from .cache import bump_version, get_version
+from .models import Amenity, Hotel
+
+NAME_LENGTH = Amenity._meta.get_field("name").max_length
+SLUG_LENGTH = Amenity._meta.get_field("slug").max_length
+
+
+def parse_amenities(text):
+    """``{slug: name}`` of the amenities in a comma-separated list."""
+    names = {}
+    for name in (text or "").split(","):
+        name = " ".join(name.split())[:NAME_LENGTH].rstrip()
+        slug = slugify(name)[:SLUG_LENGTH].rstrip("-")
+        if slug:
+            names.setdefault(slug, name)
+    return names
+
+
+def mask_of(bits):
+    """The bitmask with ``bits`` set."""
+    mask = 0
+    for bit in bits:
+        mask |= 1 << bit
+    return mask
+
+
+class AmenityBits:
+    """The bit of each catalog amenity, by slug, loaded once per process.
+
+    Saving or deleting an ``Amenity`` bumps the ``amenities`` cache
+    version; each process notices on its next access and reloads the map.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._bits = {}
+
+    def _refresh(self):
+        version = get_version("amenities")
+        if version != self._version:
+            self._bits = dict(Amenity.objects.values_list("slug", "bit"))
+            self._version = version
+
+    def mask(self, text):
+        """``amenity_mask`` of a hotel listing ``text``."""
+        self._refresh()
+        return mask_of(
+            self._bits[slug] for slug in parse_amenities(text) if slug in self._bits
+        )
+
+    def lists_new(self, text):
+        """Whether ``text`` lists amenities that are not in the catalog."""
+        self._refresh()
+        return any(slug not in self._bits for slug in parse_amenities(text))
+
+
+amenity_bits = AmenityBits()
+
+
+def catalog_amenities(texts):
+    """Add the amenities listed in ``texts`` that are new to the catalog.
+
+    New names get the free bits, most listed first. Returns the new
+    ``Amenity`` objects; hotels already listing them still need their
+    masks updated, see ``set_amenity_bits``.
+    """
+    names = {}
+    counts = Counter()
+    for text in texts:
+        for slug, name in parse_amenities(text).items():
+            names.setdefault(slug, name)
+            counts[slug] += 1
+    known = dict(Amenity.objects.values_list("slug", "bit"))
+    used = set(known.values())
+    free = [bit for bit in range(Amenity.MAX_AMENITIES) if bit not in used]
+    new = sorted(
+        (slug for slug in counts if slug not in known),
+        key=lambda slug: (-counts[slug], slug),
+    )
+    if not new or not free:
+        return []
+    # Another import may be adding the same names right now.
+    Amenity.objects.bulk_create(
+        [
+            Amenity(slug=slug, name=names[slug], bit=bit)
+            for slug, bit in zip(new, free)
+        ],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: bump_version("amenities"))
+    return list(Amenity.objects.filter(slug__in=new[: len(free)]))
+
+
+def set_amenity_bits(amenities):
+    """Set the bits of ``amenities`` on every hotel listing them."""
+    slugs = {amenity.slug: amenity.bit for amenity in amenities}
+    if not slugs:
+        return
+    listing = {}
+    for pk, text in Hotel.objects.values_list("pk", "amenities").iterator():
+        mask = mask_of(slugs[slug] for slug in parse_amenities(text) if slug in slugs)
+        if mask:
+            listing.setdefault(mask, []).append(pk)
+    for mask, pks in listing.items():
+        Hotel.objects.filter(pk__in=pks).update(
+            amenity_mask=F("amenity_mask").bitor(mask)
+        )
+
+
+def catalog_new_amenities(text):
+    """Catalog the new amenities in ``text`` and set their bits on hotels."""
+    with transaction.atomic():
+        set_amenity_bits(catalog_amenities([text]))
+
+
+def amenity_masks(texts):
+    """``amenity_mask`` of each of ``texts``, cataloging new names first.
+
+    Stored hotels listing a new name get its bit as well.
+    """
+    texts = list(texts)
+    set_amenity_bits(catalog_amenities(texts))
+    bits = dict(Amenity.objects.values_list("slug", "bit"))
+    return [
+        mask_of(bits[slug] for slug in parse_amenities(text) if slug in bits)
+        for text in texts
+    ]
+
+
+def index_amenities():
+    """Catalog every amenity the hotels list and recompute all their masks.
+
+    Needed after hotels are written without ``save``, e.g. with SQL.
+    Returns the number of hotels whose mask changed.
+    """
+    hotels = list(Hotel.objects.only("pk", "amenities", "amenity_mask"))
+    catalog_amenities(hotel.amenities for hotel in hotels)
+    bits = dict(Amenity.objects.values_list("slug", "bit"))
+
+    changed = []
+    for hotel in hotels:
+        amenities = parse_amenities(hotel.amenities)
+        mask = mask_of(bits[slug] for slug in amenities if slug in bits)
+        if mask != hotel.amenity_mask:
+            hotel.amenity_mask = mask
+            changed.append(hotel)
+    Hotel.objects.bulk_update(changed, ["amenity_mask"], batch_size=1000)
+    return len(changed)
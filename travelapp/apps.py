@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TravelappConfig(AppConfig):
     name = 'travelapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,81 @@
+"""Prefix index for city and airport autocomplete.
+
+Cities are indexed under four kinds of key, each kept as a sorted array:
+IATA airport code, full city name, the city name from each later word on
+and country. A query is answered by binary-searching each array in that order
+and stopping as soon as enough cities are found, so the cost depends on the
+number of results asked for, not on the number of cities.
+"""
+import bisect
+import unicodedata
+
+from .catalog import city_catalog
+
+
+def normalize(text):
+    """Lowercase ``text``, strip accents and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+class CityIndex:
+    def __init__(self, cities, version):
+        self.version = version
+        self._cities = cities
+
+        codes, names, words, countries = [], [], [], []
+        for position, city in enumerate(cities):
+            if city.airport_code:
+                codes.append((normalize(city.airport_code), position))
+            name = normalize(city.name)
+            names.append((name, position))
+            for i, char in enumerate(name):
+                if char == " ":
+                    words.append((name[i + 1 :], position))
+            countries.append((normalize(city.country), position))
+
+        # Best match kind first.
+        self._tiers = []
+        for entries in (codes, names, words, countries):
+            entries.sort()
+            self._tiers.append(
+                ([key for key, _ in entries], [position for _, position in entries])
+            )
+
+    def search(self, query, limit=10):
+        """Up to ``limit`` cities matching ``query``, best matches first.
+
+        Airport code matches rank first, then city names starting with the
+        query, then names with a later word starting with it, then cities in
+        a matching country; each group is alphabetical.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        found = []
+        seen = set()
+        for keys, positions in self._tiers:
+            i = bisect.bisect_left(keys, query)
+            while i < len(keys) and keys[i].startswith(query):
+                position = positions[i]
+                if position not in seen:
+                    seen.add(position)
+                    found.append(self._cities[position])
+                    if len(found) == limit:
+                        return found
+                i += 1
+        return found
+
+
+_index = None
+
+
+def city_index():
+    """The prefix index of the current city catalog."""
+    global _index
+    version = city_catalog.version
+    if _index is None or _index.version != version:
+        _index = CityIndex(city_catalog.cities, version)
+    return _index
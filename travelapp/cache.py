@@ -0,0 +1,79 @@
+"""Versioned cache keys.
+
+Cache entries that belong together embed a shared version number in their
+keys. Bumping the version invalidates the whole family at once, without
+having to know or delete the individual keys.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version(name):
+    """Current version of the ``name`` family of cache entries."""
+    key = f"version:{name}"
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, so a version evicted from the cache never
+        # comes back lower than one that older entries were stored under.
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Invalidate every cache entry stored under the current ``name`` version."""
+    try:
+        cache.incr(f"version:{name}")
+    except ValueError:
+        get_version(name)
+
+
+def bump_versions(names):
+    """``bump_version`` for many families, skipping those without a version.
+
+    A family whose version is not in the cache has nothing cached under
+    it that could be served again: its next version starts from the clock,
+    above any it had before.
+    """
+    keys = [f"version:{name}" for name in names]
+    for key in cache.get_many(keys):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def get_versions(*names):
+    """Current versions of several families, joined for use in one key."""
+    return "-".join(str(get_version(name)) for name in names)
+
+
+def flight_route_version_name(source_city_id, destination_city_id, flight_date):
+    return f"flights:{source_city_id}:{destination_city_id}:{flight_date}"
+
+
+def invalidate_flight_routes(routes):
+    """Invalidate cached searches for ``(source, destination, date)`` routes.
+
+    Runs once the current transaction commits, so a search running in the
+    meantime cannot cache the data from before the change under the new
+    version.
+    """
+    names = {flight_route_version_name(*route) for route in routes}
+    transaction.on_commit(lambda: bump_versions(names))
+
+
+def flight_network_version_name(flight_date):
+    return f"flight-network:{flight_date}"
+
+
+def invalidate_flight_network(dates):
+    """Invalidate the connection-search graphs built for ``dates``.
+
+    Only schedule changes need this: seat counts are re-checked whenever
+    a connection is shown.
+    """
+    names = {flight_network_version_name(flight_date) for flight_date in dates}
+    transaction.on_commit(lambda: bump_versions(names))
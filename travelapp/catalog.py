@@ -0,0 +1,43 @@
+"""In-process catalog of all cities.
+
+Every search form offers the full city list, so it is loaded once per
+process and shared by all requests. Saving or deleting a ``City`` bumps the
+``cities`` cache version; each process notices on its next access and
+reloads the list.
+"""
+from .cache import get_version
+from .models import City
+
+
+class CityCatalog:
+    def __init__(self):
+        self._version = None
+        self._cities = ()
+        self._by_id = {}
+
+    def _refresh(self):
+        version = get_version("cities")
+        if version != self._version:
+            cities = tuple(City.objects.all())
+            self._cities = cities
+            self._by_id = {city.pk: city for city in cities}
+            self._version = version
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    @property
+    def cities(self):
+        """All cities, in ``City.Meta.ordering`` order."""
+        self._refresh()
+        return self._cities
+
+    def get(self, pk):
+        """The city with primary key ``pk``, or ``None``."""
+        self._refresh()
+        return self._by_id.get(pk)
+
+
+city_catalog = CityCatalog()
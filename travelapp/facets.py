@@ -0,0 +1,265 @@
+"""Facet counts for the search result pages.
+
+A facet is a search filter offered with the number of results each of its
+options would give, keeping the other facets' current choices. All the
+facets of a search are counted from one grouped aggregate: the results,
+before any facet choice is applied, are grouped on every facet at once,
+and each facet's counts are the sums of the groups matching the choices of
+the others. Hotels and attractions are grouped by the database, in one
+``GROUP BY`` query; flight results are in memory already and are grouped
+in one pass over them.
+
+Options link to the search with that option chosen (or cleared, when it is
+the current choice), so facet pages have canonical, cacheable URLs too.
+"""
+import bisect
+from collections import Counter, namedtuple
+from urllib.parse import urlencode
+
+from django.db.models import Case, Count, F, Value, When
+
+from .http import search_params
+from .models import Airline, Flight
+from .search import flight_fare
+
+FLIGHT_PRICE_BANDS = [0, 100, 250, 500]
+HOTEL_PRICE_BANDS = [0, 100, 200, 400]
+
+TIMES_OF_DAY = [
+    ("night", "Night (00-06)"),
+    ("morning", "Morning (06-12)"),
+    ("afternoon", "Afternoon (12-18)"),
+    ("evening", "Evening (18-24)"),
+]
+
+Facet = namedtuple("Facet", ["name", "label", "options"])
+FacetOption = namedtuple(
+    "FacetOption", ["value", "label", "count", "selected", "query"]
+)
+
+
+def price_band_choices(edges):
+    """Form choices for the price bands starting at ``edges``."""
+    choices = []
+    for band, low in enumerate(edges):
+        if band + 1 < len(edges):
+            choices.append((str(band), f"{low} to {edges[band + 1]}"))
+        else:
+            choices.append((str(band), f"{low} and over"))
+    return choices
+
+
+def price_band(price, edges):
+    """The band of ``edges`` ``price`` falls in, as a choice value."""
+    if price is None:
+        return None
+    return str(max(bisect.bisect_right(edges, price) - 1, 0))
+
+
+def price_band_expression(field, edges):
+    """``price_band`` of ``field``, computed by the database."""
+    return Case(
+        *(
+            When(**{f"{field}__lt": high}, then=Value(str(band)))
+            for band, high in enumerate(edges[1:])
+        ),
+        default=Value(str(len(edges) - 1)),
+    )
+
+
+def facet_counts(groups, selected):
+    """Option counts of each facet from ``{values: count}`` groups.
+
+    ``values`` are tuples of option values in the order of ``selected``,
+    which maps each facet to its current choice (or ``None``). A group
+    counts towards a facet when it matches the choices of all the others.
+    """
+    counts = [Counter() for _ in selected]
+    choices = list(selected.values())
+    for values, count in groups.items():
+        misses = [
+            position
+            for position, (value, choice) in enumerate(zip(values, choices))
+            if choice and value != choice
+        ]
+        if not misses:
+            for position, value in enumerate(values):
+                counts[position][value] += count
+        elif len(misses) == 1:
+            counts[misses[0]][values[misses[0]]] += count
+    return dict(zip(selected, counts))
+
+
+def facet_options(form, name, choices, counts):
+    """``FacetOption``s of the ``name`` facet of a valid search ``form``."""
+    params = search_params(form)
+    current = dict(params)[name]
+    options = []
+    for value, label in choices:
+        value = str(value)
+        selected = value == current
+        query = urlencode(
+            [
+                (param, "" if selected else value) if param == name else (param, v)
+                for param, v in params
+            ]
+        )
+        options.append(FacetOption(value, label, counts[value], selected, query))
+    return options
+
+
+def _choices(form, name):
+    return [(value, label) for value, label in form.fields[name].choices if value]
+
+
+class SearchFacets:
+    """The facets of a valid search ``form``; subclasses list them in ``names``."""
+
+    names = []
+
+    def __init__(self, form):
+        self.form = form
+        self.selected = {}
+        for name in self.names:
+            value = form.cleaned_data.get(name)
+            self.selected[name] = str(getattr(value, "pk", value)) if value else None
+
+
+class FlightFacets(SearchFacets):
+    """Airline, departure time and fare facets of flight results in memory."""
+
+    names = ["airline", "departure_window", "price_band"]
+
+    def __init__(self, form):
+        super().__init__(form)
+        self.travel_class = form.cleaned_data["travel_class"]
+
+    def values(self, flight):
+        """``flight``'s option of each facet."""
+        return (
+            str(flight.airline_id),
+            TIMES_OF_DAY[flight.departure_time.hour // 6][0],
+            price_band(flight_fare(flight, self.travel_class), FLIGHT_PRICE_BANDS),
+        )
+
+    def narrow(self, flights):
+        """``flights`` with the chosen options, in a list of the same type."""
+        if not any(self.selected.values()):
+            return flights
+        return type(flights)(filter(self.matches, flights))
+
+    def matches(self, flight):
+        """Whether ``flight`` has the chosen options."""
+        return all(
+            not choice or value == choice
+            for value, choice in zip(self.values(flight), self.selected.values())
+        )
+
+    def count(self, flights):
+        """The ``Facet``s of ``flights``, before any facet choice.
+
+        Airlines are named from the flights, or by one query for
+        ``FlightRow`` results.
+        """
+        groups = Counter(self.values(flight) for flight in flights)
+        counts = facet_counts(groups, self.selected)
+
+        airline_names = {
+            flight.airline_id: flight.airline.name
+            for flight in flights
+            if isinstance(flight, Flight)
+        }
+        airline_ids = {int(pk) for pk in counts["airline"]}
+        if self.selected["airline"]:
+            airline_ids.add(int(self.selected["airline"]))
+        unnamed = airline_ids - airline_names.keys()
+        if unnamed:
+            airline_names.update(
+                Airline.objects.filter(pk__in=unnamed).values_list("pk", "name")
+            )
+        airlines = sorted(
+            ((str(pk), airline_names[pk]) for pk in airline_ids if pk in airline_names),
+            key=lambda choice: choice[1],
+        )
+
+        choices = {
+            "airline": airlines,
+            "departure_window": TIMES_OF_DAY,
+            "price_band": _choices(self.form, "price_band"),
+        }
+        labels = {
+            "airline": "Airline",
+            "departure_window": "Departure time",
+            "price_band": "Price per seat",
+        }
+        return [
+            Facet(
+                name,
+                labels[name],
+                facet_options(self.form, name, choices[name], counts[name]),
+            )
+            for name in self.names
+        ]
+
+
+class QuerysetFacets(SearchFacets):
+    """Facets of a search queryset, counted by one grouped query.
+
+    ``facets`` are ``(name, label, expression)`` triples, ``expression``
+    giving a row's option of the facet.
+    """
+
+    facets = []
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.facets]
+
+    @property
+    def aliases(self):
+        return {f"facet_{name}": expression for name, _, expression in self.facets}
+
+    def narrow(self, queryset):
+        """``queryset`` limited to the chosen options."""
+        chosen = {
+            f"facet_{name}": choice for name, choice in self.selected.items() if choice
+        }
+        if not chosen:
+            return queryset
+        return queryset.alias(**self.aliases).filter(**chosen)
+
+    def count(self, queryset):
+        """The ``Facet``s of ``queryset``, before any facet choice."""
+        rows = (
+            queryset.order_by()
+            .values(**self.aliases)
+            .annotate(facet_count=Count("pk"))
+            .values_list(*self.aliases, "facet_count")
+        )
+        groups = {tuple(map(str, row[:-1])): row[-1] for row in rows}
+        counts = facet_counts(groups, self.selected)
+        return [
+            Facet(
+                name,
+                label,
+                facet_options(
+                    self.form, name, _choices(self.form, name), counts[name]
+                ),
+            )
+            for name, label, _ in self.facets
+        ]
+
+
+class HotelFacets(QuerysetFacets):
+    facets = [
+        ("star_rating", "Star rating", F("star_rating")),
+        (
+            "price_band",
+            "Price per night",
+            price_band_expression("price_per_night", HOTEL_PRICE_BANDS),
+        ),
+    ]
+
+
+class AttractionFacets(QuerysetFacets):
+    facets = [("category", "Category", F("category"))]
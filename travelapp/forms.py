@@ -2,7 +2,9 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
 from .models import (
+    Amenity,
     Flight,
     Hotel,
     PackageBooking,
@@ -12,10 +14,60 @@ from .models import (
     City,
     Airline,
 )
+from .catalog import city_catalog
+from .facets import (
+    FLIGHT_PRICE_BANDS,
+    HOTEL_PRICE_BANDS,
+    TIMES_OF_DAY,
+    price_band_choices,
+)
+from .inventory import free_rooms
 import datetime
 from decimal import Decimal
 
 
+class CityChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for city in city_catalog.cities:
+            yield self.choice(city)
+
+    def __len__(self):
+        return len(city_catalog.cities) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(city_catalog.cities)
+
+
+class CityChoiceField(forms.ModelChoiceField):
+    """City dropdown rendered and validated from the shared city catalog.
+
+    Neither rendering the choices nor cleaning a submitted id queries the
+    database.
+    """
+
+    iterator = CityChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=City.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            city = city_catalog.get(int(value))
+        except (TypeError, ValueError):
+            city = None
+        if city is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return city
+
+
 class SignUpForm(UserCreationForm):
     first_name = forms.CharField(
         max_length=30,
@@ -112,22 +164,26 @@ class FlightSearchForm(forms.Form):
         ("BUSINESS", "Business"),
     ]
 
+    STOPS_CHOICES = [
+        ("0", "Direct only"),
+        ("1", "Up to 1 stop"),
+        ("2", "Up to 2 stops"),
+    ]
+
     trip_type = forms.ChoiceField(
         choices=TRIP_TYPE_CHOICES,
         initial="one_way",
         widget=forms.Select(attrs={"class": "form-control"}),
     )
 
-    source_city = forms.ModelChoiceField(
-        queryset=City.objects.all(),
+    source_city = CityChoiceField(
         empty_label="Select Source City",
         widget=forms.Select(
             attrs={"class": "fs-form form-control", "placeholder": "Source City"}
         ),
     )
 
-    destination_city = forms.ModelChoiceField(
-        queryset=City.objects.all(),
+    destination_city = CityChoiceField(
         empty_label="Select Destination City",
         widget=forms.Select(
             attrs={"class": "fds-forms form-control", "placeholder": "Destination City"}
@@ -165,6 +221,35 @@ class FlightSearchForm(forms.Form):
         widget=forms.Select(attrs={"class": "form-control"}),
     )
 
+    max_stops = forms.TypedChoiceField(
+        choices=STOPS_CHOICES,
+        coerce=int,
+        empty_value=0,
+        initial="0",
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    # Facets of the direct flights found; see travelapp.facets.
+    airline = forms.ModelChoiceField(
+        queryset=Airline.objects.all(),
+        required=False,
+        empty_label="Any airline",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    departure_window = forms.ChoiceField(
+        choices=[("", "Any time")] + TIMES_OF_DAY,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    price_band = forms.ChoiceField(
+        choices=[("", "Any price")] + price_band_choices(FLIGHT_PRICE_BANDS),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
     def clean(self):
         cleaned_data = super().clean()
         source_city = cleaned_data.get("source_city")
@@ -189,8 +274,7 @@ class FlightSearchForm(forms.Form):
 
 
 class HotelSearchForm(forms.Form):
-    city = forms.ModelChoiceField(
-        queryset=City.objects.all(),
+    city = CityChoiceField(
         empty_label="Select City",
         widget=forms.Select(attrs={"class": "fs-form form-control"}),
     )
@@ -243,6 +327,26 @@ class HotelSearchForm(forms.Form):
         ),
     )
 
+    # Facets of the hotels found; see travelapp.facets.
+    star_rating = forms.ChoiceField(
+        choices=[("", "Any rating")]
+        + [(i, f"{i} Star{'s' if i != 1 else ''}") for i in range(1, 6)],
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    price_band = forms.ChoiceField(
+        choices=[("", "Any price")] + price_band_choices(HOTEL_PRICE_BANDS),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    amenities = forms.ModelMultipleChoiceField(
+        queryset=Amenity.objects.all(),
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
     def clean(self):
         cleaned_data = super().clean()
         check_in_date = cleaned_data.get("check_in_date")
@@ -344,8 +448,12 @@ class HotelBookingForm(forms.ModelForm):
         if check_in_date and check_out_date and check_out_date <= check_in_date:
             raise ValidationError("Check-out date must be after check-in date.")
 
-        if self.hotel and rooms_count and rooms_count > self.hotel.available_rooms:
-            raise ValidationError(f"Only {self.hotel.available_rooms} rooms available.")
+        if self.hotel and rooms_count and check_in_date and check_out_date:
+            rooms_free = free_rooms(self.hotel, check_in_date, check_out_date)
+            if rooms_count > rooms_free:
+                raise ValidationError(
+                    f"Only {rooms_free} rooms available for these dates."
+                )
 
         return cleaned_data
 
@@ -395,8 +503,7 @@ class PackageBookingForm(forms.ModelForm):
 
 
 class CitySearchForm(forms.Form):
-    city = forms.ModelChoiceField(
-        queryset=City.objects.all(),
+    city = CityChoiceField(
         empty_label="Select City",
         widget=forms.Select(attrs={"class": "fs-form form-control"}),
     )
@@ -405,8 +512,7 @@ class CitySearchForm(forms.Form):
 class AttractionFilterForm(forms.Form):
     CATEGORY_CHOICES = [("", "All Categories")] + TouristAttraction.CATEGORY_CHOICES
 
-    city = forms.ModelChoiceField(
-        queryset=City.objects.all(),
+    city = CityChoiceField(
         required=False,
         empty_label="All Cities",
         widget=forms.Select(attrs={"class": "form-control"}),
@@ -0,0 +1,155 @@
+"""Canonical, cacheable search URLs.
+
+Searches are plain GETs whose query string holds every criterion of the
+search form, in field-name order, with cities by id and blank criteria
+left empty. Each search therefore has exactly one URL, which can be shared
+and bookmarked and lets browsers and shared caches answer repeat and
+paginated searches without reaching the app.
+
+Pages that look the same to every anonymous visitor are also kept in the
+server-side cache, see ``cache_anonymous_page``.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .cache import get_versions
+
+# Query parameters that pick a page of results rather than the search.
+PAGE_PARAMS = ["cursor", "page"]
+
+
+def search_params(form):
+    """Canonical ``(name, value)`` pairs of a valid search form.
+
+    Multiple choices give one pair per choice, in primary key order.
+    """
+    params = []
+    for name in sorted(form.fields):
+        value = form.cleaned_data.get(name)
+        if isinstance(value, (list, QuerySet)):
+            choices = sorted(getattr(choice, "pk", choice) for choice in value)
+            params.extend((name, str(choice)) for choice in choices)
+            continue
+        if value is None:
+            value = ""
+        params.append((name, str(getattr(value, "pk", value))))
+    return params
+
+
+def search_query(form):
+    """Canonical query string of a valid search form."""
+    return urlencode(search_params(form))
+
+
+def bind_search_form(request, form_class):
+    """Bind ``form_class`` to the search in ``request``.
+
+    Returns ``(form, redirect_url)``. Posted searches and GETs whose query
+    string is not in canonical form are sent to the canonical URL; pages
+    keep their cursor when redirected. Requests without criteria get an
+    unbound form.
+    """
+    if request.method == "POST":
+        form = form_class(request.POST)
+        if form.is_valid():
+            return form, f"{request.path}?{search_query(form)}"
+        return form, None
+
+    if not set(request.GET) - set(PAGE_PARAMS):
+        return form_class(), None
+
+    form = form_class(request.GET)
+    if form.is_valid():
+        params = search_params(form) + [
+            (name, request.GET[name]) for name in PAGE_PARAMS if name in request.GET
+        ]
+        query = parse_qsl(request.META.get("QUERY_STRING", ""), keep_blank_values=True)
+        if query != params:
+            return form, f"{request.path}?{urlencode(params)}"
+    return form, None
+
+
+def search_cache_control(view):
+    """Let browsers and shared caches keep search result pages for a while.
+
+    Pages for signed-in users show their account and carry a CSRF token, so
+    only anonymous pages are public and every page varies on the cookie.
+    Wraps sync and async views alike.
+    """
+
+    def patch(request, response, user):
+        if request.method == "GET" and response.status_code == 200:
+            if user.is_authenticated:
+                patch_cache_control(
+                    response, private=True, max_age=settings.SEARCH_CACHE_SECONDS
+                )
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=settings.SEARCH_CACHE_SECONDS
+                )
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+    if iscoroutinefunction(view):
+
+        async def wrapped(request, *args, **kwargs):
+            response = await view(request, *args, **kwargs)
+            return patch(request, response, await request.auser())
+
+    else:
+
+        def wrapped(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            return patch(request, response, request.user)
+
+    return wraps(view)(wrapped)
+
+
+def cache_anonymous_page(*version_names):
+    """Serve anonymous visits to the view from a server-side page cache.
+
+    Signed-in visitors see their own navigation and are always rendered.
+    Pages are keyed by their URL and the current version of each of
+    ``version_names``, so bumping any of those versions drops them.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+            key = f"page:{get_versions(*version_names)}:{url}"
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                # Pages that set cookies or embed a CSRF token are personal.
+                if (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not response.cookies
+                    and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+                ):
+                    cache.set(
+                        key,
+                        (response.content, response["Content-Type"]),
+                        settings.PAGE_CACHE_SECONDS,
+                    )
+            patch_vary_headers(response, ["Cookie"])
+            return response
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,107 @@
+"""Resized WebP and JPEG derivatives of uploaded images.
+
+Every image gets one derivative per width in ``IMAGE_WIDTHS`` and per
+format, stored next to the other media under ``derivatives/``. Names
+follow from the original's name alone, so templates can build ``srcset``
+URLs without touching storage. Images narrower than a width are re-encoded
+at their own size instead of being scaled up, so every derivative exists.
+
+New uploads are converted when a hotel or attraction is saved; existing
+media is converted by the ``generate_image_derivatives`` command. Until an
+image's derivatives exist, pages show the original (see ``derivatives_ready``).
+"""
+import hashlib
+import io
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+IMAGE_WIDTHS = (320, 640, 1280)
+
+# Pillow format name, extension and encoder options of each format.
+IMAGE_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+
+# What reading a missing, corrupt, unsupported or oversized upload raises.
+IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+# Seconds an image is remembered as having, or not yet having, derivatives.
+DERIVATIVES_READY_TIMEOUT = 24 * 60 * 60
+DERIVATIVES_MISSING_TIMEOUT = 60
+
+
+def derivative_name(name, width, image_format):
+    """Storage name of the ``width`` pixel wide ``image_format`` derivative."""
+    _, extension, _ = IMAGE_FORMATS[image_format]
+    root, _ = posixpath.splitext(name)
+    return f"derivatives/{root}-{width}w.{extension}"
+
+
+def has_derivatives(name, storage=default_storage):
+    """Whether ``name``'s derivatives have been generated."""
+    return storage.exists(derivative_name(name, IMAGE_WIDTHS[-1], "webp"))
+
+
+def _ready_key(name):
+    return "image-derivatives:" + hashlib.md5(name.encode()).hexdigest()
+
+
+def derivatives_ready(name):
+    """``has_derivatives``, cached so pages don't ask storage for every image."""
+    ready = cache.get(_ready_key(name))
+    if ready is None:
+        ready = has_derivatives(name)
+        timeout = DERIVATIVES_READY_TIMEOUT if ready else DERIVATIVES_MISSING_TIMEOUT
+        cache.set(_ready_key(name), ready, timeout)
+    return ready
+
+
+def generate_derivatives(name, force=False, storage=default_storage):
+    """Write the derivatives of the image stored as ``name``.
+
+    Existing derivatives are kept unless ``force`` is set. Returns the
+    number of files written.
+    """
+    if not force and has_derivatives(name, storage):
+        return 0
+
+    with storage.open(name, "rb") as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    written = 0
+    for width in IMAGE_WIDTHS:
+        resized = image
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format, (pil_format, _, options) in IMAGE_FORMATS.items():
+            encoded = resized
+            if pil_format == "JPEG" and encoded.mode != "RGB":
+                encoded = encoded.convert("RGB")
+            buffer = io.BytesIO()
+            encoded.save(buffer, pil_format, **options)
+            target = derivative_name(name, width, image_format)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+            written += 1
+    cache.set(_ready_key(name), True, DERIVATIVES_READY_TIMEOUT)
+    return written
+
+
+def srcset(name, image_format="webp"):
+    """``srcset`` attribute value listing every derivative of ``name``."""
+    return ", ".join(
+        f"{default_storage.url(derivative_name(name, width, image_format))} {width}w"
+        for width in IMAGE_WIDTHS
+    )
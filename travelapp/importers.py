@@ -0,0 +1,381 @@
+"""Bulk loading of catalog rows from CSV and JSON-lines files.
+
+Files are read one record at a time and written in batches, so memory use
+is bounded by the batch size however large the file is. Each record is
+matched to an existing row by its natural key and either inserts or
+updates it, so a file can be imported again after it changes. The
+natural keys are:
+
+* cities: ``airport_code``
+* airlines: ``code``
+* flights: ``flight_number`` and ``flight_date``
+* flight schedules: ``flight_number`` and ``valid_from``
+* hotels and attractions: ``city`` and ``name``
+
+Columns are the model's field names and are validated by the model
+fields. The ``airline``, ``source_city``, ``destination_city`` and ``city``
+columns name an airline by code or name and a city by airport code or
+name; they are resolved through lookup maps loaded once per import.
+Seat and room availability is only set when a row is created, so
+importing a schedule again keeps the seats and rooms already sold.
+"""
+import csv
+import gzip
+import io
+import json
+import sys
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .amenities import amenity_masks
+from .cache import bump_version, invalidate_flight_network, invalidate_flight_routes
+from .models import (
+    Airline,
+    City,
+    Flight,
+    FlightSchedule,
+    Hotel,
+    TouristAttraction,
+)
+from .schedules import invalidate_schedule
+
+CSV_EXTENSIONS = (".csv", ".csv.gz")
+JSONL_EXTENSIONS = (".jsonl", ".jsonl.gz", ".ndjson", ".ndjson.gz")
+
+
+def read_records(path, file_format=None):
+    """Yield ``(line number, record dict)`` for each record in ``path``.
+
+    ``path`` may be ``-`` for standard input and may be gzipped. The format
+    is taken from the extension unless ``file_format`` is ``csv`` or
+    ``jsonl``.
+    """
+    if file_format is None:
+        if path.endswith(CSV_EXTENSIONS):
+            file_format = "csv"
+        elif path.endswith(JSONL_EXTENSIONS):
+            file_format = "jsonl"
+        else:
+            raise ValueError(f"Cannot tell the format of {path}; pass --format.")
+
+    if path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    elif path.endswith(".gz"):
+        stream = gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    else:
+        stream = open(path, encoding="utf-8-sig", newline="")
+
+    with stream:
+        if file_format == "csv":
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(stream, 1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"line {line_number}: {e}")
+                    yield line_number, record
+
+
+def city_ids():
+    """City primary keys by name and by airport code."""
+    ids = {}
+    for pk, name, airport_code in City.objects.values_list(
+        "pk", "name", "airport_code"
+    ):
+        ids[name] = pk
+        if airport_code:
+            ids[airport_code] = pk
+    return ids
+
+
+def airline_ids():
+    """Airline primary keys by name and by code."""
+    ids = {}
+    for pk, name, code in Airline.objects.values_list("pk", "name", "code"):
+        ids[name] = pk
+        ids[code] = pk
+    return ids
+
+
+class Importer:
+    """Turns records into rows of ``model`` and writes them in batches.
+
+    ``fields`` are read from records with the same name; ``references``
+    maps a foreign key to the function building its lookup map. ``key`` is
+    the natural key, in field names; with ``unique_key`` the database
+    enforces it and rows are upserted in one statement, otherwise existing
+    rows are looked up first. ``insert_only`` fields are not updated.
+    """
+
+    def __init__(
+        self,
+        model,
+        key,
+        fields,
+        references=None,
+        unique_key=True,
+        insert_only=(),
+    ):
+        self.model = model
+        self.key = key
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.references = references or {}
+        self.unique_key = unique_key
+        self.insert_only = insert_only
+        self._ids = {}
+
+    @property
+    def update_fields(self):
+        names = [field.name for field in self.fields] + list(self.references)
+        names += [
+            field.name
+            for field in self.model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        return [
+            name
+            for name in names
+            if name not in self.key and name not in self.insert_only
+        ]
+
+    def load_references(self):
+        """Load the lookup maps of the foreign keys."""
+        self._ids = {name: lookup() for name, lookup in self.references.items()}
+
+    def build(self, record):
+        """An unsaved ``model`` instance for ``record``.
+
+        Raises ``ValidationError`` when a value is missing or invalid or a
+        reference is unknown.
+        """
+        record = self.prepare(record)
+        values = {}
+        errors = {}
+        for field in self.fields:
+            value = record.get(field.name)
+            if value is None or value == "":
+                if field.has_default():
+                    value = field.get_default()
+                elif field.null:
+                    value = None
+                elif field.blank:
+                    value = ""
+            try:
+                values[field.name] = field.clean(value, None)
+            except ValidationError as e:
+                errors[field.name] = e.messages
+            else:
+                if values[field.name] is None and field.name in self.key:
+                    errors[field.name] = ["This field is required."]
+        for name, ids in self._ids.items():
+            reference = record.get(name)
+            if reference in ids:
+                values[f"{name}_id"] = ids[reference]
+            else:
+                errors[name] = [f"Unknown {name} {reference!r}."]
+        if errors:
+            raise ValidationError(errors)
+
+        instance = self.model(**values)
+        instance.clean()
+        return instance
+
+    def prepare(self, record):
+        """``record`` with blank columns derived from other columns."""
+        return record
+
+    def natural_key(self, instance):
+        return tuple(
+            getattr(instance, self.model._meta.get_field(name).attname)
+            for name in self.key
+        )
+
+    def write(self, instances):
+        """Insert or update ``instances`` in one transaction."""
+        with transaction.atomic():
+            if self.unique_key:
+                # MySQL matches conflicts on any unique key and takes none.
+                features = connection.features
+                self.model.objects.bulk_create(
+                    instances,
+                    update_conflicts=True,
+                    unique_fields=(
+                        self.key
+                        if features.supports_update_conflicts_with_target
+                        else None
+                    ),
+                    update_fields=self.update_fields,
+                )
+            else:
+                existing = self.existing_ids(instances)
+                created, updated = [], []
+                for instance in instances:
+                    instance.pk = existing.get(self.natural_key(instance))
+                    (created if instance.pk is None else updated).append(instance)
+                # Unlike bulk_create, bulk_update does not fill in auto_now.
+                now = timezone.now()
+                for field in self.model._meta.concrete_fields:
+                    if getattr(field, "auto_now", False):
+                        for instance in updated:
+                            setattr(instance, field.attname, now)
+                self.model.objects.bulk_update(updated, self.update_fields)
+                self.model.objects.bulk_create(created)
+            self.invalidate(instances)
+
+    def existing_ids(self, instances):
+        """Primary keys of the rows sharing a natural key with ``instances``."""
+        attnames = [self.model._meta.get_field(name).attname for name in self.key]
+        lookups = {
+            f"{attname}__in": {getattr(instance, attname) for instance in instances}
+            for attname in attnames
+        }
+        return {
+            tuple(row[:-1]): row[-1]
+            for row in self.model.objects.filter(**lookups).values_list(
+                *attnames, "pk"
+            )
+        }
+
+    def invalidate(self, instances):
+        """Drop cached data the written rows change.
+
+        Bulk writes send no model signals, so importers do what the
+        signal handlers would.
+        """
+
+
+class CityImporter(Importer):
+    def invalidate(self, instances):
+        transaction.on_commit(lambda: bump_version("cities"))
+
+
+class FlightImporter(Importer):
+    def prepare(self, record):
+        if record.get("available_seats") in (None, ""):
+            record = {**record, "available_seats": record.get("total_seats")}
+        return record
+
+    def invalidate(self, instances):
+        routes = {
+            (flight.source_city_id, flight.destination_city_id, flight.flight_date)
+            for flight in instances
+        }
+        invalidate_flight_routes(routes)
+        invalidate_flight_network({flight_date for _, _, flight_date in routes})
+
+
+class ScheduleImporter(Importer):
+    def invalidate(self, instances):
+        for schedule in instances:
+            invalidate_schedule(schedule)
+
+
+class HotelImporter(Importer):
+    @property
+    def update_fields(self):
+        return super().update_fields + ["amenity_mask"]
+
+    def write(self, instances):
+        # Bulk writes skip the pre_save signal that sets the mask.
+        masks = amenity_masks([instance.amenities for instance in instances])
+        for instance, mask in zip(instances, masks):
+            instance.amenity_mask = mask
+        super().write(instances)
+
+
+class AttractionImporter(Importer):
+    def invalidate(self, instances):
+        transaction.on_commit(lambda: bump_version("attractions"))
+
+
+def importers():
+    """A fresh importer for each kind of catalog row."""
+    return {
+        "cities": CityImporter(
+            City,
+            key=["airport_code"],
+            fields=["airport_code", "name", "country", "best_link", "week_get_links"],
+        ),
+        "airlines": Importer(Airline, key=["code"], fields=["code", "name"]),
+        "flights": FlightImporter(
+            Flight,
+            key=["flight_number", "flight_date"],
+            fields=[
+                "flight_number",
+                "flight_date",
+                "departure_time",
+                "arrival_time",
+                "economy_price",
+                "business_price",
+                "total_seats",
+                "available_seats",
+                "status",
+            ],
+            references={
+                "airline": airline_ids,
+                "source_city": city_ids,
+                "destination_city": city_ids,
+            },
+            insert_only=["available_seats"],
+        ),
+        "schedules": ScheduleImporter(
+            FlightSchedule,
+            key=["flight_number", "valid_from"],
+            fields=[
+                "flight_number",
+                "days_of_week",
+                "valid_from",
+                "valid_until",
+                "departure_time",
+                "arrival_time",
+                "economy_price",
+                "business_price",
+                "total_seats",
+            ],
+            references={
+                "airline": airline_ids,
+                "source_city": city_ids,
+                "destination_city": city_ids,
+            },
+            unique_key=False,
+        ),
+        "hotels": HotelImporter(
+            Hotel,
+            key=["city", "name"],
+            fields=[
+                "name",
+                "address",
+                "price_per_night",
+                "star_rating",
+                "amenities",
+                "distance_from_airport",
+                "total_rooms",
+                "phone",
+                "email",
+                "website",
+            ],
+            references={"city": city_ids},
+            unique_key=False,
+        ),
+        "attractions": AttractionImporter(
+            TouristAttraction,
+            key=["city", "name"],
+            fields=[
+                "name",
+                "category",
+                "description",
+                "address",
+                "opening_hours",
+                "entry_fee",
+                "website",
+            ],
+            references={"city": city_ids},
+            unique_key=False,
+        ),
+    }
@@ -0,0 +1,30 @@
+"""Indexes for case-insensitive lookups.
+
+``iexact`` and ``istartswith`` compile to a different comparison on each
+database: SQLite's LIKE ignores case, PostgreSQL compares
+``UPPER(column::text)`` with LIKE, and MySQL's default collations ignore
+case already. An index on the bare column serves none of the first two, so
+``CaseInsensitiveIndex`` indexes whatever expression the database compares.
+"""
+from django.db import models
+from django.db.models.functions import Cast, Collate, Upper
+
+
+class CaseInsensitiveIndex(models.Index):
+    """Index on ``fields`` that serves their ``iexact``/``istartswith`` lookups."""
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        vendor = schema_editor.connection.vendor
+        if vendor == "sqlite":
+            expressions = [Collate(models.F(field), "NOCASE") for field in self.fields]
+        elif vendor == "postgresql":
+            from django.contrib.postgres.indexes import OpClass
+
+            expressions = [
+                OpClass(Upper(Cast(field, models.TextField())), "text_pattern_ops")
+                for field in self.fields
+            ]
+        else:
+            return super().create_sql(model, schema_editor, using, **kwargs)
+        index = models.Index(*expressions, name=self.name)
+        return index.create_sql(model, schema_editor, using, **kwargs)
@@ -0,0 +1,369 @@
+"""Seat and room inventory.
+
+All changes to ``Flight.available_seats`` and to the per-night
+``HotelRoomInventory`` go through this module. Each change is a single
+conditional UPDATE, so the database decides whether enough inventory is
+left and concurrent bookings can neither oversell nor overwrite each
+other's changes.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Exists,
+    F,
+    IntegerField,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .cache import invalidate_flight_routes
+from .models import (
+    Flight,
+    FlightBooking,
+    Hotel,
+    HotelBooking,
+    HotelRoomInventory,
+    InventoryHold,
+    PackageBooking,
+)
+
+
+class InventoryError(Exception):
+    """Raised when the requested seats or rooms are no longer available."""
+
+
+def reserve_seats(flight, count):
+    """Take ``count`` seats on ``flight`` or raise ``InventoryError``."""
+    updated = Flight.objects.filter(pk=flight.pk, available_seats__gte=count).update(
+        available_seats=F("available_seats") - count, updated_at=timezone.now()
+    )
+    if not updated:
+        raise InventoryError(f"Not enough seats left on flight {flight.flight_number}.")
+    invalidate_flight_routes([_route(flight)])
+
+
+def release_seats(flight, count):
+    """Give ``count`` seats back to ``flight``, never exceeding its capacity."""
+    Flight.objects.filter(pk=flight.pk).update(
+        available_seats=Least(F("available_seats") + count, F("total_seats")),
+        updated_at=timezone.now(),
+    )
+    invalidate_flight_routes([_route(flight)])
+
+
+def _route(flight):
+    return (flight.source_city_id, flight.destination_city_id, flight.flight_date)
+
+
+def _nights(check_in, check_out):
+    night = check_in
+    while night < check_out:
+        yield night
+        night += datetime.timedelta(days=1)
+
+
+def reserve_rooms(hotel, count, check_in, check_out, room_type="STANDARD"):
+    """Take ``count`` rooms at ``hotel`` for every night of the stay.
+
+    Missing nights are created at the hotel's capacity first, then one
+    conditional UPDATE books all nights that still have room. If fewer rows
+    than nights were updated, ``InventoryError`` is raised and the caller's
+    transaction rolls the partial booking back. Call inside a transaction.
+    """
+    nights = list(_nights(check_in, check_out))
+    HotelRoomInventory.objects.bulk_create(
+        [
+            HotelRoomInventory(
+                hotel=hotel,
+                room_type=room_type,
+                night=night,
+                total_rooms=hotel.total_rooms,
+            )
+            for night in nights
+        ],
+        ignore_conflicts=True,
+    )
+    updated = HotelRoomInventory.objects.filter(
+        hotel=hotel,
+        room_type=room_type,
+        night__gte=check_in,
+        night__lt=check_out,
+        booked_rooms__lte=F("total_rooms") - count,
+    ).update(booked_rooms=F("booked_rooms") + count)
+    if updated != len(nights):
+        raise InventoryError(f"Not enough rooms left at {hotel.name} for these dates.")
+
+
+def release_rooms(hotel, count, check_in, check_out, room_type="STANDARD"):
+    """Give ``count`` rooms back to ``hotel`` for every night of the stay."""
+    HotelRoomInventory.objects.filter(
+        hotel=hotel, room_type=room_type, night__gte=check_in, night__lt=check_out
+    ).update(booked_rooms=Greatest(F("booked_rooms") - count, 0))
+
+
+def with_free_rooms(hotels, check_in, check_out, room_type="STANDARD"):
+    """Annotate ``hotels`` with ``free_rooms`` for the nights of a stay.
+
+    ``free_rooms`` is the smallest number of unsold rooms over the nights,
+    resolved by one correlated aggregate over the inventory's
+    (hotel, room type, night) unique index. Nights without a row count as
+    fully available.
+    """
+    tightest_night = (
+        HotelRoomInventory.objects.filter(
+            hotel=OuterRef("pk"),
+            room_type=room_type,
+            night__gte=check_in,
+            night__lt=check_out,
+        )
+        .order_by()
+        .values("hotel")
+        .annotate(free=Min(F("total_rooms") - F("booked_rooms")))
+        .values("free")
+    )
+    return hotels.annotate(
+        free_rooms=Least(
+            Coalesce(Subquery(tightest_night), F("total_rooms")),
+            F("total_rooms"),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def free_rooms(hotel, check_in, check_out, room_type="STANDARD"):
+    """Number of rooms at ``hotel`` free on every night of the stay."""
+    hotels = with_free_rooms(
+        Hotel.objects.filter(pk=hotel.pk), check_in, check_out, room_type
+    )
+    return hotels.values_list("free_rooms", flat=True).get()
+
+
+def hold_expiry():
+    """When a hold created now expires."""
+    return timezone.now() + datetime.timedelta(minutes=settings.INVENTORY_HOLD_MINUTES)
+
+
+def hold_flight_booking(booking):
+    """Take the seats of a saved, unpaid flight booking and hold them.
+
+    Raises ``InventoryError`` if the seats are gone. Call inside a
+    transaction.
+    """
+    reserve_seats(booking.flight, booking.passenger_count)
+    return InventoryHold.objects.create(
+        flight_booking=booking,
+        flight=booking.flight,
+        quantity=booking.passenger_count,
+        expires_at=hold_expiry(),
+    )
+
+
+def hold_hotel_booking(booking, room_type="STANDARD"):
+    """Take the rooms of a saved, unpaid hotel booking and hold them.
+
+    Raises ``InventoryError`` if the rooms are gone. Call inside a
+    transaction.
+    """
+    reserve_rooms(
+        booking.hotel,
+        booking.rooms_count,
+        booking.check_in_date,
+        booking.check_out_date,
+        room_type,
+    )
+    return InventoryHold.objects.create(
+        hotel_booking=booking,
+        hotel=booking.hotel,
+        room_type=room_type,
+        check_in_date=booking.check_in_date,
+        check_out_date=booking.check_out_date,
+        quantity=booking.rooms_count,
+        expires_at=hold_expiry(),
+    )
+
+
+def _holds_for(booking):
+    if isinstance(booking, FlightBooking):
+        return InventoryHold.objects.filter(flight_booking=booking)
+    if isinstance(booking, HotelBooking):
+        return InventoryHold.objects.filter(hotel_booking=booking)
+    return InventoryHold.objects.filter(
+        Q(flight_booking=booking.flight_booking_id)
+        | Q(hotel_booking=booking.hotel_booking_id)
+    )
+
+
+def confirm_holds(booking):
+    """Turn the holds of a booking that is being paid for into a sale.
+
+    Returns ``False`` if any of them has expired; in that case everything
+    still held for the booking is released and the booking is cancelled.
+    Bookings made before holds existed have none and always confirm. Call
+    inside a transaction.
+    """
+    holds = _holds_for(booking)
+    holds.filter(status="HELD", expires_at__gt=timezone.now()).update(
+        status="CONVERTED"
+    )
+    if not holds.exclude(status="CONVERTED").exists():
+        return True
+
+    release_holds(holds.exclude(status="RELEASED").values_list("pk", flat=True))
+    return False
+
+
+def confirm_booking(booking):
+    """Mark an unpaid booking as paid and turn its holds into a sale.
+
+    The status change is a conditional UPDATE, so a booking paid for twice
+    at the same time is only confirmed once. A package confirms its flight
+    and hotel bookings with it. Returns ``None`` if the booking was not
+    awaiting payment, and ``False`` if its holds had expired, in which case
+    it is cancelled as ``confirm_holds`` describes. Call inside a
+    transaction.
+    """
+    now = timezone.now()
+    bookings = [(type(booking), booking.pk)]
+    if isinstance(booking, PackageBooking):
+        bookings += [
+            (FlightBooking, booking.flight_booking_id),
+            (HotelBooking, booking.hotel_booking_id),
+        ]
+    model, pk = bookings[0]
+    if not model.objects.filter(pk=pk, status="PENDING").update(
+        status="CONFIRMED", updated_at=now
+    ):
+        return None
+    for model, pk in bookings[1:]:
+        model.objects.filter(pk=pk, status="PENDING").update(
+            status="CONFIRMED", updated_at=now
+        )
+
+    if not confirm_holds(booking):
+        for model, pk in bookings:
+            model.objects.filter(pk=pk).update(status="CANCELLED", updated_at=now)
+        booking.status = "CANCELLED"
+        return False
+    booking.status = "CONFIRMED"
+    return True
+
+
+def release_holds(hold_ids):
+    """Release the given holds and cancel their unpaid bookings.
+
+    Seats and rooms go back with one UPDATE per table, each adding the sum
+    of the released holds through a correlated subquery, so the cost does
+    not grow with one statement per hold. Call inside a transaction.
+    """
+    holds = InventoryHold.objects.filter(
+        pk__in=list(hold_ids), status__in=["HELD", "CONVERTED"]
+    )
+    now = timezone.now()
+
+    held_seats = (
+        holds.filter(flight=OuterRef("pk"))
+        .order_by()
+        .values("flight")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    flights = Flight.objects.filter(pk__in=holds.values("flight"))
+    invalidate_flight_routes(
+        flights.values_list("source_city_id", "destination_city_id", "flight_date")
+    )
+    flights.update(
+        available_seats=Least(
+            F("available_seats") + Subquery(held_seats),
+            F("total_seats"),
+            output_field=IntegerField(),
+        ),
+        updated_at=now,
+    )
+
+    holds_on_night = holds.filter(
+        hotel=OuterRef("hotel"),
+        room_type=OuterRef("room_type"),
+        check_in_date__lte=OuterRef("night"),
+        check_out_date__gt=OuterRef("night"),
+    )
+    held_rooms = (
+        holds_on_night.order_by()
+        .values("hotel")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    HotelRoomInventory.objects.filter(Exists(holds_on_night)).update(
+        booked_rooms=Greatest(
+            F("booked_rooms") - Subquery(held_rooms), 0, output_field=IntegerField()
+        )
+    )
+
+    flight_bookings = FlightBooking.objects.filter(hold__in=holds, status="PENDING")
+    hotel_bookings = HotelBooking.objects.filter(hold__in=holds, status="PENDING")
+    PackageBooking.objects.filter(
+        Q(flight_booking__in=flight_bookings) | Q(hotel_booking__in=hotel_bookings),
+        status="PENDING",
+    ).update(status="CANCELLED", updated_at=now)
+    flight_bookings.update(status="CANCELLED", updated_at=now)
+    hotel_bookings.update(status="CANCELLED", updated_at=now)
+
+    return holds.update(status="RELEASED")
+
+
+def release_expired_holds(batch_size=1000):
+    """Release every expired hold, ``batch_size`` holds per transaction.
+
+    Returns the number of holds released.
+    """
+    released = 0
+    while True:
+        with transaction.atomic():
+            expired = list(
+                InventoryHold.objects.select_for_update(skip_locked=True)
+                .filter(status="HELD", expires_at__lte=timezone.now())
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not expired:
+                return released
+            released += release_holds(expired)
+
+
+def cancel_booking(booking):
+    """Cancel ``booking`` and give its seats and/or rooms back.
+
+    The status change is a conditional UPDATE, so a booking cancelled twice
+    at the same time only releases its inventory once. Returns ``False`` if
+    the booking was already cancelled. Call inside a transaction.
+    """
+    updated = (
+        type(booking)
+        .objects.filter(pk=booking.pk)
+        .exclude(status="CANCELLED")
+        .update(status="CANCELLED", updated_at=timezone.now())
+    )
+    if not updated:
+        return False
+
+    _holds_for(booking).filter(status="HELD").update(status="RELEASED")
+    if isinstance(booking, FlightBooking):
+        release_seats(booking.flight, booking.passenger_count)
+    elif isinstance(booking, HotelBooking):
+        release_rooms(
+            booking.hotel,
+            booking.rooms_count,
+            booking.check_in_date,
+            booking.check_out_date,
+        )
+    elif isinstance(booking, PackageBooking):
+        cancel_booking(booking.flight_booking)
+        cancel_booking(booking.hotel_booking)
+
+    booking.status = "CANCELLED"
+    return True
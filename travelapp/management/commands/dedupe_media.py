@@ -0,0 +1,147 @@
+import posixpath
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from travelapp.images import (
+    IMAGE_EXTENSIONS,
+    IMAGE_FORMATS,
+    IMAGE_WIDTHS,
+    derivative_name,
+)
+from travelapp.models import Hotel, TouristAttraction
+from travelapp.storage import content_hash
+
+IMAGE_FIELDS = [(Hotel, "main_image"), (TouristAttraction, "image")]
+
+# Media directories holding generated files rather than uploads.
+SKIPPED_DIRECTORIES = {"derivatives"}
+
+
+def media_files(storage, directory=""):
+    """Names of every image stored under ``directory``, recursively."""
+    directories, files = storage.listdir(directory)
+    for name in sorted(files):
+        if posixpath.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+            yield posixpath.join(directory, name)
+    for name in sorted(directories):
+        if directory or name not in SKIPPED_DIRECTORIES:
+            yield from media_files(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        "Find identical images anywhere in the media directories, keep one "
+        "content-addressed copy of each and point hotels and attractions at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without touching files or rows.",
+        )
+        parser.add_argument(
+            "--delete-originals",
+            action="store_true",
+            help="Delete the duplicates once no row refers to them.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        # Both image fields store into MEDIA_ROOT through the same storage.
+        storage = Hotel._meta.get_field("main_image").storage
+
+        referenced = set()
+        for model, field_name in IMAGE_FIELDS:
+            referenced.update(
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True)
+            )
+
+        groups = defaultdict(list)
+        for name in media_files(storage):
+            with storage.open(name, "rb") as content:
+                groups[content_hash(content)].append(name)
+        found = {name for names in groups.values() for name in names}
+        for name in sorted(referenced - found):
+            self.stderr.write(f"{name}: missing, skipped")
+
+        moved = rows = saved_bytes = 0
+        superseded = []
+        for names in groups.values():
+            if len(names) == 1 and names[0] not in referenced:
+                continue
+            new_name = self.content_addressed_name(storage, names, referenced)
+            old_names = [name for name in names if name != new_name]
+            if not old_names:
+                continue
+            if not storage.exists(new_name) and not dry_run:
+                with storage.open(old_names[0], "rb") as content:
+                    storage.save(new_name, content)
+            saved_bytes += sum(storage.size(name) for name in names[1:])
+            moved += len(old_names)
+
+            with transaction.atomic():
+                for model, field_name in IMAGE_FIELDS:
+                    repointed = model.objects.filter(
+                        **{f"{field_name}__in": old_names}
+                    )
+                    if dry_run:
+                        rows += repointed.count()
+                    else:
+                        rows += repointed.update(**{field_name: new_name})
+            superseded.extend(old_names)
+
+        derivatives = deleted = 0
+        if not dry_run:
+            # No row shows the superseded names any more.
+            derivatives = self.delete_derivatives(superseded)
+            if options["delete_originals"]:
+                for name in superseded:
+                    if not any(
+                        model.objects.filter(**{field_name: name}).exists()
+                        for model, field_name in IMAGE_FIELDS
+                    ):
+                        storage.delete(name)
+                        deleted += 1
+
+        prefix = "Would move" if dry_run else "Moved"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} {moved} file(s) for {rows} row(s), {saved_bytes} bytes "
+                f"of them duplicates; deleted {deleted} original(s) and "
+                f"{derivatives} derivative(s)."
+            )
+        )
+        if moved and not dry_run:
+            self.stdout.write("Run generate_image_derivatives for the new names.")
+
+    def content_addressed_name(self, storage, names, referenced):
+        """The name a group of identical files is kept under.
+
+        A member already stored under its hash wins; otherwise the copy goes
+        next to the first file a row refers to, or the first file found.
+        """
+        for name in names:
+            with storage.open(name, "rb") as content:
+                if storage.hashed_name(name, content) == name:
+                    return name
+        name = next((name for name in names if name in referenced), names[0])
+        with storage.open(name, "rb") as content:
+            return storage.hashed_name(name, content)
+
+    def delete_derivatives(self, names):
+        """Delete every derivative of ``names``; returns how many there were."""
+        deleted = 0
+        for name in names:
+            for width in IMAGE_WIDTHS:
+                for image_format in IMAGE_FORMATS:
+                    derivative = derivative_name(name, width, image_format)
+                    if default_storage.exists(derivative):
+                        default_storage.delete(derivative)
+                        deleted += 1
+        return deleted
@@ -0,0 +1,98 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from travelapp.models import Amenity, City, Flight, Hotel, TouristAttraction
+from travelapp.search import attraction_search, flight_search, hotel_search
+
+NOTES = """\
+The indexes serve each search's filters and its whole ordering, id
+tiebreak included, so flight and hotel rows come back sorted with no temp
+B-tree. No plan is index-only: the views show every column and the joined
+airline and cities, so rows are read from the table. Attractions in a
+category are ordered by their city's name, a column of another table that
+no attraction index can hold, so the category's rows are sorted.
+"""
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the flight, hotel and attraction searches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of standard output.",
+        )
+
+    def handle(self, *args, **options):
+        flight = Flight.objects.first()
+        hotel = Hotel.objects.first()
+        attraction = TouristAttraction.objects.first()
+        if not (flight and hotel and attraction):
+            raise CommandError("Load some flights, hotels and attractions first.")
+
+        city = City.objects.get(pk=attraction.city_id)
+        querysets = [
+            (
+                "FlightView / PackageView: flights on a route and date",
+                flight_search(
+                    flight.source_city_id,
+                    flight.destination_city_id,
+                    flight.flight_date,
+                    1,
+                ),
+            ),
+            (
+                "HotelView: hotels in a city with rating and price filters",
+                hotel_search(
+                    hotel.city_id,
+                    1,
+                    datetime.date.today(),
+                    datetime.date.today() + datetime.timedelta(days=3),
+                    min_rating=3,
+                    max_price=500,
+                ),
+            ),
+            (
+                "HotelView: hotels in a city with some amenities",
+                hotel_search(
+                    hotel.city_id,
+                    1,
+                    datetime.date.today(),
+                    datetime.date.today() + datetime.timedelta(days=3),
+                    amenities=Amenity.objects.all()[:2],
+                ),
+            ),
+            (
+                "PlacesView: attractions in a city",
+                attraction_search(city=city),
+            ),
+            (
+                "PlacesView: attractions in a category",
+                attraction_search(category=attraction.category),
+            ),
+        ]
+
+        lines = [f"# Search query plans ({connection.vendor})", "", NOTES]
+        for title, queryset in querysets:
+            lines += [
+                f"## {title}",
+                "",
+                "```sql",
+                str(queryset.query),
+                "```",
+                "",
+                "```",
+                queryset.explain(),
+                "```",
+                "",
+            ]
+        report = "\n".join(lines)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(report)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(report)
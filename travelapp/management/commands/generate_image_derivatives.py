@@ -0,0 +1,85 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from travelapp.images import IMAGE_ERRORS, IMAGE_EXTENSIONS, generate_derivatives
+from travelapp.models import Hotel, TouristAttraction
+
+
+logger = logging.getLogger(__name__)
+
+
+def _generate(name, force):
+    # A corrupt or unsupported image fails on its own; the run goes on.
+    try:
+        return name, generate_derivatives(name, force=force), None
+    except IMAGE_ERRORS as e:
+        logger.warning("Could not generate derivatives of %s: %r", name, e)
+        return name, 0, f"{type(e).__name__}: {e}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized WebP and JPEG derivatives of hotel and attraction "
+        "images, and of any images in the given media directories."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directories",
+            nargs="*",
+            help="Extra media directories whose images are converted too, e.g. img.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives that already exist.",
+        )
+
+    def handle(self, *args, **options):
+        names = set(
+            Hotel.objects.exclude(main_image="").values_list("main_image", flat=True)
+        )
+        names.update(
+            TouristAttraction.objects.exclude(image="").values_list("image", flat=True)
+        )
+        for directory in options["directories"]:
+            _, files = default_storage.listdir(directory)
+            names.update(
+                f"{directory.rstrip('/')}/{name}"
+                for name in files
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            )
+        names.discard(None)
+
+        written = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as pool:
+            futures = [
+                pool.submit(_generate, name, options["force"]) for name in sorted(names)
+            ]
+            for future in as_completed(futures):
+                name, count, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+                else:
+                    written += count
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} derivative(s) of {len(names)} image(s); "
+                f"{failed} could not be read."
+            )
+        )
@@ -0,0 +1,116 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from travelapp.importers import importers, read_records
+
+# Rejected records reported individually; the rest are only counted.
+MAX_REPORTED_ERRORS = 20
+
+
+def describe(error):
+    if hasattr(error, "error_dict"):
+        return "; ".join(
+            f"{field}: {' '.join(messages)}"
+            for field, messages in error.message_dict.items()
+        )
+    return " ".join(error.messages)
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert or update cities, airlines, flights, hotels or attractions "
+        "from a CSV or JSON-lines file, matching rows on their natural keys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(importers()))
+        parser.add_argument(
+            "path", help="File to read; - for standard input. May be gzipped."
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format (default: from the file extension).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Records written per statement and transaction (default: 2000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and resolve its references without writing.",
+        )
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        importer = importers()[kind]
+        importer.load_references()
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        read = written = rejected = 0
+        batch = {}
+        first_line = None
+        started = time.monotonic()
+
+        def flush(last_line):
+            nonlocal written
+            if batch and not dry_run:
+                try:
+                    importer.write(list(batch.values()))
+                except IntegrityError as e:
+                    raise CommandError(
+                        f"Lines {first_line}-{last_line} were not written: {e}. "
+                        f"{written} earlier row(s) were."
+                    )
+            written += len(batch)
+            batch.clear()
+            if options["verbosity"] >= 2:
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{read} record(s) read, {read / elapsed:.0f}/s", ending="\r"
+                )
+
+        try:
+            records = read_records(options["path"], options["format"])
+            line = 0
+            for line, record in records:
+                read += 1
+                try:
+                    instance = importer.build(record)
+                except ValidationError as e:
+                    rejected += 1
+                    if rejected <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"line {line}: {describe(e)}")
+                    continue
+                if not batch:
+                    first_line = line
+                # A later record for the same row replaces an earlier one.
+                batch[importer.natural_key(instance)] = instance
+                if len(batch) >= batch_size:
+                    flush(line)
+            flush(line)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"{options['path']}: {e}")
+
+        elapsed = time.monotonic() - started
+        if options["verbosity"] >= 2:
+            self.stdout.write("")
+        if rejected > MAX_REPORTED_ERRORS:
+            self.stderr.write(
+                f"... and {rejected - MAX_REPORTED_ERRORS} more rejected record(s)."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would write' if dry_run else 'Wrote'} {written} {kind} row(s) "
+                f"from {read} record(s) in {elapsed:.1f}s "
+                f"({read / elapsed if elapsed else 0:.0f} records/s); "
+                f"{rejected} rejected."
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from travelapp.amenities import index_amenities
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the amenities hotels list to the amenity catalog and recompute "
+        "the hotels' amenity masks, e.g. after loading hotels with SQL."
+    )
+
+    def handle(self, *args, **options):
+        changed = index_amenities()
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the amenity masks of {changed} hotel(s).")
+        )
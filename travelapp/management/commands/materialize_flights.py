@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from travelapp.schedules import materialize_horizon, prune_flights
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the dated flights of recurring schedules for the coming days, "
+        "optionally deleting past scheduled flights nobody booked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.FLIGHT_SCHEDULE_HORIZON_DAYS,
+            help=(
+                "Days ahead to materialize "
+                f"(default: {settings.FLIGHT_SCHEDULE_HORIZON_DAYS})."
+            ),
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete past scheduled flights without bookings.",
+        )
+
+    def handle(self, *args, **options):
+        created = materialize_horizon(options["days"])
+        message = f"Created {created} flight(s)"
+        if options["prune"]:
+            message += f", deleted {prune_flights()} past flight(s)"
+        self.stdout.write(self.style.SUCCESS(message + "."))
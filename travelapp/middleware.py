@@ -0,0 +1,20 @@
+from django.middleware.gzip import GZipMiddleware
+
+# Content types worth compressing on the fly; images and archives already
+# are compressed, and static text is served pre-compressed.
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/plain",
+    "application/json",
+    "application/xml",
+    "text/xml",
+)
+
+
+class TextGZipMiddleware(GZipMiddleware):
+    """Gzip HTML and JSON responses, leaving every other type alone."""
+
+    def process_response(self, request, response):
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='flight',
+            constraint=models.CheckConstraint(condition=models.Q(('available_seats__gte', 0), ('available_seats__lte', models.F('total_seats'))), name='flight_available_seats_within_total'),
+        ),
+        migrations.AddConstraint(
+            model_name='hotel',
+            constraint=models.CheckConstraint(condition=models.Q(('available_rooms__gte', 0), ('available_rooms__lte', models.F('total_rooms'))), name='hotel_available_rooms_within_total'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0002_inventory_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['source_city', 'destination_city', 'flight_date', 'status', 'departure_time', 'available_seats'], name='flight_route_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['city', '-star_rating', 'price_per_night', 'available_rooms'], name='hotel_city_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristattraction',
+            index=models.Index(fields=['city', 'name'], name='attraction_city_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristattraction',
+            index=models.Index(fields=['category', 'city', 'name'], name='attraction_category_idx'),
+        ),
+    ]
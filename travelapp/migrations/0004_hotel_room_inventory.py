@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+import django.db.models.deletion
+import datetime
+
+from django.db import migrations, models
+
+
+def backfill_room_inventory(apps, schema_editor):
+    """Turn the open hotel bookings into per-night inventory rows."""
+    HotelBooking = apps.get_model("travelapp", "HotelBooking")
+    HotelRoomInventory = apps.get_model("travelapp", "HotelRoomInventory")
+
+    booked = {}
+    bookings = (
+        HotelBooking.objects.exclude(status__in=["CANCELLED", "CHECKED_OUT"])
+        .select_related("hotel")
+        .iterator()
+    )
+    for booking in bookings:
+        night = booking.check_in_date
+        while night < booking.check_out_date:
+            key = (booking.hotel_id, night)
+            total, count = booked.get(key, (booking.hotel.total_rooms, 0))
+            booked[key] = (total, count + booking.rooms_count)
+            night += datetime.timedelta(days=1)
+
+    HotelRoomInventory.objects.bulk_create(
+        [
+            HotelRoomInventory(
+                hotel_id=hotel_id,
+                night=night,
+                total_rooms=total,
+                booked_rooms=min(count, total),
+            )
+            for (hotel_id, night), (total, count) in booked.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0003_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelRoomInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('STANDARD', 'Standard'), ('DELUXE', 'Deluxe'), ('SUITE', 'Suite')], default='STANDARD', max_length=20)),
+                ('night', models.DateField()),
+                ('total_rooms', models.PositiveIntegerField()),
+                ('booked_rooms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Hotel room inventory',
+                'ordering': ['hotel', 'room_type', 'night'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='hotel',
+            name='hotel_city_search_idx',
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['city', '-star_rating', 'price_per_night'], name='hotel_city_search_idx'),
+        ),
+        migrations.AddField(
+            model_name='hotelroominventory',
+            name='hotel',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_inventory', to='travelapp.hotel'),
+        ),
+        migrations.AddConstraint(
+            model_name='hotelroominventory',
+            constraint=models.UniqueConstraint(fields=('hotel', 'room_type', 'night'), name='hotel_room_inventory_night_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='hotelroominventory',
+            constraint=models.CheckConstraint(condition=models.Q(('booked_rooms__gte', 0), ('booked_rooms__lte', models.F('total_rooms'))), name='hotel_room_inventory_booked_within_total'),
+        ),
+        migrations.RunPython(backfill_room_inventory, migrations.RunPython.noop),
+    ]
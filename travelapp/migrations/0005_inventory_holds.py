@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0004_hotel_room_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(blank=True, max_length=20)),
+                ('check_in_date', models.DateField(blank=True, null=True)),
+                ('check_out_date', models.DateField(blank=True, null=True)),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('HELD', 'Held'), ('CONVERTED', 'Converted'), ('RELEASED', 'Released')], default='HELD', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('flight', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='travelapp.flight')),
+                ('flight_booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hold', to='travelapp.flightbooking')),
+                ('hotel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='travelapp.hotel')),
+                ('hotel_booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hold', to='travelapp.hotelbooking')),
+            ],
+            options={
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='hold_expiry_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('flight_booking__isnull', False), ('hotel_booking__isnull', True)), models.Q(('flight_booking__isnull', True), ('hotel_booking__isnull', False)), _connector='OR'), name='hold_single_booking')],
+            },
+        ),
+    ]
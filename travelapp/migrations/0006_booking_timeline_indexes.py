@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0005_inventory_holds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flightbooking',
+            index=models.Index(fields=['user', '-booking_date'], name='flight_booking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotelbooking',
+            index=models.Index(fields=['user', '-booking_date'], name='hotel_booking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagebooking',
+            index=models.Index(fields=['user', '-booking_date'], name='package_booking_user_date_idx'),
+        ),
+    ]
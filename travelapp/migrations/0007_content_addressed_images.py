@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:14
+
+import travelapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0006_booking_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hotel',
+            name='main_image',
+            field=models.ImageField(blank=True, null=True, storage=travelapp.storage.ContentAddressedStorage(), upload_to='hotels/'),
+        ),
+        migrations.AlterField(
+            model_name='touristattraction',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=travelapp.storage.ContentAddressedStorage(), upload_to='attractions/'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0007_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='flight',
+            name='flight_number',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.CreateModel(
+            name='FlightSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('flight_number', models.CharField(max_length=10)),
+                ('days_of_week', models.CharField(help_text='ISO weekdays operated, e.g. 135 for Monday, Wednesday, Friday', max_length=7, validators=[django.core.validators.RegexValidator('^[1-7]+$', 'Use the digits 1 (Monday) to 7 (Sunday).')])),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField()),
+                ('departure_time', models.TimeField()),
+                ('arrival_time', models.TimeField()),
+                ('economy_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('business_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('total_seats', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('airline', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='travelapp.airline')),
+                ('destination_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='arriving_schedules', to='travelapp.city')),
+                ('source_city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departing_schedules', to='travelapp.city')),
+            ],
+            options={
+                'ordering': ['flight_number', 'valid_from'],
+            },
+        ),
+        migrations.AddField(
+            model_name='flight',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='flights', to='travelapp.flightschedule'),
+        ),
+        migrations.AddIndex(
+            model_name='flightschedule',
+            index=models.Index(fields=['source_city', 'destination_city', 'valid_until'], name='schedule_route_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flightschedule',
+            index=models.Index(fields=['valid_until'], name='schedule_valid_until_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='flightschedule',
+            constraint=models.CheckConstraint(condition=models.Q(('valid_until__gte', models.F('valid_from'))), name='schedule_valid_until_after_valid_from'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:46
+
+from collections import Counter
+
+import django.core.validators
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Amenity.MAX_AMENITIES and the name and slug lengths as of this migration.
+MAX_AMENITIES = 63
+NAME_LENGTH = SLUG_LENGTH = 50
+
+
+def build_amenity_catalog(apps, schema_editor):
+    """Catalog the amenities the hotels list and set their masks.
+
+    The most listed amenities get the bits first.
+    """
+    Amenity = apps.get_model("travelapp", "Amenity")
+    Hotel = apps.get_model("travelapp", "Hotel")
+
+    hotels = list(Hotel.objects.only("pk", "amenities"))
+    lists = []
+    names = {}
+    counts = Counter()
+    for hotel in hotels:
+        slugs = set()
+        for name in (hotel.amenities or "").split(","):
+            name = " ".join(name.split())[:NAME_LENGTH].rstrip()
+            slug = slugify(name)[:SLUG_LENGTH].rstrip("-")
+            if slug and slug not in slugs:
+                slugs.add(slug)
+                names.setdefault(slug, name)
+                counts[slug] += 1
+        lists.append(slugs)
+
+    slugs = sorted(counts, key=lambda slug: (-counts[slug], slug))[:MAX_AMENITIES]
+    bits = {slug: bit for bit, slug in enumerate(slugs)}
+    Amenity.objects.bulk_create(
+        [Amenity(slug=slug, name=names[slug], bit=bit) for slug, bit in bits.items()]
+    )
+    for hotel, slugs in zip(hotels, lists):
+        mask = 0
+        for slug in slugs:
+            if slug in bits:
+                mask |= 1 << bits[slug]
+        hotel.amenity_mask = mask
+    Hotel.objects.bulk_update(hotels, ["amenity_mask"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0008_flight_schedules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(unique=True)),
+                ('bit', models.PositiveSmallIntegerField(unique=True, validators=[django.core.validators.MaxValueValidator(62)])),
+            ],
+            options={
+                'verbose_name_plural': 'Amenities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='amenity_mask',
+            field=models.BigIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='hotel',
+            name='hotel_city_search_idx',
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['city', '-star_rating', 'price_per_night', 'amenity_mask'], name='hotel_city_search_idx'),
+        ),
+        migrations.RunPython(build_amenity_catalog, migrations.RunPython.noop),
+    ]
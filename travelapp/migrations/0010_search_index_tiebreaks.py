@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0009_hotel_amenities'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='flight',
+            name='flight_route_search_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='hotel',
+            name='hotel_city_search_idx',
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['source_city', 'destination_city', 'flight_date', 'status', 'departure_time', 'id', 'available_seats'], name='flight_route_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['city', '-star_rating', 'price_per_night', 'id', 'amenity_mask'], name='hotel_city_search_idx'),
+        ),
+    ]
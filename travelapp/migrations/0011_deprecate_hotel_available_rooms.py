@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0010_search_index_tiebreaks'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='hotel',
+            name='hotel_available_rooms_within_total',
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='available_rooms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:30
+
+import travelapp.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travelapp', '0011_deprecate_hotel_available_rooms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flightbooking',
+            index=models.Index(fields=['status', '-id'], name='flight_booking_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=travelapp.indexes.CaseInsensitiveIndex(fields=['name'], name='hotel_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotelbooking',
+            index=models.Index(fields=['status', '-id'], name='hotel_booking_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagebooking',
+            index=models.Index(fields=['status', '-id'], name='package_booking_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristattraction',
+            index=travelapp.indexes.CaseInsensitiveIndex(fields=['name'], name='attraction_name_search_idx'),
+        ),
+    ]
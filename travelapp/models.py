@@ -1,9 +1,12 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from decimal import Decimal
 
+from .indexes import CaseInsensitiveIndex
+from .storage import ContentAddressedStorage
+
 
 class City(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -32,6 +35,95 @@ class Airline(models.Model):
         return self.name
 
 
+class FlightSchedule(models.Model):
+    """A flight number operated on some weekdays over a range of dates.
+
+    Its dated ``Flight`` rows are created over a rolling horizon by the
+    ``materialize_flights`` command, and when a later flight is booked.
+    Searches find the later flights in the schedule (see
+    ``travelapp.schedules``).
+    """
+
+    flight_number = models.CharField(max_length=10)
+    airline = models.ForeignKey(Airline, on_delete=models.CASCADE)
+    source_city = models.ForeignKey(
+        City, on_delete=models.CASCADE, related_name="departing_schedules"
+    )
+    destination_city = models.ForeignKey(
+        City, on_delete=models.CASCADE, related_name="arriving_schedules"
+    )
+    days_of_week = models.CharField(
+        max_length=7,
+        validators=[
+            RegexValidator(r"^[1-7]+$", "Use the digits 1 (Monday) to 7 (Sunday).")
+        ],
+        help_text="ISO weekdays operated, e.g. 135 for Monday, Wednesday, Friday",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    economy_price = models.DecimalField(
+        max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))]
+    )
+    business_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal("0.01"))],
+    )
+    total_seats = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["flight_number", "valid_from"]
+        indexes = [
+            # Schedules in force on a date, per route or network-wide.
+            models.Index(
+                fields=["source_city", "destination_city", "valid_until"],
+                name="schedule_route_idx",
+            ),
+            models.Index(fields=["valid_until"], name="schedule_valid_until_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(valid_until__gte=models.F("valid_from")),
+                name="schedule_valid_until_after_valid_from",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.flight_number} {self.source_city} to {self.destination_city}, "
+            f"{self.valid_from} to {self.valid_until}"
+        )
+
+    def operates_on(self, date):
+        return (
+            self.valid_from <= date <= self.valid_until
+            and str(date.isoweekday()) in self.days_of_week
+        )
+
+    def flight_on(self, date):
+        """The unsaved ``Flight`` this schedule operates on ``date``."""
+        return Flight(
+            schedule=self,
+            flight_number=self.flight_number,
+            airline_id=self.airline_id,
+            source_city_id=self.source_city_id,
+            destination_city_id=self.destination_city_id,
+            flight_date=date,
+            departure_time=self.departure_time,
+            arrival_time=self.arrival_time,
+            economy_price=self.economy_price,
+            business_price=self.business_price,
+            total_seats=self.total_seats,
+            available_seats=self.total_seats,
+        )
+
+
 class Flight(models.Model):
     FLIGHT_STATUS_CHOICES = [
         ("SCHEDULED", "Scheduled"),
@@ -42,7 +134,15 @@ class Flight(models.Model):
         ("ARRIVED", "Arrived"),
     ]
 
-    flight_number = models.CharField(max_length=10, unique=True)
+    # Unique per date, see Meta.unique_together.
+    flight_number = models.CharField(max_length=10)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
     airline = models.ForeignKey(Airline, on_delete=models.CASCADE)
     source_city = models.ForeignKey(
         City, on_delete=models.CASCADE, related_name="departing_flights"
@@ -74,6 +174,31 @@ class Flight(models.Model):
     class Meta:
         ordering = ["flight_date", "departure_time"]
         unique_together = ["flight_number", "flight_date"]
+        indexes = [
+            # Route search: equality on the route, date and status, then
+            # the search's (departure_time, id) order, so rows come back
+            # sorted; the seat filter is checked in the index.
+            models.Index(
+                fields=[
+                    "source_city",
+                    "destination_city",
+                    "flight_date",
+                    "status",
+                    "departure_time",
+                    "id",
+                    "available_seats",
+                ],
+                name="flight_route_search_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(
+                    available_seats__gte=0, available_seats__lte=models.F("total_seats")
+                ),
+                name="flight_available_seats_within_total",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.flight_number} - {self.source_city} to {self.destination_city}"
@@ -85,6 +210,30 @@ class Flight(models.Model):
             raise ValidationError("Available seats cannot exceed total seats")
 
 
+class Amenity(models.Model):
+    """A hotel amenity, filterable through its bit in ``Hotel.amenity_mask``.
+
+    Bits are handed out by ``travelapp.amenities`` and never reused while
+    the amenity exists.
+    """
+
+    # Bits of a signed 64-bit integer.
+    MAX_AMENITIES = 63
+
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+    bit = models.PositiveSmallIntegerField(
+        unique=True, validators=[MaxValueValidator(MAX_AMENITIES - 1)]
+    )
+
+    class Meta:
+        verbose_name_plural = "Amenities"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class Hotel(models.Model):
     name = models.CharField(max_length=200)
     city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="hotels")
@@ -97,6 +246,9 @@ class Hotel(models.Model):
         help_text="Rating from 1 to 5 stars",
     )
     amenities = models.TextField(help_text="Comma-separated list of amenities")
+    # Bits of the listed amenities, kept in step with the list on save.
+    # Rows inserted with SQL have 0 until the index_amenities command is run.
+    amenity_mask = models.BigIntegerField(default=0, db_default=0, editable=False)
     distance_from_airport = models.DecimalField(
         max_digits=5,
         decimal_places=2,
@@ -105,8 +257,15 @@ class Hotel(models.Model):
         help_text="Distance in kilometers",
     )
     total_rooms = models.PositiveIntegerField()
-    available_rooms = models.PositiveIntegerField()
-    main_image = models.ImageField(upload_to="hotels/", null=True, blank=True)
+    # Deprecated: free rooms are counted per night in HotelRoomInventory
+    # and nothing updates this any more. Kept for existing data only.
+    available_rooms = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    main_image = models.ImageField(
+        upload_to="hotels/",
+        storage=ContentAddressedStorage(),
+        null=True,
+        blank=True,
+    )
     phone = models.CharField(max_length=20, blank=True)
     email = models.EmailField(blank=True)
     website = models.URLField(blank=True)
@@ -115,15 +274,70 @@ class Hotel(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Hotel search: city equality, then the search's "best rated,
+            # cheapest first" order with its id tiebreak, so rows come back
+            # sorted. The amenity bitmask test is evaluated on the index
+            # entries, without reading hotels that fail it.
+            models.Index(
+                fields=[
+                    "city",
+                    "-star_rating",
+                    "price_per_night",
+                    "id",
+                    "amenity_mask",
+                ],
+                name="hotel_city_search_idx",
+            ),
+            # The admin's name prefix search.
+            CaseInsensitiveIndex(fields=["name"], name="hotel_name_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.city.name}"
 
-    def clean(self):
-        from django.core.exceptions import ValidationError
 
-        if self.available_rooms > self.total_rooms:
-            raise ValidationError("Available rooms cannot exceed total rooms")
+class HotelRoomInventory(models.Model):
+    """Rooms sold per hotel, room type and night.
+
+    Rows are created on first booking of a night with the hotel's
+    ``total_rooms`` as capacity; a night without a row is fully available.
+    """
+
+    ROOM_TYPE_CHOICES = [
+        ("STANDARD", "Standard"),
+        ("DELUXE", "Deluxe"),
+        ("SUITE", "Suite"),
+    ]
+
+    hotel = models.ForeignKey(
+        Hotel, on_delete=models.CASCADE, related_name="room_inventory"
+    )
+    room_type = models.CharField(
+        max_length=20, choices=ROOM_TYPE_CHOICES, default="STANDARD"
+    )
+    night = models.DateField()
+    total_rooms = models.PositiveIntegerField()
+    booked_rooms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Hotel room inventory"
+        ordering = ["hotel", "room_type", "night"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hotel", "room_type", "night"],
+                name="hotel_room_inventory_night_unique",
+            ),
+            models.CheckConstraint(
+                condition=models.Q(
+                    booked_rooms__gte=0, booked_rooms__lte=models.F("total_rooms")
+                ),
+                name="hotel_room_inventory_booked_within_total",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel.name} - {self.room_type} - {self.night}"
 
 
 class TouristAttraction(models.Model):
@@ -144,7 +358,12 @@ class TouristAttraction(models.Model):
         max_length=20, choices=CATEGORY_CHOICES, default="OTHER"
     )
     description = models.TextField()
-    image = models.ImageField(upload_to="attractions/", null=True, blank=True)
+    image = models.ImageField(
+        upload_to="attractions/",
+        storage=ContentAddressedStorage(),
+        null=True,
+        blank=True,
+    )
     address = models.TextField(blank=True)
     opening_hours = models.CharField(max_length=200, blank=True)
     entry_fee = models.DecimalField(
@@ -155,6 +374,13 @@ class TouristAttraction(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["city", "name"], name="attraction_city_name_idx"),
+            models.Index(
+                fields=["category", "city", "name"], name="attraction_category_idx"
+            ),
+            CaseInsensitiveIndex(fields=["name"], name="attraction_name_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.city.name}"
@@ -193,6 +419,11 @@ class FlightBooking(models.Model):
 
     class Meta:
         ordering = ["-booking_date"]
+        indexes = [
+            models.Index(fields=["user", "-booking_date"], name="flight_booking_user_date_idx"),
+            # The admin's status filter, newest first.
+            models.Index(fields=["status", "-id"], name="flight_booking_status_idx"),
+        ]
 
     def __str__(self):
         return f"Booking {self.booking_reference} - {self.user.username}"
@@ -226,6 +457,11 @@ class HotelBooking(models.Model):
 
     class Meta:
         ordering = ["-booking_date"]
+        indexes = [
+            models.Index(fields=["user", "-booking_date"], name="hotel_booking_user_date_idx"),
+            # The admin's status filter, newest first.
+            models.Index(fields=["status", "-id"], name="hotel_booking_status_idx"),
+        ]
 
     def __str__(self):
         return f"Booking {self.booking_reference} - {self.user.username}"
@@ -267,11 +503,81 @@ class PackageBooking(models.Model):
 
     class Meta:
         ordering = ["-booking_date"]
+        indexes = [
+            models.Index(fields=["user", "-booking_date"], name="package_booking_user_date_idx"),
+            # The admin's status filter, newest first.
+            models.Index(fields=["status", "-id"], name="package_booking_status_idx"),
+        ]
 
     def __str__(self):
         return f"Package {self.booking_reference} - {self.user.username}"
 
 
+class InventoryHold(models.Model):
+    """Seats or rooms held for an unpaid booking.
+
+    The inventory is taken when the booking is made. Paying for the booking
+    converts the hold into a sale; otherwise the ``release_expired_holds``
+    command gives the inventory back once ``expires_at`` has passed. The
+    flight, hotel and stay are copied from the booking so expired holds can
+    be released with set-based UPDATEs.
+    """
+
+    HOLD_STATUS_CHOICES = [
+        ("HELD", "Held"),
+        ("CONVERTED", "Converted"),
+        ("RELEASED", "Released"),
+    ]
+
+    flight_booking = models.OneToOneField(
+        FlightBooking,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="hold",
+    )
+    hotel_booking = models.OneToOneField(
+        HotelBooking,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="hold",
+    )
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, null=True, blank=True, related_name="holds"
+    )
+    hotel = models.ForeignKey(
+        Hotel, on_delete=models.CASCADE, null=True, blank=True, related_name="holds"
+    )
+    room_type = models.CharField(max_length=20, blank=True)
+    check_in_date = models.DateField(null=True, blank=True)
+    check_out_date = models.DateField(null=True, blank=True)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=20, choices=HOLD_STATUS_CHOICES, default="HELD"
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["expires_at"]
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="hold_expiry_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(flight_booking__isnull=False, hotel_booking__isnull=True)
+                    | models.Q(flight_booking__isnull=True, hotel_booking__isnull=False)
+                ),
+                name="hold_single_booking",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.quantity} ({self.status}) until {self.expires_at}"
+
+
 class BookingPayment(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ("PENDING", "Pending"),
@@ -0,0 +1,98 @@
+"""Flight + hotel package ranking.
+
+A package's score is the sum of a flight score and a hotel score, both in
+the booking currency:
+
+* flight: the fare for all passengers, plus ``minute_value`` per passenger
+  for every scheduled minute in the air;
+* hotel: the price of the stay, less ``star_value`` per star for every
+  room-night.
+
+The package discount is a percentage of the whole price, so it scales
+every score alike and does not change the order. Listed prices are
+estimates for the searched dates and the site's discount; the booking is
+charged by ``package_price`` for the dates and discount it is made with. Because the score is a
+sum of the two sides, each candidate list is scored in one pass and sorted
+once, and ``ranked_pairs`` walks them cheapest first. Only the best
+``limit`` packages are ever built, not the flight x hotel cross product.
+"""
+from array import array
+from collections import namedtuple
+from decimal import Decimal
+from itertools import islice
+
+from .search import flight_fare, flight_minutes, ranked_pairs
+
+PACKAGE_RESULTS = 20
+STAR_VALUE = 10
+MINUTE_VALUE = 0.5
+
+Package = namedtuple(
+    "Package", ["flight", "hotel", "subtotal", "discount_amount", "total_price"]
+)
+
+
+def package_price(flight_price, hotel_price, discount=0):
+    """``(subtotal, discount_amount, total_price)`` of a package.
+
+    ``discount`` is the package discount percentage.
+    """
+    subtotal = flight_price + hotel_price
+    discount_amount = subtotal * (Decimal(discount) / Decimal("100"))
+    return subtotal, discount_amount, subtotal - discount_amount
+
+
+def top_packages(
+    flights,
+    hotels,
+    passengers,
+    travel_class,
+    nights,
+    rooms=1,
+    discount=0,
+    limit=PACKAGE_RESULTS,
+    star_value=STAR_VALUE,
+    minute_value=MINUTE_VALUE,
+):
+    """The ``limit`` best flight x hotel packages, best first.
+
+    ``discount`` is the package discount percentage. Prices are estimates
+    for ``nights`` and ``rooms``; flights not sold in ``travel_class`` are
+    left out.
+    """
+    priced_flights = []
+    for flight in flights:
+        fare = flight_fare(flight, travel_class)
+        if fare is not None:
+            priced_flights.append((flight, fare * passengers))
+    flights = priced_flights
+    hotels = [(hotel, hotel.price_per_night * nights * rooms) for hotel in hotels]
+
+    flight_scores = array(
+        "d",
+        (
+            float(price) + minute_value * passengers * flight_minutes(flight)
+            for flight, price in flights
+        ),
+    )
+    hotel_scores = array(
+        "d",
+        (
+            float(price) - star_value * hotel.star_rating * nights * rooms
+            for hotel, price in hotels
+        ),
+    )
+    flight_order = sorted(range(len(flights)), key=flight_scores.__getitem__)
+    hotel_order = sorted(range(len(hotels)), key=hotel_scores.__getitem__)
+
+    def score(i, j):
+        return flight_scores[flight_order[i]] + hotel_scores[hotel_order[j]]
+
+    packages = []
+    for _, i, j in islice(ranked_pairs(len(flights), len(hotels), score), limit):
+        flight, flight_price = flights[flight_order[i]]
+        hotel, hotel_price = hotels[hotel_order[j]]
+        packages.append(
+            Package(flight, hotel, *package_price(flight_price, hotel_price, discount))
+        )
+    return packages
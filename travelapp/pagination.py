@@ -0,0 +1,215 @@
+"""Keyset ("cursor") pagination.
+
+``Paginator`` counts every result and skips ``OFFSET`` rows on each page,
+so deep pages get slower the deeper they are. ``CursorPaginator`` instead
+remembers where a page ended: the sort key of its last row goes into a
+signed cursor, and the next page is the ``per_page`` rows after that key,
+read through the index that serves the ordering. Every page costs one
+query, however deep.
+
+The ordering must end in a unique field (normally ``id``) and none of its
+fields may be null.
+"""
+from functools import cmp_to_key
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q, QuerySet
+
+from .parallel import gather_queries, run_query
+
+
+class CursorPage:
+    """One page of a ``CursorPaginator``, usable like a ``Page`` in templates."""
+
+    def __init__(self, object_list, has_previous, has_next, cursors, total):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.previous_cursor, self.next_cursor = cursors
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+
+class CursorPaginator:
+    """Paginate a queryset or an in-memory list on ``ordering``.
+
+    ``ordering`` takes ``order_by`` strings. Querysets are filtered past the
+    cursor in the database; lists (such as cached search results) are
+    sorted and sliced in memory. With ``with_total``, the first page counts
+    the results once and the count is carried along in the cursors, so the
+    total shown on later pages is the count from when the search started.
+
+    Cursor values are parsed with the fields of ``model``, the queryset's
+    model by default. Lists of anything but model instances, such as named
+    tuples, must name the model their rows stand for.
+    """
+
+    def __init__(self, object_list, per_page, ordering, with_total=False, model=None):
+        self.object_list = object_list
+        self.model = model or getattr(object_list, "model", None)
+        self.per_page = per_page
+        self.ordering = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+        self.with_total = with_total
+        self._salt = "travelapp.pagination:" + ",".join(ordering)
+
+    def get_page(self, cursor=None):
+        """The page after (or before) ``cursor``; the first page if invalid."""
+        key, backwards, total = self._decode(cursor)
+        if self.with_total and total is None:
+            total = self._count()
+
+        if isinstance(self.object_list, QuerySet):
+            rows = self._query(key, backwards)
+        else:
+            rows = self._slice(key, backwards)
+        return self._page(rows, key, backwards, total)
+
+    async def aget_page(self, cursor=None):
+        """``get_page`` for async views.
+
+        A queryset's rows and, on the first page, its count are fetched by
+        two concurrent queries.
+        """
+        if not isinstance(self.object_list, QuerySet):
+            return self.get_page(cursor)
+        key, backwards, total = self._decode(cursor)
+        if self.with_total and total is None:
+            total, rows = await gather_queries(
+                self._count, lambda: self._query(key, backwards)
+            )
+        else:
+            rows = await run_query(self._query, key, backwards)
+        return self._page(rows, key, backwards, total)
+
+    def _page(self, rows, key, backwards, total):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = key is not None, has_more
+
+        cursors = (
+            self._encode(rows[0], True, total) if rows and has_previous else None,
+            self._encode(rows[-1], False, total) if rows and has_next else None,
+        )
+        return CursorPage(rows, has_previous, has_next, cursors, total)
+
+    def _count(self):
+        if isinstance(self.object_list, QuerySet):
+            return self.object_list.count()
+        return len(self.object_list)
+
+    def _query(self, key, backwards):
+        order_by = [
+            ("-" if descending != backwards else "") + name
+            for name, descending in self.ordering
+        ]
+        queryset = self.object_list.order_by(*order_by)
+        if key is not None:
+            queryset = queryset.filter(self._after(key, backwards))
+        return list(queryset[: self.per_page + 1])
+
+    def _after(self, key, backwards):
+        """Rows strictly after ``key`` in the (possibly reversed) ordering."""
+        condition = Q()
+        for position, ((name, descending), value) in enumerate(zip(self.ordering, key)):
+            lookup = "lt" if descending != backwards else "gt"
+            term = Q(**{f"{name}__{lookup}": value})
+            for (equal_name, _), equal_value in zip(self.ordering[:position], key):
+                term &= Q(**{equal_name: equal_value})
+            condition |= term
+        return condition
+
+    def _slice(self, key, backwards):
+        rows = sorted(
+            self.object_list, key=cmp_to_key(self._compare), reverse=backwards
+        )
+        if key is not None:
+            sign = -1 if backwards else 1
+            rows = [
+                row
+                for row in rows
+                if sign * self._compare_keys(self._key(row), key) > 0
+            ]
+        return rows[: self.per_page + 1]
+
+    def _compare(self, left, right):
+        return self._compare_keys(self._key(left), self._key(right))
+
+    def _compare_keys(self, left, right):
+        for (_, descending), a, b in zip(self.ordering, left, right):
+            if a != b:
+                return (1 if a > b else -1) * (-1 if descending else 1)
+        return 0
+
+    def _key(self, row):
+        key = []
+        for name, _ in self.ordering:
+            value = row
+            for attribute in name.split("__"):
+                value = getattr(value, attribute)
+            key.append(value)
+        return key
+
+    def _fields(self, model):
+        fields = []
+        for name, _ in self.ordering:
+            *relations, field_name = name.split("__")
+            related = model
+            for relation in relations:
+                related = related._meta.get_field(relation).related_model
+            fields.append(related._meta.get_field(field_name))
+        return fields
+
+    def _encode(self, row, backwards, total):
+        key = [
+            value if isinstance(value, int) else str(value)
+            for value in self._key(row)
+        ]
+        return signing.dumps(
+            {"k": key, "b": backwards, "t": total}, salt=self._salt, compress=True
+        )
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None, False, None
+        try:
+            payload = signing.loads(cursor, salt=self._salt)
+            fields = self._fields(self.model or type(self.object_list[0]))
+            if len(payload["k"]) != len(fields):
+                raise ValueError(cursor)
+            key = [
+                field.to_python(value) for field, value in zip(fields, payload["k"])
+            ]
+            return key, bool(payload["b"]), payload["t"]
+        except (
+            signing.BadSignature,
+            FieldDoesNotExist,
+            AttributeError,
+            ValidationError,
+            ValueError,
+            TypeError,
+            KeyError,
+            IndexError,
+        ):
+            return None, False, None
@@ -0,0 +1,36 @@
+"""Concurrent database queries for async views.
+
+The ORM is synchronous, so async views hand their queries to threads. Each
+query function given to ``gather_queries`` runs in its own pool thread, on
+that thread's own database connection, so independent queries overlap and
+the view takes as long as the slowest of them rather than their sum. The
+event loop stays free to serve other requests in the meantime.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _run(func, *args, **kwargs):
+    # Pool threads outlive requests, so their connections are closed (or
+    # kept, within CONN_MAX_AGE) here rather than by request_finished.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_query(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in a pool thread and return its result.
+
+    ``func`` must evaluate any queryset it builds; lazy querysets would be
+    run later, back on the event loop, where the ORM refuses to work.
+    """
+    return await sync_to_async(_run, thread_sensitive=False)(func, *args, **kwargs)
+
+
+async def gather_queries(*funcs):
+    """Run the argument-less ``funcs`` concurrently; their results, in order."""
+    return await asyncio.gather(*(run_query(func) for func in funcs))
@@ -0,0 +1,272 @@
+"""Connecting-flight search.
+
+The scheduled flights of one day, and of the next for overnight
+connections, form a time-expanded graph: cities are nodes and each flight
+is an edge that can only be taken if it departs within the layover window
+after the previous leg arrives. Graphs are built from a single
+``values_list`` query and kept per process and per date until either
+day's schedule changes, or for at most ``GRAPH_MAX_AGE`` seconds so
+seat counts don't drift far.
+
+Itineraries are found best-first, cheapest total fare first (shorter
+total travel time on ties). Each flight is extended from at most ``limit``
+times per number of stops, which bounds the search to the best few partial
+routes through any flight rather than every path of the network.
+"""
+import bisect
+import datetime
+import heapq
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .cache import flight_network_version_name, get_version
+from .models import Flight
+from .schedules import flights_by_id, scheduled_flights_on_dates
+from .search import flight_fare
+
+MIN_LAYOVER_MINUTES = 45
+MAX_LAYOVER_MINUTES = 6 * 60
+GRAPH_MAX_AGE = 60
+MAX_CACHED_GRAPHS = 32
+DAY_MINUTES = 24 * 60
+
+Itinerary = namedtuple(
+    "Itinerary", ["legs", "total_price", "total_minutes", "stops"]
+)
+
+# One flight of the graph. Times are minutes after midnight of the date;
+# next-day departures and arrivals past midnight are > 1440.
+Edge = namedtuple(
+    "Edge",
+    [
+        "flight_id",
+        "destination",
+        "departure",
+        "arrival",
+        "economy_price",
+        "business_price",
+        "seats",
+    ],
+)
+
+
+class FlightGraph:
+    """The flights departing on ``flight_date`` and on the day after.
+
+    Next-day flights are offset by ``DAY_MINUTES``, so a leg landing after
+    midnight connects to them like to any other departure.
+    """
+
+    def __init__(self, flight_date, version):
+        self.flight_date = flight_date
+        self.version = version
+        self.built_at = time.monotonic()
+
+        dates = [flight_date, flight_date + datetime.timedelta(days=1)]
+        departures = {}
+        flights = list(
+            Flight.objects.filter(
+                flight_date__in=dates, status="SCHEDULED", available_seats__gt=0
+            ).values_list(
+                "id",
+                "flight_date",
+                "source_city_id",
+                "destination_city_id",
+                "departure_time",
+                "arrival_time",
+                "economy_price",
+                "business_price",
+                "available_seats",
+            )
+        )
+        # Flights only found in schedules yet, under their scheduled ids.
+        flights += [
+            (
+                flight.id,
+                flight.flight_date,
+                flight.source_city_id,
+                flight.destination_city_id,
+                flight.departure_time,
+                flight.arrival_time,
+                flight.economy_price,
+                flight.business_price,
+                flight.available_seats,
+            )
+            for flight in scheduled_flights_on_dates(dates)
+        ]
+        for (
+            flight_id,
+            departure_date,
+            source,
+            destination,
+            departure_time,
+            arrival_time,
+            economy_price,
+            business_price,
+            seats,
+        ) in flights:
+            departure = departure_time.hour * 60 + departure_time.minute
+            if departure_date != flight_date:
+                departure += DAY_MINUTES
+            arrival = arrival_time.hour * 60 + arrival_time.minute
+            duration = (arrival - departure) % DAY_MINUTES
+            departures.setdefault(source, []).append(
+                Edge(
+                    flight_id,
+                    destination,
+                    departure,
+                    departure + duration,
+                    economy_price,
+                    business_price,
+                    seats,
+                )
+            )
+
+        # Per city: edges by departure, plus their departure times for bisect.
+        self._departures = {}
+        for city, edges in departures.items():
+            edges.sort(key=lambda edge: edge.departure)
+            self._departures[city] = ([edge.departure for edge in edges], edges)
+
+    def departures(self, city, earliest=0, latest=None):
+        """Edges leaving ``city`` between ``earliest`` and ``latest`` minutes."""
+        if city not in self._departures:
+            return []
+        times, edges = self._departures[city]
+        start = bisect.bisect_left(times, earliest)
+        stop = len(times) if latest is None else bisect.bisect_right(times, latest)
+        return edges[start:stop]
+
+
+# Searches run in pool threads, so the cache is read and updated under the
+# lock. Graphs are built under it too, so concurrent searches of a date
+# share one build.
+_graphs = OrderedDict()
+_lock = threading.Lock()
+
+
+def flight_graph(flight_date):
+    """The cached ``FlightGraph`` of ``flight_date``, rebuilt when stale."""
+    next_date = flight_date + datetime.timedelta(days=1)
+    version = (
+        get_version(flight_network_version_name(flight_date)),
+        get_version(flight_network_version_name(next_date)),
+    )
+    with _lock:
+        graph = _graphs.get(flight_date)
+        if (
+            graph is None
+            or graph.version != version
+            or time.monotonic() - graph.built_at > GRAPH_MAX_AGE
+        ):
+            graph = FlightGraph(flight_date, version)
+            _graphs[flight_date] = graph
+        _graphs.move_to_end(flight_date)
+        while len(_graphs) > MAX_CACHED_GRAPHS:
+            _graphs.popitem(last=False)
+    return graph
+
+
+def connection_search(
+    source_city,
+    destination_city,
+    flight_date,
+    passengers,
+    travel_class,
+    max_stops=2,
+    limit=10,
+    min_layover=MIN_LAYOVER_MINUTES,
+    max_layover=MAX_LAYOVER_MINUTES,
+):
+    """The ``limit`` cheapest 1- to ``max_stops``-stop itineraries of a day.
+
+    Itineraries start on ``flight_date``; every layover lasts between
+    ``min_layover`` and ``max_layover`` minutes, across midnight too. Legs
+    are hydrated into ``Flight`` objects by ``flights_by_id``, and
+    itineraries whose seats have gone since the graph was built are dropped.
+    """
+    source = getattr(source_city, "pk", source_city)
+    destination = getattr(destination_city, "pk", destination_city)
+    graph = flight_graph(flight_date)
+    price_field = "business_price" if travel_class == "BUSINESS" else "economy_price"
+
+    # (price, elapsed minutes, tie-breaker, city, arrival, first departure, edges)
+    heap = []
+    counter = 0
+    for edge in graph.departures(source, latest=DAY_MINUTES - 1):
+        price = getattr(edge, price_field)
+        if edge.seats >= passengers and price is not None:
+            heapq.heappush(
+                heap,
+                (
+                    price * passengers,
+                    edge.arrival - edge.departure,
+                    counter,
+                    edge.destination,
+                    edge.arrival,
+                    edge.departure,
+                    (edge,),
+                ),
+            )
+            counter += 1
+
+    found = []
+    expanded = {}
+    while heap and len(found) < limit:
+        price, minutes, _, city, arrival, first_departure, edges = heapq.heappop(heap)
+        if city == destination:
+            if len(edges) > 1:
+                found.append(edges)
+            continue
+        # What can follow depends only on the last flight and the stops
+        # left, so no more than ``limit`` partial routes ending in the same
+        # flight can lead to the ``limit`` best itineraries.
+        label = (edges[-1].flight_id, len(edges))
+        if len(edges) > max_stops or expanded.get(label, 0) >= limit:
+            continue
+        expanded[label] = expanded.get(label, 0) + 1
+
+        visited = {source} | {edge.destination for edge in edges}
+        window = graph.departures(city, arrival + min_layover, arrival + max_layover)
+        for edge in window:
+            leg_price = getattr(edge, price_field)
+            if (
+                edge.seats < passengers
+                or leg_price is None
+                or (edge.destination in visited and edge.destination != destination)
+            ):
+                continue
+            heapq.heappush(
+                heap,
+                (
+                    price + leg_price * passengers,
+                    edge.arrival - first_departure,
+                    counter,
+                    edge.destination,
+                    edge.arrival,
+                    first_departure,
+                    edges + (edge,),
+                ),
+            )
+            counter += 1
+
+    flights = flights_by_id({edge.flight_id for edges in found for edge in edges})
+    itineraries = []
+    for edges in found:
+        legs = [flights.get(edge.flight_id) for edge in edges]
+        if all(
+            leg is not None
+            and leg.status == "SCHEDULED"
+            and leg.available_seats >= passengers
+            for leg in legs
+        ):
+            itineraries.append(
+                Itinerary(
+                    legs,
+                    sum(flight_fare(leg, travel_class) for leg in legs) * passengers,
+                    edges[-1].arrival - edges[0].departure,
+                    len(legs) - 1,
+                )
+            )
+    return itineraries
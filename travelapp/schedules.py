@@ -0,0 +1,303 @@
+"""Dated flights of recurring ``FlightSchedule``s.
+
+A schedule's flights are stored ("materialized") as ``Flight`` rows only
+for the dates about to be sold: the ``materialize_flights`` command keeps
+the next ``FLIGHT_SCHEDULE_HORIZON_DAYS`` filled. Searches for later dates
+are answered from the schedules themselves. Each schedule in force gives
+an unsaved ``Flight`` whose negative ``scheduled_flight_id`` names the
+schedule and the date, so it is listed, paginated and linked to like any
+other flight. Its row is only created when it is booked, by
+``materialize_flight``. The flight table therefore grows with the booking
+horizon and with bookings, never with searches.
+
+Materializing is idempotent: flights that exist already, whether from an
+earlier run or entered by hand under the same number, are left as they are.
+Changes to a schedule apply to the dates not materialized yet.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidate_flight_network, invalidate_flight_routes
+from .inventory import InventoryError
+from .models import Flight, FlightSchedule
+
+# A scheduled flight id holds the date's ordinal in its low bits and the
+# schedule id above them.
+DATE_BITS = 20
+
+
+def in_force(date):
+    """Filter for the schedules operating on ``date``."""
+    return Q(
+        valid_from__lte=date,
+        valid_until__gte=date,
+        days_of_week__contains=str(date.isoweekday()),
+    )
+
+
+def scheduled_flight_id(schedule_id, date):
+    """The id of ``schedule_id``'s flight on ``date`` while it has no row.
+
+    Negative, so it never clashes with the id of a stored flight.
+    """
+    return -((schedule_id << DATE_BITS) | date.toordinal())
+
+
+def split_scheduled_flight_id(flight_id):
+    """``(schedule id, date)`` of a ``scheduled_flight_id``.
+
+    Raises ``ValueError`` when ``flight_id`` holds no valid date.
+    """
+    key = -flight_id
+    if not 0 < key < 1 << 63:
+        raise ValueError(f"Not a scheduled flight id: {flight_id}")
+    ordinal = key & ((1 << DATE_BITS) - 1)
+    return key >> DATE_BITS, datetime.date.fromordinal(ordinal)
+
+
+def scheduled_flight(schedule, date):
+    """``schedule``'s unsaved flight on ``date``, with its scheduled id."""
+    flight = schedule.flight_on(date)
+    flight.id = scheduled_flight_id(schedule.pk, date)
+    # Loaded with the schedule, so showing the flight costs no query.
+    flight.airline = schedule.airline
+    flight.source_city = schedule.source_city
+    flight.destination_city = schedule.destination_city
+    return flight
+
+
+def invalidate_schedule(schedule):
+    """Drop searches cached for the dates ``schedule`` has yet to materialize.
+
+    Flights it materialized already are left as they are and invalidated by
+    their own saves.
+    """
+    start = max(schedule.valid_from, timezone.localdate())
+    dates = [
+        start + datetime.timedelta(days=n)
+        for n in range((schedule.valid_until - start).days + 1)
+    ]
+    route = (schedule.source_city_id, schedule.destination_city_id)
+    invalidate_flight_routes((*route, flight_date) for flight_date in dates)
+    invalidate_flight_network(dates)
+
+
+def scheduled_flights_on_legs(legs):
+    """Flights on ``(source, destination, date)`` legs only found in schedules.
+
+    Cities may be given as instances or ids. Returns unsaved flights made
+    by ``scheduled_flight``; past dates are skipped.
+    """
+    return [
+        scheduled_flight(schedule, date)
+        for schedule, date in _unmaterialized(_pairs_on_legs(legs))
+    ]
+
+
+def scheduled_flights_on_dates(dates):
+    """Every flight on ``dates`` that only exists in a schedule, unsaved."""
+    return [
+        scheduled_flight(schedule, date)
+        for schedule, date in _unmaterialized(_pairs_on_dates(dates))
+    ]
+
+
+def flights_by_id(ids):
+    """``{id: Flight}`` of ``ids``, stored and scheduled flights alike.
+
+    Flights come with their airline and cities. A scheduled id gives the
+    stored flight once its row exists, or the flight made from its
+    schedule. Unknown ids, scheduled ids of a date their schedule does not
+    operate on (or that has passed) and scheduled ids whose number is taken
+    on that date by a flight on another route are left out.
+    """
+    flights = Flight.objects.select_related(
+        "airline", "source_city", "destination_city"
+    )
+    ids = set(ids)
+    found = flights.in_bulk([flight_id for flight_id in ids if flight_id > 0])
+
+    dates = {}
+    for flight_id in ids:
+        if flight_id < 0:
+            try:
+                dates[flight_id] = split_scheduled_flight_id(flight_id)
+            except ValueError:
+                pass
+    if not dates:
+        return found
+    schedules = FlightSchedule.objects.select_related(
+        "airline", "source_city", "destination_city"
+    ).in_bulk({schedule_id for schedule_id, _ in dates.values()})
+    today = timezone.localdate()
+    pairs = {}
+    for flight_id, (schedule_id, date) in dates.items():
+        schedule = schedules.get(schedule_id)
+        if schedule is not None and date >= today and schedule.operates_on(date):
+            pairs[flight_id] = (schedule, date)
+    stored = {
+        (flight.flight_number, flight.flight_date): flight
+        for flight in flights.filter(
+            flight_number__in={
+                schedule.flight_number for schedule, _ in pairs.values()
+            },
+            flight_date__in={date for _, date in pairs.values()},
+        )
+    }
+    for flight_id, (schedule, date) in pairs.items():
+        flight = stored.get((schedule.flight_number, date))
+        if flight is None:
+            found[flight_id] = scheduled_flight(schedule, date)
+        elif _is_flight_of(flight, schedule):
+            found[flight_id] = flight
+    return found
+
+
+def materialize_flight(flight):
+    """The stored ``Flight`` of ``flight``, creating the row of a scheduled one.
+
+    Stored flights are returned as they are. Raises ``InventoryError`` if
+    another flight took the number on that date meanwhile. Call inside the
+    transaction that books the flight.
+    """
+    if flight.pk is None or flight.pk > 0:
+        return flight
+    _create_flights([(flight.schedule, flight.flight_date)])
+    stored = Flight.objects.select_related(
+        "airline", "source_city", "destination_city"
+    ).get(flight_number=flight.flight_number, flight_date=flight.flight_date)
+    if not _is_flight_of(stored, flight.schedule):
+        raise InventoryError(
+            f"Flight {flight.flight_number} on {flight.flight_date} is no longer "
+            "available."
+        )
+    return stored
+
+
+def materialize_dates(dates):
+    """Create every schedule's missing flights on ``dates``.
+
+    Past dates are skipped. Returns the number of flights created.
+    """
+    return _create_flights(_pairs_on_dates(dates))
+
+
+def materialize_horizon(days, start=None):
+    """Create the missing flights of the ``days`` days from ``start`` (today)."""
+    start = start or timezone.localdate()
+    return materialize_dates(start + datetime.timedelta(days=n) for n in range(days))
+
+
+def _pairs_on_dates(dates):
+    """``(schedule, date)`` of every schedule operating on ``dates``."""
+    today = timezone.localdate()
+    pairs = []
+    for date in sorted(set(dates)):
+        if date >= today:
+            schedules = FlightSchedule.objects.filter(in_force(date)).select_related(
+                "airline", "source_city", "destination_city"
+            )
+            pairs.extend((schedule, date) for schedule in schedules)
+    return pairs
+
+
+def _pairs_on_legs(legs):
+    """``(schedule, date)`` of the schedules operating on ``legs``."""
+    today = timezone.localdate()
+    dates_by_route = defaultdict(set)
+    condition = Q()
+    for source_city, destination_city, date in legs:
+        if date >= today:
+            route = (
+                getattr(source_city, "pk", source_city),
+                getattr(destination_city, "pk", destination_city),
+            )
+            dates_by_route[route].add(date)
+            condition |= Q(
+                in_force(date), source_city=route[0], destination_city=route[1]
+            )
+    if not condition:
+        return []
+
+    pairs = []
+    schedules = FlightSchedule.objects.filter(condition).select_related(
+        "airline", "source_city", "destination_city"
+    )
+    for schedule in schedules:
+        route = (schedule.source_city_id, schedule.destination_city_id)
+        pairs.extend(
+            (schedule, date)
+            for date in sorted(dates_by_route[route])
+            if schedule.operates_on(date)
+        )
+    return pairs
+
+
+def _unmaterialized(pairs):
+    """The ``(schedule, date)`` pairs whose flight has no row yet."""
+    if not pairs:
+        return []
+    existing = set(
+        Flight.objects.filter(
+            flight_number__in={schedule.flight_number for schedule, _ in pairs},
+            flight_date__in={date for _, date in pairs},
+        ).values_list("flight_number", "flight_date")
+    )
+    missing = []
+    for schedule, date in pairs:
+        if (schedule.flight_number, date) not in existing:
+            existing.add((schedule.flight_number, date))
+            missing.append((schedule, date))
+    return missing
+
+
+def _is_flight_of(flight, schedule):
+    """Whether the stored ``flight`` is ``schedule``'s flight on its date.
+
+    It is if the schedule materialized it, or if it was entered by hand on
+    the schedule's route. A flight under the same number on another route
+    holds the number and date, so the schedule's flight cannot be stored.
+    """
+    if flight.schedule_id is not None:
+        return flight.schedule_id == schedule.pk
+    return (flight.source_city_id, flight.destination_city_id) == (
+        schedule.source_city_id,
+        schedule.destination_city_id,
+    )
+
+
+def _create_flights(pairs):
+    """Create the flights of ``(schedule, date)`` pairs that don't exist yet."""
+    pairs = _unmaterialized(pairs)
+    if not pairs:
+        return 0
+    # Another request may be materializing the same flights right now.
+    Flight.objects.bulk_create(
+        [schedule.flight_on(date) for schedule, date in pairs], ignore_conflicts=True
+    )
+    # Searches cached these flights as scheduled ones; they now have rows.
+    invalidate_flight_routes(
+        (schedule.source_city_id, schedule.destination_city_id, date)
+        for schedule, date in pairs
+    )
+    invalidate_flight_network({date for _, date in pairs})
+    return len(pairs)
+
+
+def prune_flights(before=None):
+    """Delete scheduled flights dated before ``before`` (today) nobody booked.
+
+    Hand-entered flights and flights with bookings are kept. Returns the
+    number of flights deleted.
+    """
+    before = before or timezone.localdate()
+    flights = Flight.objects.filter(
+        schedule__isnull=False,
+        flight_date__lt=before,
+        bookings__isnull=True,
+        holds__isnull=True,
+    )
+    return flights.delete()[1].get(Flight._meta.label, 0)
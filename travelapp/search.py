@@ -0,0 +1,291 @@
+"""Searches shared by the search views.
+
+The query functions return exactly the querysets the views run, so the
+composite indexes declared on the models (and the ``explain_search``
+command that checks their plans) stay in step with what the views actually
+execute.
+"""
+import heapq
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from .amenities import mask_of
+from .cache import flight_route_version_name, get_version
+from .inventory import with_free_rooms
+from .models import Flight, Hotel, TouristAttraction
+from .schedules import scheduled_flights_on_legs
+from .timetable import timetable_searches
+
+# Result orderings. Each ends in ``id`` so it is total, as keyset
+# pagination needs.
+FLIGHT_ORDERING = ["departure_time", "id"]
+HOTEL_ORDERING = ["-star_rating", "price_per_night", "id"]
+ATTRACTION_ORDERING = ["city__name", "name", "id"]
+
+
+def flight_search(source_city, destination_city, departure_date, passengers):
+    """Direct scheduled flights on a route and date with enough free seats."""
+    leg = (source_city, destination_city, departure_date)
+    return flights_on_legs([leg], passengers)
+
+
+def flights_on_legs(legs, passengers):
+    """Scheduled flights with enough free seats on any of ``legs``.
+
+    ``legs`` are ``(source, destination, date)`` triples, all fetched by one
+    query.
+    """
+    route_filter = Q()
+    for source_city, destination_city, flight_date in legs:
+        route_filter |= Q(
+            source_city=source_city,
+            destination_city=destination_city,
+            flight_date=flight_date,
+        )
+    return (
+        Flight.objects.filter(
+            route_filter, status="SCHEDULED", available_seats__gte=passengers
+        )
+        .select_related("airline", "source_city", "destination_city")
+        .order_by(*FLIGHT_ORDERING)
+    )
+
+
+def cached_flight_search(
+    source_city, destination_city, departure_date, passengers, travel_class
+):
+    """``flight_search`` results, served from the cache when possible."""
+    leg = (source_city, destination_city, departure_date)
+    return cached_flight_searches([leg], passengers, travel_class)[_leg_key(leg)]
+
+
+def cached_flight_searches(legs, passengers, travel_class):
+    """Flight search results for several legs, served from the cache when possible.
+
+    Returns a dict keyed on ``(source id, destination id, date)``. Entries
+    are keyed on the search and on the route's cache version, which is
+    bumped whenever a flight on that route and date is saved or has its
+    seats changed, so a hit is never stale. Legs missing from the cache are
+    fetched together by one query, joined by the flights their schedules
+    operate that have no row yet (see ``travelapp.schedules``).
+
+    With the ``timetable`` search engine, results are ``FlightRow``s from
+    the in-process timetables instead (see ``travelapp.timetable``).
+    """
+    if settings.FLIGHT_SEARCH_ENGINE == "timetable":
+        return timetable_searches(legs, passengers)
+    keys = {}
+    for leg in legs:
+        source_id, destination_id, flight_date = _leg_key(leg)
+        version = get_version(
+            flight_route_version_name(source_id, destination_id, flight_date)
+        )
+        keys[_leg_key(leg)] = (
+            f"flight-search:{source_id}:{destination_id}:{flight_date}:"
+            f"{passengers}:{travel_class}:{version}"
+        )
+
+    cached = cache.get_many(keys.values())
+    results = {leg: cached.get(key) for leg, key in keys.items()}
+    missing = [leg for leg, flights in results.items() if flights is None]
+    if missing:
+        fetched = {leg: [] for leg in missing}
+        for flight in flights_on_legs(missing, passengers):
+            fetched[_leg_key(flight)].append(flight)
+        scheduled = scheduled_flights_on_legs(missing)
+        for flight in scheduled:
+            if flight.available_seats >= passengers:
+                fetched[_leg_key(flight)].append(flight)
+        if scheduled:
+            for flights in fetched.values():
+                flights.sort(key=attrgetter(*FLIGHT_ORDERING))
+        cache.set_many(
+            {keys[leg]: flights for leg, flights in fetched.items()},
+            settings.FLIGHT_SEARCH_CACHE_TIMEOUT,
+        )
+        results.update(fetched)
+    return results
+
+
+def _leg_key(leg):
+    if isinstance(leg, Flight):
+        return (leg.source_city_id, leg.destination_city_id, leg.flight_date)
+    source_city, destination_city, flight_date = leg
+    return (
+        getattr(source_city, "pk", source_city),
+        getattr(destination_city, "pk", destination_city),
+        flight_date,
+    )
+
+
+def flight_fare(flight, travel_class):
+    """Per-seat fare of ``flight`` in ``travel_class``, or ``None`` if not sold."""
+    if travel_class == "BUSINESS":
+        return flight.business_price
+    return flight.economy_price
+
+
+def flight_minutes(flight):
+    """Scheduled flight time in minutes, for flights arriving by the next day."""
+    departure = flight.departure_time.hour * 60 + flight.departure_time.minute
+    arrival = flight.arrival_time.hour * 60 + flight.arrival_time.minute
+    return (arrival - departure) % (24 * 60)
+
+
+FlightPair = namedtuple(
+    "FlightPair", ["outbound", "inbound", "total_price", "total_minutes"]
+)
+
+
+class FlightPairs:
+    """Outbound/return flight pairs, cheapest total fare first.
+
+    Ties on fare go to the shorter total flight time. Acts as a sequence for
+    ``Paginator``: the length is known without building any pair, and
+    slicing generates pairs in order from a heap over the two sorted legs,
+    so page ``n`` only builds the first ``n`` pages of pairs instead of the
+    whole outbound x return cross product.
+    """
+
+    def __init__(self, outbound, inbound, passengers, travel_class):
+        self._outbound = self._ranked(outbound, passengers, travel_class)
+        self._inbound = self._ranked(inbound, passengers, travel_class)
+
+    @staticmethod
+    def _ranked(flights, passengers, travel_class):
+        ranked = []
+        for flight in flights:
+            fare = flight_fare(flight, travel_class)
+            if fare is not None:
+                ranked.append(((fare * passengers, flight_minutes(flight)), flight))
+        ranked.sort(key=itemgetter(0))
+        return ranked
+
+    def __len__(self):
+        return len(self._outbound) * len(self._inbound)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return list(islice(self._pairs(), start, stop, step))
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return next(islice(self._pairs(), index, None))
+
+    def _pairs(self):
+        outbound, inbound = self._outbound, self._inbound
+
+        def cost(i, j):
+            price_out, minutes_out = outbound[i][0]
+            price_in, minutes_in = inbound[j][0]
+            return (price_out + price_in, minutes_out + minutes_in)
+
+        for (price, minutes), i, j in ranked_pairs(len(outbound), len(inbound), cost):
+            yield FlightPair(outbound[i][1], inbound[j][1], price, minutes)
+
+
+def ranked_pairs(left_size, right_size, cost):
+    """Yield ``(cost(i, j), i, j)`` for all index pairs, cheapest first.
+
+    Both sides must be sorted so that ``cost`` grows with ``i`` and with
+    ``j``. Then the next cheapest pair is always a neighbour of one already
+    produced, and the heap only ever holds the frontier of pairs produced
+    so far, never the whole cross product.
+    """
+    if not left_size or not right_size:
+        return
+    heap = [(cost(0, 0), 0, 0)]
+    seen = {(0, 0)}
+    while heap:
+        pair_cost, i, j = heapq.heappop(heap)
+        yield pair_cost, i, j
+        for next_i, next_j in ((i + 1, j), (i, j + 1)):
+            if (
+                next_i < left_size
+                and next_j < right_size
+                and (next_i, next_j) not in seen
+            ):
+                seen.add((next_i, next_j))
+                heapq.heappush(heap, (cost(next_i, next_j), next_i, next_j))
+
+
+def round_trip_search(
+    source_city,
+    destination_city,
+    departure_date,
+    return_date,
+    passengers,
+    travel_class,
+    facets=None,
+):
+    """Priced outbound/return pairs for a round trip, as ``FlightPairs``.
+
+    Both legs come from the flight search cache, with any missing leg
+    fetched in a single query. With ``facets``, a ``FlightFacets``, both
+    legs are narrowed to the chosen options.
+    """
+    outbound_leg = (source_city, destination_city, departure_date)
+    return_leg = (destination_city, source_city, return_date)
+    legs = cached_flight_searches([outbound_leg, return_leg], passengers, travel_class)
+    outbound = legs[_leg_key(outbound_leg)]
+    inbound = legs[_leg_key(return_leg)]
+    if facets is not None:
+        outbound, inbound = facets.narrow(outbound), facets.narrow(inbound)
+    return FlightPairs(outbound, inbound, passengers, travel_class)
+
+
+def hotel_search(
+    city, rooms, check_in, check_out, min_rating=None, max_price=None, amenities=None
+):
+    """Hotels in ``city`` with ``rooms`` free on every night of the stay.
+
+    ``amenities`` are ``Amenity`` objects the hotels must all have. Results
+    carry a ``free_rooms`` annotation and come best rated and cheapest first.
+    """
+    hotels = (
+        with_free_rooms(
+            Hotel.objects.filter(city=city, total_rooms__gte=rooms),
+            check_in,
+            check_out,
+        )
+        .filter(free_rooms__gte=rooms)
+        .select_related("city")
+    )
+
+    if min_rating:
+        hotels = hotels.filter(star_rating__gte=min_rating)
+
+    if max_price:
+        hotels = hotels.filter(price_per_night__lte=max_price)
+
+    if amenities:
+        # One bitwise test on amenity_mask, next to city in the index.
+        mask = mask_of(amenity.bit for amenity in amenities)
+        hotels = hotels.alias(amenity_match=F("amenity_mask").bitand(mask)).filter(
+            amenity_match=mask
+        )
+
+    return hotels.order_by(*HOTEL_ORDERING)
+
+
+def attraction_search(city=None, category=None, max_entry_fee=None):
+    """Tourist attractions matching the optional filters, ordered by city and name."""
+    attractions = TouristAttraction.objects.all().select_related("city")
+
+    if city:
+        attractions = attractions.filter(city=city)
+
+    if category:
+        attractions = attractions.filter(category=category)
+
+    if max_entry_fee is not None:
+        attractions = attractions.filter(
+            Q(entry_fee__lte=max_entry_fee) | Q(entry_fee__isnull=True)
+        )
+
+    return attractions.order_by(*ATTRACTION_ORDERING)
@@ -0,0 +1,104 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .amenities import amenity_bits, catalog_new_amenities
+from .cache import bump_version, invalidate_flight_network, invalidate_flight_routes
+from .images import IMAGE_ERRORS, generate_derivatives, has_derivatives
+from .models import Amenity, City, Flight, FlightSchedule, Hotel, TouristAttraction
+from .schedules import invalidate_schedule
+
+logger = logging.getLogger(__name__)
+
+
+def _route(flight):
+    return (flight.source_city_id, flight.destination_city_id, flight.flight_date)
+
+
+@receiver(pre_save, sender=Flight)
+def remember_flight_route(sender, instance, **kwargs):
+    """Keep the route a flight had before it is saved, in case it changes."""
+    instance._saved_route = (
+        Flight.objects.filter(pk=instance.pk)
+        .values_list("source_city_id", "destination_city_id", "flight_date")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def invalidate_flight_searches(sender, instance, **kwargs):
+    routes = [_route(instance)]
+    if getattr(instance, "_saved_route", None):
+        routes.append(instance._saved_route)
+    invalidate_flight_routes(routes)
+    invalidate_flight_network({flight_date for _, _, flight_date in routes})
+
+
+@receiver(post_save, sender=FlightSchedule)
+def invalidate_schedule_searches(sender, instance, **kwargs):
+    invalidate_schedule(instance)
+
+
+@receiver(pre_save, sender=Hotel)
+def set_amenity_mask(sender, instance, **kwargs):
+    instance.amenity_mask = amenity_bits.mask(instance.amenities)
+
+
+@receiver(post_save, sender=Hotel)
+def catalog_hotel_amenities(sender, instance, **kwargs):
+    """Give the names a saved hotel lists that are new to the catalog bits."""
+    if amenity_bits.lists_new(instance.amenities):
+        text = instance.amenities
+        transaction.on_commit(lambda: catalog_new_amenities(text))
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+def invalidate_amenity_bits(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version("amenities"))
+
+
+@receiver(post_delete, sender=Amenity)
+def clear_amenity_bit(sender, instance, **kwargs):
+    """Free a deleted amenity's bit for the next one."""
+    bit = 1 << instance.bit
+    Hotel.objects.alias(has_amenity=F("amenity_mask").bitand(bit)).filter(
+        has_amenity=bit
+    ).update(amenity_mask=F("amenity_mask").bitand(~bit))
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_city_catalog(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version("cities"))
+
+
+@receiver(post_save, sender=TouristAttraction)
+@receiver(post_delete, sender=TouristAttraction)
+def invalidate_attraction_pages(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version("attractions"))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=TouristAttraction)
+def generate_image_derivatives(sender, instance, **kwargs):
+    """Resize a newly uploaded hotel or attraction image once it is stored."""
+    image = instance.main_image if sender is Hotel else instance.image
+    if not image:
+        return
+    name = image.name
+
+    def generate():
+        try:
+            if not has_derivatives(name):
+                generate_derivatives(name)
+        except IMAGE_ERRORS:
+            logger.exception("Could not generate derivatives of %s", name)
+
+    transaction.on_commit(generate)
@@ -0,0 +1,110 @@
+"""Content-addressed storage for uploaded images and static files.
+
+Files are stored under the SHA-256 of their content, in the directory the
+field uploads to: ``hotels/3f/3fa9…c1.jpg``. Uploading the same file again
+reuses the stored copy instead of writing ``_AbCdEfG``-suffixed duplicates,
+and a name never changes content, so its URL can be cached forever.
+
+Static files get the same treatment from ``collectstatic``: they are
+stored under fingerprinted names, with gzip copies of the text assets.
+"""
+import gzip
+import hashlib
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_LENGTH = 32
+
+# Static files worth storing compressed; images and fonts already are.
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml"}
+
+# Suffix of each pre-compressed copy and the function producing it.
+COMPRESSORS = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS[".br"] = brotli.compress
+
+
+def content_hash(content):
+    """Hex SHA-256 of a Django ``File``'s content, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        # Files are never overwritten with other content: a name that
+        # exists already holds exactly what would be written.
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def hashed_name(self, name, content):
+        """Where ``content``, uploaded as ``name``, is stored."""
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        digest = content_hash(content)[:HASH_LENGTH]
+        if filename == digest + extension:
+            # Already content-addressed; keep it in its fan-out directory.
+            return name
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with pre-compressed copies.
+
+    ``collectstatic`` stores every text asset under its content-hashed name
+    and writes ``.gz`` (and ``.br`` when the ``brotli`` package is installed)
+    copies beside it, so they are compressed once rather than per request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS is yielded again on every pass that rewrites its references;
+        # only the last hashed name of each file is compressed.
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if isinstance(hashed_name, str):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name, hashed_name in hashed_names.items():
+                self.compress(name)
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        """Write the compressed copies of ``name`` that are worth keeping."""
+        if posixpath.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for extension, encode in COMPRESSORS.items():
+            compressed = encode(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
@@ -0,0 +1,32 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from travelapp.images import (
+    derivative_name,
+    derivatives_ready,
+    srcset as derivative_srcset,
+)
+
+register = template.Library()
+
+
+@register.filter
+def has_derivatives(image):
+    """Whether an image field's derivatives exist; if not, show the original."""
+    return bool(image) and derivatives_ready(image.name)
+
+
+@register.filter
+def srcset(image, image_format="webp"):
+    """``srcset`` of an image field's derivatives in ``image_format``."""
+    if not image:
+        return ""
+    return derivative_srcset(image.name, image_format)
+
+
+@register.filter
+def derivative_url(image, width):
+    """URL of an image field's JPEG derivative ``width`` pixels wide."""
+    if not image:
+        return ""
+    return default_storage.url(derivative_name(image.name, int(width), "jpeg"))
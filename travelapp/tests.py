@@ -1,3 +1,1367 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import random
+import tempfile
+from collections import namedtuple
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import transaction
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from .amenities import amenity_masks, index_amenities, mask_of, parse_amenities
+from .cache import (
+    flight_route_version_name,
+    get_version,
+    get_versions,
+    invalidate_flight_routes,
+)
+from .facets import FlightFacets, HotelFacets
+from .forms import AttractionFilterForm, FlightSearchForm, HotelSearchForm
+from .http import bind_search_form
+from .inventory import (
+    InventoryError,
+    cancel_booking,
+    confirm_booking,
+    free_rooms,
+    hold_flight_booking,
+    hold_hotel_booking,
+    release_expired_holds,
+    release_holds,
+    release_rooms,
+    reserve_rooms,
+    reserve_seats,
+    with_free_rooms,
+)
+from .models import (
+    Airline,
+    Amenity,
+    BookingPayment,
+    City,
+    Flight,
+    FlightBooking,
+    FlightSchedule,
+    Hotel,
+    HotelBooking,
+    HotelRoomInventory,
+    InventoryHold,
+    PackageBooking,
+    TouristAttraction,
+)
+from .pagination import CursorPaginator
+from .packages import MINUTE_VALUE, STAR_VALUE, package_price, top_packages
+from .routing import connection_search
+from .schedules import (
+    flights_by_id,
+    materialize_flight,
+    scheduled_flight_id,
+    split_scheduled_flight_id,
+)
+from .search import (
+    FLIGHT_ORDERING,
+    HOTEL_ORDERING,
+    cached_flight_search,
+    flight_search,
+    hotel_search,
+    ranked_pairs,
+    round_trip_search,
+)
+from .timeline import booking_timeline
+from .timetable import FlightRow, hydrate, timetable_searches
+
+# Pages render without a collected static files manifest.
+PLAIN_STATIC_STORAGES = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def in_days(days):
+    return timezone.localdate() + datetime.timedelta(days=days)
+
+
+def make_flight(number, source, destination, date, departs, arrives, **fields):
+    airline, _ = Airline.objects.get_or_create(code="TA", name="Test Air")
+    fields.setdefault("total_seats", 10)
+    fields.setdefault("available_seats", fields["total_seats"])
+    return Flight.objects.create(
+        flight_number=number,
+        airline=airline,
+        source_city=source,
+        destination_city=destination,
+        flight_date=date,
+        departure_time=datetime.time(*departs),
+        arrival_time=datetime.time(*arrives),
+        economy_price=fields.pop("economy_price", Decimal("100.00")),
+        **fields,
+    )
+
+
+def make_hotel(name, city, **fields):
+    fields.setdefault("total_rooms", 5)
+    return Hotel.objects.create(
+        name=name,
+        city=city,
+        address="1 Main Street",
+        price_per_night=fields.pop("price_per_night", Decimal("80.00")),
+        star_rating=fields.pop("star_rating", 3),
+        amenities=fields.pop("amenities", "WiFi"),
+        distance_from_airport=Decimal("10.0"),
+        **fields,
+    )
+
+
+def book_flight(user, flight, passengers, reference):
+    booking = FlightBooking.objects.create(
+        user=user,
+        flight=flight,
+        booking_reference=reference,
+        passenger_count=passengers,
+        total_price=flight.economy_price * passengers,
+    )
+    hold_flight_booking(booking)
+    return booking
+
+
+def book_hotel(user, hotel, rooms, check_in, check_out, reference):
+    booking = HotelBooking.objects.create(
+        user=user,
+        hotel=hotel,
+        booking_reference=reference,
+        check_in_date=check_in,
+        check_out_date=check_out,
+        rooms_count=rooms,
+        total_price=hotel.price_per_night * rooms * (check_out - check_in).days,
+    )
+    hold_hotel_booking(booking)
+    return booking
+
+
+class TravelTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("traveller", password="secret")
+        self.london = City.objects.create(name="London", country="UK")
+        self.paris = City.objects.create(name="Paris", country="France")
+        self.rome = City.objects.create(name="Rome", country="Italy")
+
+    def seats(self, flight):
+        return Flight.objects.get(pk=flight.pk).available_seats
+
+
+class InventoryTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = make_flight(
+            "TA100", self.london, self.paris, in_days(10), (9, 0), (10, 15)
+        )
+        self.hotel = make_hotel("Hotel Lumiere", self.paris, total_rooms=2)
+        self.check_in, self.check_out = in_days(10), in_days(13)
+
+    def test_seats_cannot_be_oversold(self):
+        reserve_seats(self.flight, 7)
+        # self.flight still shows all ten seats; the database decides.
+        with self.assertRaises(InventoryError):
+            reserve_seats(self.flight, 4)
+        reserve_seats(self.flight, 3)
+        self.assertEqual(self.seats(self.flight), 0)
+
+    def test_rooms_cannot_be_oversold_on_any_night(self):
+        second_night = self.check_in + datetime.timedelta(days=1)
+        reserve_rooms(self.hotel, 2, second_night, self.check_out)
+        with self.assertRaises(InventoryError), transaction.atomic():
+            reserve_rooms(self.hotel, 1, self.check_in, self.check_out)
+        # The night that still had room was rolled back with the rest.
+        self.assertEqual(free_rooms(self.hotel, self.check_in, second_night), 2)
+        self.assertEqual(free_rooms(self.hotel, self.check_in, self.check_out), 0)
+
+    def test_failed_package_rolls_back_its_seats(self):
+        reserve_rooms(self.hotel, 2, self.check_in, self.check_out)
+        with self.assertRaises(InventoryError), transaction.atomic():
+            book_flight(self.user, self.flight, 2, "F1")
+            book_hotel(self.user, self.hotel, 1, self.check_in, self.check_out, "H1")
+        self.assertEqual(self.seats(self.flight), 10)
+        self.assertFalse(FlightBooking.objects.exists())
+
+    def test_concurrent_cancels_release_once(self):
+        booking = book_flight(self.user, self.flight, 4, "F1")
+        first = FlightBooking.objects.get(pk=booking.pk)
+        second = FlightBooking.objects.get(pk=booking.pk)
+
+        self.assertTrue(cancel_booking(first))
+        # The second request read the booking before the first cancelled it.
+        self.assertEqual(second.status, "PENDING")
+        self.assertFalse(cancel_booking(second))
+        self.assertEqual(self.seats(self.flight), 10)
+        self.assertEqual(
+            InventoryHold.objects.get(flight_booking=booking).status, "RELEASED"
+        )
+
+    def test_cancel_gives_rooms_back(self):
+        booking = book_hotel(
+            self.user, self.hotel, 2, self.check_in, self.check_out, "H1"
+        )
+        self.assertEqual(free_rooms(self.hotel, self.check_in, self.check_out), 0)
+        cancel_booking(booking)
+        self.assertEqual(free_rooms(self.hotel, self.check_in, self.check_out), 2)
+
+
+class RoomInventoryTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel = make_hotel("Hotel Lumiere", self.paris, total_rooms=5)
+        self.nights = [in_days(10 + n) for n in range(5)]
+
+    def night(self, n):
+        return self.nights[n], self.nights[n] + datetime.timedelta(days=1)
+
+    def booked(self):
+        return dict(
+            HotelRoomInventory.objects.filter(hotel=self.hotel).values_list(
+                "night", "booked_rooms"
+            )
+        )
+
+    def test_stay_overlapping_a_full_night_is_rejected(self):
+        reserve_rooms(self.hotel, 5, self.nights[2], self.nights[4])
+
+        with self.assertRaises(InventoryError), transaction.atomic():
+            reserve_rooms(self.hotel, 1, self.nights[0], self.nights[3])
+        # Leaving on the first full night's date takes none of its rooms.
+        reserve_rooms(self.hotel, 1, self.nights[0], self.nights[2])
+        self.assertEqual(
+            self.booked(),
+            {
+                self.nights[0]: 1,
+                self.nights[1]: 1,
+                self.nights[2]: 5,
+                self.nights[3]: 5,
+            },
+        )
+
+    def test_free_rooms_are_those_of_the_tightest_night(self):
+        for n, rooms in [(0, 1), (1, 3), (2, 2)]:
+            reserve_rooms(self.hotel, rooms, *self.night(n))
+        other = make_hotel("Hotel Vide", self.paris, total_rooms=4)
+        hotels = with_free_rooms(
+            Hotel.objects.filter(city=self.paris), self.nights[0], self.nights[4]
+        )
+
+        free = dict(hotels.values_list("name", "free_rooms"))
+
+        self.assertEqual(free, {self.hotel.name: 2, other.name: 4})
+        self.assertEqual(free_rooms(self.hotel, self.nights[2], self.nights[4]), 3)
+        self.assertEqual(free_rooms(self.hotel, self.nights[3], self.nights[4]), 5)
+
+    def test_release_never_goes_below_zero(self):
+        reserve_rooms(self.hotel, 1, *self.night(0))
+
+        release_rooms(self.hotel, 3, self.nights[0], self.nights[2])
+
+        self.assertEqual(self.booked(), {self.nights[0]: 0})
+        self.assertEqual(free_rooms(self.hotel, self.nights[0], self.nights[2]), 5)
+
+    def test_released_holds_sharing_nights_give_back_their_rooms(self):
+        nights = self.nights
+        first = book_hotel(self.user, self.hotel, 2, nights[0], nights[3], "H1")
+        second = book_hotel(self.user, self.hotel, 1, nights[1], nights[4], "H2")
+        book_hotel(self.user, self.hotel, 1, nights[2], nights[4], "H3")
+        holds = InventoryHold.objects.filter(hotel_booking__in=[first, second])
+
+        released = release_holds(holds.values_list("pk", flat=True))
+
+        self.assertEqual(released, 2)
+        self.assertEqual(
+            self.booked(),
+            {
+                self.nights[0]: 0,
+                self.nights[1]: 0,
+                self.nights[2]: 1,
+                self.nights[3]: 1,
+            },
+        )
+
+
+class HoldTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.flight = make_flight(
+            "TA100", self.london, self.paris, in_days(10), (9, 0), (10, 15)
+        )
+        self.hotel = make_hotel("Hotel Lumiere", self.paris, total_rooms=2)
+        self.check_in, self.check_out = in_days(10), in_days(12)
+
+    def book_package(self):
+        flight_booking = book_flight(self.user, self.flight, 2, "F1")
+        hotel_booking = book_hotel(
+            self.user, self.hotel, 1, self.check_in, self.check_out, "H1"
+        )
+        return PackageBooking.objects.create(
+            user=self.user,
+            flight_booking=flight_booking,
+            hotel_booking=hotel_booking,
+            booking_reference="P1",
+            total_price=flight_booking.total_price + hotel_booking.total_price,
+        )
+
+    def expire_holds(self):
+        InventoryHold.objects.update(
+            expires_at=timezone.now() - datetime.timedelta(minutes=1)
+        )
+
+    def test_expired_holds_are_released(self):
+        package = self.book_package()
+        kept = book_flight(self.user, self.flight, 1, "F2")
+        self.expire_holds()
+        InventoryHold.objects.filter(flight_booking=kept).update(
+            expires_at=timezone.now() + datetime.timedelta(minutes=10)
+        )
+
+        self.assertEqual(release_expired_holds(batch_size=1), 2)
+        self.assertEqual(self.seats(self.flight), 9)
+        self.assertEqual(free_rooms(self.hotel, self.check_in, self.check_out), 2)
+        package.refresh_from_db()
+        self.assertEqual(package.status, "CANCELLED")
+        self.assertEqual(
+            FlightBooking.objects.get(pk=package.flight_booking_id).status,
+            "CANCELLED",
+        )
+        self.assertEqual(FlightBooking.objects.get(pk=kept.pk).status, "PENDING")
+        self.assertEqual(release_expired_holds(), 0)
+
+    def test_booking_is_confirmed_once(self):
+        booking = book_flight(self.user, self.flight, 2, "F1")
+        first = FlightBooking.objects.get(pk=booking.pk)
+        second = FlightBooking.objects.get(pk=booking.pk)
+
+        self.assertIs(confirm_booking(first), True)
+        self.assertIsNone(confirm_booking(second))
+        self.assertEqual(
+            InventoryHold.objects.get(flight_booking=booking).status, "CONVERTED"
+        )
+        self.assertEqual(self.seats(self.flight), 8)
+
+    def test_expired_booking_is_not_confirmed(self):
+        booking = book_flight(self.user, self.flight, 2, "F1")
+        self.expire_holds()
+
+        self.assertIs(confirm_booking(booking), False)
+        self.assertEqual(FlightBooking.objects.get(pk=booking.pk).status, "CANCELLED")
+        self.assertEqual(self.seats(self.flight), 10)
+
+    def test_package_confirms_its_bookings(self):
+        package = self.book_package()
+
+        self.assertIs(confirm_booking(package), True)
+        self.assertEqual(
+            FlightBooking.objects.get(pk=package.flight_booking_id).status,
+            "CONFIRMED",
+        )
+        self.assertEqual(
+            HotelBooking.objects.get(pk=package.hotel_booking_id).status,
+            "CONFIRMED",
+        )
+
+    def test_package_parts_are_paid_with_the_package(self):
+        package = self.book_package()
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            f"/payment/flight/{package.flight_booking_id}/",
+            {"payment_method": "PAYPAL"},
+        )
+        self.assertRedirects(
+            response,
+            f"/payment/package/{package.pk}/",
+            fetch_redirect_response=False,
+        )
+        self.assertFalse(BookingPayment.objects.exists())
+
+        self.client.post(
+            f"/payment/package/{package.pk}/", {"payment_method": "PAYPAL"}
+        )
+        self.client.post(
+            f"/payment/package/{package.pk}/", {"payment_method": "PAYPAL"}
+        )
+        self.assertEqual(BookingPayment.objects.get().package_booking, package)
+
+
+class SearchCacheTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+        self.flight = make_flight(
+            "TA100", self.london, self.paris, self.date, (9, 0), (10, 15)
+        )
+        self.route = (self.london.pk, self.paris.pk, self.date)
+
+    def search(self, passengers=1):
+        return cached_flight_search(
+            self.london, self.paris, self.date, passengers, "ECONOMY"
+        )
+
+    def route_version(self):
+        return get_version(flight_route_version_name(*self.route))
+
+    def test_versions_are_bumped_on_commit_only(self):
+        version = self.route_version()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(InventoryError), transaction.atomic():
+                invalidate_flight_routes([self.route])
+                raise InventoryError("Rolled back.")
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.route_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_flight_routes([self.route])
+            self.assertEqual(self.route_version(), version)
+        self.assertEqual(self.route_version(), version + 1)
+
+    def test_repeat_search_is_served_from_the_cache(self):
+        self.search()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search(), [self.flight])
+
+    def test_booking_makes_the_next_search_miss_the_cache(self):
+        self.assertEqual(self.search(passengers=4), [self.flight])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book_flight(self.user, self.flight, 7, "F1")
+
+        self.assertEqual(self.search(passengers=4), [])
+        self.assertEqual(self.search()[0].available_seats, 3)
+
+    def test_flight_edit_makes_the_next_search_miss_the_cache(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.economy_price = Decimal("55.00")
+            self.flight.save()
+
+        self.assertEqual(self.search()[0].economy_price, Decimal("55.00"))
+
+    def test_moving_a_flight_invalidates_both_routes(self):
+        self.search()
+        rome_search = cached_flight_search(
+            self.london, self.rome, self.date, 1, "ECONOMY"
+        )
+        self.assertEqual(rome_search, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.destination_city = self.rome
+            self.flight.save()
+
+        self.assertEqual(self.search(), [])
+        self.assertEqual(
+            cached_flight_search(self.london, self.rome, self.date, 1, "ECONOMY"),
+            [self.flight],
+        )
+
+    def test_attraction_edit_changes_the_fragment_key(self):
+        attraction = TouristAttraction.objects.create(
+            name="Louvre", city=self.paris, description="Museum"
+        )
+        key = make_template_fragment_key(
+            "attraction_detail",
+            [attraction.pk, get_versions("cities", "attractions")],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attraction.save()
+
+        self.assertNotEqual(
+            make_template_fragment_key(
+                "attraction_detail",
+                [attraction.pk, get_versions("cities", "attractions")],
+            ),
+            key,
+        )
+
+
+class AvailabilityTests(TransactionTestCase):
+    # The views query from pool threads, which only see committed rows.
+    def setUp(self):
+        cache.clear()
+        london = City.objects.create(name="London", country="UK")
+        paris = City.objects.create(name="Paris", country="France")
+        self.flight = make_flight("TA100", london, paris, in_days(10), (9, 0), (10, 15))
+
+    def check(self, **params):
+        return self.client.get("/ajax/check-availability/", params)
+
+    def test_available_seats_are_reported(self):
+        response = self.check(type="flight", id=self.flight.pk, quantity=4)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"available": True, "available_quantity": 10, "price": 100.0},
+        )
+
+    def test_unreadable_quantities_are_rejected(self):
+        for quantity in ["x", "", "0", "-2"]:
+            with self.subTest(quantity=quantity):
+                response = self.check(
+                    type="flight", id=self.flight.pk, quantity=quantity
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_batch_rejects_unreadable_quantities(self):
+        for items in [f"flight:{self.flight.pk}:x", f"flight:{self.flight.pk}:0"]:
+            with self.subTest(items=items):
+                response = self.client.get(
+                    "/ajax/check-availability/batch/", {"items": items}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+
+class RankedPairTests(SimpleTestCase):
+    def test_pairs_come_cheapest_first(self):
+        rng = random.Random(9)
+        left = sorted(rng.randrange(100) for _ in range(15))
+        right = sorted(rng.randrange(100) for _ in range(12))
+
+        pairs = list(
+            ranked_pairs(len(left), len(right), lambda i, j: left[i] + right[j])
+        )
+
+        self.assertEqual(len(pairs), len(left) * len(right))
+        self.assertEqual(len(set((i, j) for _, i, j in pairs)), len(pairs))
+        self.assertEqual(
+            [cost for cost, _, _ in pairs],
+            sorted(a + b for a in left for b in right),
+        )
+
+    def test_empty_side_gives_no_pairs(self):
+        self.assertEqual(list(ranked_pairs(3, 0, lambda i, j: 0)), [])
+
+
+class RoundTripTests(TravelTestCase):
+    def test_pairs_match_every_combination_by_fare(self):
+        out_date, back_date = in_days(10), in_days(14)
+        out_fares = [Decimal("120"), Decimal("90"), Decimal("150")]
+        back_fares = [Decimal("70"), Decimal("110")]
+        for n, fare in enumerate(out_fares):
+            make_flight(
+                f"TA1{n}",
+                self.london,
+                self.paris,
+                out_date,
+                (8 + n, 0),
+                (9 + n, 0),
+                economy_price=fare,
+            )
+        for n, fare in enumerate(back_fares):
+            make_flight(
+                f"TA2{n}",
+                self.paris,
+                self.london,
+                back_date,
+                (8 + n, 0),
+                (9 + n, 0),
+                economy_price=fare,
+            )
+
+        pairs = round_trip_search(
+            self.london, self.paris, out_date, back_date, 2, "ECONOMY"
+        )
+
+        self.assertEqual(len(pairs), 6)
+        self.assertEqual(
+            [pair.total_price for pair in pairs[:]],
+            sorted(2 * (a + b) for a in out_fares for b in back_fares),
+        )
+        cheapest = pairs[0]
+        self.assertEqual(
+            (cheapest.outbound.flight_number, cheapest.inbound.flight_number),
+            ("TA11", "TA20"),
+        )
+
+
+class ConnectionTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+        self.next_day = self.date + datetime.timedelta(days=1)
+
+    def itineraries(self):
+        return [
+            [leg.flight_number for leg in itinerary.legs]
+            for itinerary in connection_search(
+                self.london, self.rome, self.date, 1, "ECONOMY"
+            )
+        ]
+
+    def test_connection_across_midnight(self):
+        make_flight("TA1", self.london, self.paris, self.date, (22, 0), (23, 30))
+        make_flight("TA2", self.paris, self.rome, self.next_day, (1, 0), (3, 0))
+
+        itineraries = connection_search(self.london, self.rome, self.date, 1, "ECONOMY")
+
+        self.assertEqual(len(itineraries), 1)
+        self.assertEqual(itineraries[0].total_minutes, 5 * 60)
+        self.assertEqual(
+            [leg.flight_number for leg in itineraries[0].legs], ["TA1", "TA2"]
+        )
+
+    def test_layovers_stay_within_limits(self):
+        make_flight("TA1", self.london, self.paris, self.date, (22, 0), (23, 30))
+        # Too long a wait, and too short a one.
+        make_flight("TA2", self.paris, self.rome, self.next_day, (8, 0), (10, 0))
+        make_flight("TA3", self.paris, self.rome, self.date, (23, 45), (23, 59))
+
+        self.assertEqual(self.itineraries(), [])
+
+    def test_itineraries_start_on_the_searched_date(self):
+        make_flight("TA1", self.london, self.paris, self.next_day, (1, 0), (2, 0))
+        make_flight("TA2", self.paris, self.rome, self.next_day, (3, 0), (5, 0))
+
+        self.assertEqual(self.itineraries(), [])
+
+
+class PackageTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+        self.flights = [
+            make_flight(
+                f"TA{n}",
+                self.london,
+                self.paris,
+                self.date,
+                (8 + n, 0),
+                (9 + n + n % 2, 0),
+                economy_price=Decimal(fare),
+            )
+            for n, fare in enumerate(["120", "95", "140", "95"])
+        ]
+        self.hotels = [
+            make_hotel(
+                f"Hotel {n}", self.paris, star_rating=stars, price_per_night=price
+            )
+            for n, (stars, price) in enumerate(
+                [(3, Decimal("80")), (5, Decimal("150")), (4, Decimal("90"))]
+            )
+        ]
+
+    def test_best_packages_match_the_full_ranking(self):
+        def score(flight, hotel):
+            minutes = (flight.arrival_time.hour - flight.departure_time.hour) * 60
+            return (
+                float(flight.economy_price) * 2
+                + MINUTE_VALUE * 2 * minutes
+                + float(hotel.price_per_night) * 3
+                - STAR_VALUE * hotel.star_rating * 3
+            )
+
+        packages = top_packages(
+            self.flights, self.hotels, 2, "ECONOMY", nights=3, limit=5
+        )
+
+        expected = sorted(
+            score(flight, hotel) for flight in self.flights for hotel in self.hotels
+        )
+        self.assertEqual(
+            [score(package.flight, package.hotel) for package in packages],
+            expected[:5],
+        )
+        self.assertEqual(
+            len({(package.flight, package.hotel) for package in packages}), 5
+        )
+
+    def test_listed_price_is_what_the_same_booking_costs(self):
+        [package] = top_packages(
+            self.flights, self.hotels, 2, "ECONOMY", nights=3, discount=10, limit=1
+        )
+        self.client.force_login(self.user)
+
+        self.client.post(
+            f"/package/book/?flight_id={package.flight.pk}"
+            f"&hotel_id={package.hotel.pk}",
+            {
+                "flight-passenger_count": 2,
+                "flight-travel_class": "ECONOMY",
+                "hotel-check_in_date": self.date,
+                "hotel-check_out_date": self.date + datetime.timedelta(days=3),
+                "hotel-rooms_count": 1,
+                "hotel-guests_count": 2,
+                "package-package_discount": "10",
+            },
+        )
+
+        booking = PackageBooking.objects.get()
+        self.assertEqual(
+            booking.total_price, package.total_price.quantize(Decimal("0.01"))
+        )
+        self.assertEqual(
+            booking.total_price,
+            package_price(
+                booking.flight_booking.total_price,
+                booking.hotel_booking.total_price,
+                booking.package_discount,
+            )[2],
+        )
+
+
+class CursorPaginationTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        for n in range(25):
+            make_hotel(
+                f"Hotel {n}",
+                self.paris,
+                star_rating=n % 3 + 3,
+                price_per_night=Decimal(50 + n % 4 * 10),
+            )
+        self.hotels = Hotel.objects.all()
+
+    def pages(self, paginator):
+        page = paginator.get_page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append(page)
+        return pages
+
+    def test_pages_cover_the_ordering_once(self):
+        pages = self.pages(CursorPaginator(self.hotels, 10, HOTEL_ORDERING))
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(
+            [hotel.pk for page in pages for hotel in page],
+            list(self.hotels.order_by(*HOTEL_ORDERING).values_list("pk", flat=True)),
+        )
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        paginator = CursorPaginator(self.hotels, 10, HOTEL_ORDERING, with_total=True)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+
+        back = paginator.get_page(second.previous_cursor)
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertEqual(second.total, 25)
+
+    def test_lists_page_like_querysets(self):
+        hotels = list(self.hotels)
+        pages = self.pages(CursorPaginator(hotels, 10, HOTEL_ORDERING))
+        queryset_pages = self.pages(CursorPaginator(self.hotels, 10, HOTEL_ORDERING))
+
+        self.assertEqual(
+            [list(page) for page in pages], [list(page) for page in queryset_pages]
+        )
+
+    def test_bad_cursors_give_the_first_page(self):
+        paginator = CursorPaginator(self.hotels, 10, HOTEL_ORDERING)
+        first = paginator.get_page()
+        cursor = first.next_cursor
+        # Signed for another ordering.
+        other = CursorPaginator(self.hotels, 10, ["name", "id"]).get_page().next_cursor
+
+        for bad in [cursor[:-2] + "xx", "garbage", other]:
+            with self.subTest(cursor=bad):
+                self.assertEqual(list(paginator.get_page(bad)), list(first))
+
+    def test_rows_without_a_model(self):
+        Row = namedtuple("Row", ["departure_time", "id"])
+        rows = [Row(datetime.time(n % 24), n) for n in range(1, 31)]
+        paginator = CursorPaginator(rows, 10, FLIGHT_ORDERING, model=Flight)
+
+        self.assertEqual(
+            [row for page in self.pages(paginator) for row in page],
+            sorted(rows),
+        )
+        # Without the model the cursor cannot be read, and is ignored.
+        paginator = CursorPaginator(rows, 10, FLIGHT_ORDERING)
+        self.assertEqual(
+            list(paginator.get_page(paginator.get_page().next_cursor)),
+            list(paginator.get_page()),
+        )
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class CanonicalSearchTests(TravelTestCase):
+    def bind(self, query):
+        request = RequestFactory().get(f"/places/?{query}")
+        return bind_search_form(request, AttractionFilterForm)[1]
+
+    def test_search_urls_are_redirected_to_their_canonical_form(self):
+        canonical = f"category=&city={self.paris.pk}&max_entry_fee="
+
+        for query in [
+            f"city={self.paris.pk}",
+            f"max_entry_fee=&city={self.paris.pk}&category=",
+            f"city={self.paris.pk}&category=&max_entry_fee=&cursor=abc",
+        ]:
+            with self.subTest(query=query):
+                self.assertTrue(self.bind(query).startswith(f"/places/?{canonical}"))
+        self.assertIsNone(self.bind(canonical))
+        self.assertIsNone(self.bind(""))
+
+        response = self.client.get(f"/places/?max_entry_fee=&city={self.paris.pk}")
+        self.assertRedirects(
+            response, f"/places/?{canonical}", fetch_redirect_response=False
+        )
+
+    def test_anonymous_pages_are_cached_and_vary_on_the_cookie(self):
+        first = self.client.get("/")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/")
+
+        self.assertEqual(second.content, first.content)
+        for response in [first, second]:
+            self.assertIn("Cookie", response["Vary"])
+
+    def test_signed_in_visitors_are_never_served_the_cached_page(self):
+        anonymous = self.client.get("/")
+        self.assertContains(anonymous, "Login")
+
+        self.client.force_login(self.user)
+        response = self.client.get("/")
+
+        self.assertContains(response, "Dashboard")
+        self.assertNotContains(response, "Login")
+        self.assertIn("Cookie", response["Vary"])
+        self.client.logout()
+        self.assertEqual(self.client.get("/").content, anonymous.content)
+
+
+class TimelineTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        flight = make_flight(
+            "TA100", self.london, self.paris, in_days(10), (9, 0), (10, 15)
+        )
+        hotel = make_hotel("Hotel Lumiere", self.paris, total_rooms=6)
+        stay = (in_days(10), in_days(12))
+        for n in range(3):
+            book_flight(self.user, flight, 1, f"F{n}")
+            book_hotel(self.user, hotel, 1, *stay, f"H{n}")
+            PackageBooking.objects.create(
+                user=self.user,
+                flight_booking=book_flight(self.user, flight, 1, f"PF{n}"),
+                hotel_booking=book_hotel(self.user, hotel, 1, *stay, f"PH{n}"),
+                booking_reference=f"P{n}",
+                total_price=Decimal("260.00"),
+            )
+        # Every booking but one flight and one hotel was made at the same time.
+        booked_at = timezone.now() - datetime.timedelta(days=1)
+        for model in [FlightBooking, HotelBooking, PackageBooking]:
+            model.objects.update(booking_date=booked_at)
+        FlightBooking.objects.filter(booking_reference="F0").update(
+            booking_date=booked_at + datetime.timedelta(hours=1)
+        )
+        HotelBooking.objects.filter(booking_reference="H0").update(
+            booking_date=booked_at - datetime.timedelta(hours=1)
+        )
+
+    def test_pages_across_equal_booking_dates_list_every_booking_once(self):
+        for per_page in [1, 2, 4]:
+            with self.subTest(per_page=per_page):
+                page = booking_timeline(self.user, per_page=per_page)
+                rows = list(page)
+                # A cursor that repeats rows would page forever.
+                while page.has_next() and len(rows) <= 9:
+                    page = booking_timeline(
+                        self.user, page.next_cursor, per_page=per_page
+                    )
+                    rows += page
+
+                self.assertEqual(
+                    [row["reference"] for row in rows],
+                    ["F0", "P2", "P1", "P0", "H2", "H1", "F2", "F1", "H0"],
+                )
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class AttractionPageTests(TravelTestCase):
+    def test_image_without_derivatives_is_shown_as_uploaded(self):
+        # Stored, but not resized yet.
+        attraction = TouristAttraction.objects.create(
+            name="Louvre",
+            city=self.paris,
+            description="Museum",
+            image="attractions/ab/abcdef.jpg",
+        )
+
+        response = self.client.get(f"/places/{attraction.pk}/")
+
+        self.assertContains(response, 'src="/media/attractions/ab/abcdef.jpg"')
+        self.assertNotContains(response, "<picture>")
+
+
+class DedupeMediaTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = Path(media.name)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def store(self, name, content):
+        path = self.media / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def test_identical_files_are_kept_once(self):
+        self.store("img/beach.jpg", b"same picture")
+        self.store("img/beach_x1Yz.jpg", b"same picture")
+        self.store("img/hills.jpg", b"another picture")
+        self.store("derivatives/img/beach-1280w.webp", b"resized")
+        hotel = make_hotel("Hotel Lumiere", self.paris, main_image="img/beach.jpg")
+        attraction = TouristAttraction.objects.create(
+            name="Louvre", city=self.paris, image="img/beach_x1Yz.jpg"
+        )
+
+        call_command("dedupe_media", "--delete-originals", stdout=StringIO())
+
+        hotel.refresh_from_db()
+        attraction.refresh_from_db()
+        digest = hashlib.sha256(b"same picture").hexdigest()[:32]
+        self.assertEqual(hotel.main_image.name, f"img/{digest[:2]}/{digest}.jpg")
+        self.assertEqual(attraction.image.name, hotel.main_image.name)
+        files = [path.relative_to(self.media) for path in self.media.rglob("*.*")]
+        self.assertEqual(
+            sorted(map(str, files)), [hotel.main_image.name, "img/hills.jpg"]
+        )
+
+    def test_dry_run_changes_nothing(self):
+        self.store("img/beach.jpg", b"same picture")
+        self.store("img/beach_x1Yz.jpg", b"same picture")
+        make_hotel("Hotel Lumiere", self.paris, main_image="img/beach.jpg")
+
+        call_command("dedupe_media", "--dry-run", stdout=StringIO())
+
+        self.assertEqual(Hotel.objects.get().main_image.name, "img/beach.jpg")
+        self.assertEqual(len(list(self.media.rglob("*.*"))), 2)
+
+
+class ImportTests(TravelTestCase):
+    FLIGHT_COLUMNS = (
+        "flight_number,airline,source_city,destination_city,flight_date,"
+        "departure_time,arrival_time,economy_price,total_seats,available_seats"
+    )
+
+    def setUp(self):
+        super().setUp()
+        Airline.objects.create(code="TA", name="Test Air")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.date = in_days(10).isoformat()
+
+    def import_csv(self, kind, *lines):
+        path = self.directory / f"{kind}.csv"
+        path.write_text("\n".join(lines) + "\n")
+        out, err = StringIO(), StringIO()
+        call_command("import_catalog", kind, str(path), stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def rows(self, model):
+        rows = list(model.objects.order_by("pk").values())
+        for row in rows:
+            del row["updated_at"]
+        return rows
+
+    def test_importing_the_same_file_again_changes_nothing(self):
+        files = {
+            "flights": [
+                self.FLIGHT_COLUMNS,
+                f"TA100,TA,London,Paris,{self.date},09:00,10:15,100.00,10,",
+                f"TA102,Test Air,Paris,Rome,{self.date},12:00,14:10,90.00,20,15",
+            ],
+            "hotels": [
+                "name,city,address,price_per_night,star_rating,amenities,"
+                "distance_from_airport,total_rooms",
+                'Hotel Lumiere,Paris,1 Rue,120.00,4,"WiFi, Spa",12.5,30',
+                "Hotel Roma,Rome,2 Via,80.00,3,Parking,8.0,10",
+            ],
+        }
+        for kind, model in [("flights", Flight), ("hotels", Hotel)]:
+            with self.subTest(kind=kind):
+                self.import_csv(kind, *files[kind])
+                imported = self.rows(model)
+
+                out, err = self.import_csv(kind, *files[kind])
+
+                self.assertEqual(len(imported), 2)
+                self.assertEqual(self.rows(model), imported)
+                self.assertIn("0 rejected", out)
+                self.assertEqual(err, "")
+
+    def test_bad_records_are_reported_and_skipped(self):
+        out, err = self.import_csv(
+            "flights",
+            self.FLIGHT_COLUMNS,
+            f"TA100,TA,London,Atlantis,{self.date},09:00,10:15,100.00,10,",
+            f"TA101,ZZ,London,Paris,{self.date},09:00,10:15,100.00,10,",
+            "TA102,TA,London,Paris,2026-13-40,09:00,10:15,100.00,10,",
+            f"TA103,TA,London,Paris,{self.date},09:00,10:15,100.00,10,",
+        )
+
+        self.assertIn("line 2: destination_city: Unknown destination_city", err)
+        self.assertIn("line 3: airline: Unknown airline 'ZZ'.", err)
+        self.assertIn("line 4: flight_date:", err)
+        self.assertIn("Wrote 1 flights row(s) from 4 record(s)", out)
+        self.assertIn("3 rejected", out)
+        self.assertEqual(
+            list(Flight.objects.values_list("flight_number", flat=True)), ["TA103"]
+        )
+
+    def test_reimport_keeps_the_seats_already_sold(self):
+        line = f"TA100,TA,London,Paris,{self.date},09:00,10:15,{{}},10,"
+        self.import_csv("flights", self.FLIGHT_COLUMNS, line.format("100.00"))
+        flight = Flight.objects.get()
+        reserve_seats(flight, 3)
+
+        self.import_csv("flights", self.FLIGHT_COLUMNS, line.format("85.00"))
+
+        flight.refresh_from_db()
+        self.assertEqual(flight.economy_price, Decimal("85.00"))
+        self.assertEqual(flight.available_seats, 7)
+
+
+class ScheduleTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+        self.schedule = FlightSchedule.objects.create(
+            flight_number="TA500",
+            airline=Airline.objects.create(code="TA", name="Test Air"),
+            source_city=self.london,
+            destination_city=self.paris,
+            days_of_week="1234567",
+            valid_from=in_days(0),
+            valid_until=in_days(30),
+            departure_time=datetime.time(9, 0),
+            arrival_time=datetime.time(10, 15),
+            economy_price=Decimal("100.00"),
+            total_seats=10,
+        )
+        self.flight_id = scheduled_flight_id(self.schedule.pk, self.date)
+
+    def test_scheduled_ids_name_their_schedule_and_date(self):
+        # The date bits hold ordinals up to the end of year 2870.
+        dates = [datetime.date(2000, 1, 1), self.date, datetime.date(2870, 12, 31)]
+        ids = set()
+        for schedule_id in [1, 2, 3, 2**40]:
+            for date in dates:
+                flight_id = scheduled_flight_id(schedule_id, date)
+                self.assertLess(flight_id, 0)
+                self.assertEqual(
+                    split_scheduled_flight_id(flight_id), (schedule_id, date)
+                )
+                ids.add(flight_id)
+        self.assertEqual(len(ids), 12)
+
+        for flight_id in [0, 5, -(1 << 63)]:
+            with self.subTest(flight_id=flight_id), self.assertRaises(ValueError):
+                split_scheduled_flight_id(flight_id)
+
+    def test_first_booking_stores_the_flight(self):
+        flight = flights_by_id([self.flight_id])[self.flight_id]
+        self.assertLess(flight.pk, 0)
+        self.assertFalse(Flight.objects.exists())
+
+        with transaction.atomic():
+            stored = materialize_flight(flight)
+            book_flight(self.user, stored, 2, "F1")
+
+        self.assertEqual(stored.schedule, self.schedule)
+        self.assertEqual(stored.flight_date, self.date)
+        self.assertEqual(flights_by_id([self.flight_id]), {self.flight_id: stored})
+        # Booking it again finds the row.
+        self.assertEqual(materialize_flight(flight), stored)
+        self.assertEqual(Flight.objects.count(), 1)
+        self.assertEqual(self.seats(stored), 8)
+
+    def test_number_taken_on_another_route_is_not_booked(self):
+        flight = flights_by_id([self.flight_id])[self.flight_id]
+        make_flight("TA500", self.london, self.rome, self.date, (9, 0), (11, 30))
+
+        self.assertEqual(flights_by_id([self.flight_id]), {})
+        with self.assertRaises(InventoryError):
+            materialize_flight(flight)
+
+    def test_flight_entered_by_hand_on_the_route_is_booked(self):
+        flight = flights_by_id([self.flight_id])[self.flight_id]
+        entered = make_flight(
+            "TA500", self.london, self.paris, self.date, (9, 5), (10, 20)
+        )
+
+        self.assertEqual(flights_by_id([self.flight_id]), {self.flight_id: entered})
+        self.assertEqual(materialize_flight(flight), entered)
+
+
+class TimetableTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+        self.leg = (self.london.pk, self.paris.pk, self.date)
+        schedule = [(10, 9), (1, 7), (5, 9), (0, 6), (3, 12)]
+        for n, (seats, hour) in enumerate(schedule):
+            make_flight(
+                f"TA{n}",
+                self.london,
+                self.paris,
+                self.date,
+                (hour, 0),
+                (hour + 1, 30),
+                available_seats=seats,
+            )
+        make_flight(
+            "TA9",
+            self.london,
+            self.paris,
+            self.date,
+            (8, 0),
+            (9, 0),
+            status="CANCELLED",
+        )
+        make_flight("TA8", self.paris, self.london, self.date, (8, 0), (9, 0))
+
+    def search(self, passengers):
+        return timetable_searches([self.leg], passengers)[self.leg]
+
+    def test_rows_match_the_database_search(self):
+        for passengers in [1, 2, 5, 11]:
+            with self.subTest(passengers=passengers):
+                self.assertEqual(
+                    [row.id for row in self.search(passengers)],
+                    list(
+                        flight_search(*self.leg, passengers).values_list(
+                            "pk", flat=True
+                        )
+                    ),
+                )
+
+    def test_seat_changes_reach_the_snapshot(self):
+        rows = self.search(3)
+        flight = Flight.objects.get(pk=rows[0].id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(flight, flight.available_seats - 1)
+
+        self.assertNotIn(flight.pk, [row.id for row in self.search(3)])
+        self.assertEqual(len(self.search(3)), len(rows) - 1)
+
+    def test_hydrate_gives_flights_in_row_order(self):
+        rows = self.search(1)
+        self.assertTrue(all(isinstance(row, FlightRow) for row in rows))
+
+        flights = hydrate(rows)
+
+        self.assertEqual([flight.pk for flight in flights], [row.id for row in rows])
+        self.assertTrue(all(isinstance(flight, Flight) for flight in flights))
+        self.assertEqual(flights[0].airline.code, "TA")
+
+
+class FacetTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.date = in_days(10)
+
+    def assertCountsMatchResults(self, facets_class, make_form, results, choices):
+        """Each option's count is the number of results choosing it gives."""
+        for selected in choices:
+            facets = facets_class(make_form(**selected)).count(results)
+            for facet in facets:
+                for option in facet.options:
+                    chosen = make_form(**{**selected, facet.name: option.value})
+                    with self.subTest(selected=selected, option=option.value):
+                        narrowed = facets_class(chosen).narrow(results)
+                        self.assertEqual(option.count, len(narrowed))
+
+    def test_hotel_counts_match_the_filtered_results(self):
+        for n in range(12):
+            make_hotel(
+                f"Hotel {n}",
+                self.paris,
+                star_rating=n % 3 + 3,
+                price_per_night=Decimal(60 + n * 35),
+            )
+        make_hotel("Elsewhere", self.rome)
+        check_out = self.date + datetime.timedelta(days=2)
+
+        def make_form(**choices):
+            form = HotelSearchForm(
+                {
+                    "city": self.paris.pk,
+                    "check_in_date": self.date,
+                    "check_out_date": check_out,
+                    "guests": 1,
+                    "rooms": 1,
+                    **choices,
+                }
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+            return form
+
+        results = hotel_search(self.paris, 1, self.date, check_out)
+        self.assertCountsMatchResults(
+            HotelFacets,
+            make_form,
+            results,
+            [{}, {"star_rating": "4"}, {"price_band": "1"}],
+        )
+
+    def test_flight_counts_match_the_filtered_results(self):
+        other = Airline.objects.create(code="OA", name="Other Air")
+        for n in range(10):
+            make_flight(
+                f"TA{n}",
+                self.london,
+                self.paris,
+                self.date,
+                (n * 2, 0),
+                (n * 2 + 1, 30),
+                economy_price=Decimal(80 + n * 60),
+            )
+        Flight.objects.filter(flight_number__in=["TA1", "TA4", "TA5"]).update(
+            airline=other
+        )
+
+        def make_form(**choices):
+            form = FlightSearchForm(
+                {
+                    "trip_type": "one_way",
+                    "source_city": self.london.pk,
+                    "destination_city": self.paris.pk,
+                    "departure_date": self.date,
+                    "passengers": 1,
+                    "travel_class": "ECONOMY",
+                    **choices,
+                }
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+            return form
+
+        results = list(flight_search(self.london, self.paris, self.date, 1))
+        self.assertCountsMatchResults(
+            FlightFacets,
+            make_form,
+            results,
+            [{}, {"airline": str(other.pk)}, {"departure_window": "morning"}],
+        )
+
+
+class AmenityTests(TravelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotels = [
+            make_hotel("Hotel A", self.paris, amenities="WiFi, Pool, Parking"),
+            make_hotel("Hotel B", self.paris, amenities="wifi,Pool"),
+            make_hotel("Hotel C", self.paris, amenities="Pool , Spa"),
+            make_hotel("Hotel D", self.paris, amenities=""),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.changed = index_amenities()
+        self.amenities = Amenity.objects.in_bulk(field_name="slug")
+        self.check_in, self.check_out = in_days(5), in_days(7)
+
+    def search(self, *slugs):
+        amenities = [self.amenities[slug] for slug in slugs]
+        hotels = hotel_search(
+            self.paris, 1, self.check_in, self.check_out, amenities=amenities
+        )
+        return sorted(hotel.name for hotel in hotels)
+
+    def test_index_catalogs_names_most_listed_first(self):
+        self.assertEqual(self.changed, 3)
+        self.assertEqual(
+            sorted(self.amenities, key=lambda slug: self.amenities[slug].bit),
+            ["pool", "wifi", "parking", "spa"],
+        )
+        for hotel in Hotel.objects.all():
+            bits = [
+                self.amenities[slug].bit for slug in parse_amenities(hotel.amenities)
+            ]
+            self.assertEqual(hotel.amenity_mask, mask_of(bits))
+
+    def test_filter_requires_every_amenity(self):
+        self.assertEqual(self.search("pool"), ["Hotel A", "Hotel B", "Hotel C"])
+        self.assertEqual(self.search("wifi", "pool"), ["Hotel A", "Hotel B"])
+        self.assertEqual(self.search("wifi", "spa"), [])
+
+    def test_saving_a_hotel_only_writes_its_mask(self):
+        hotel = self.hotels[3]
+        hotel.amenities = "Spa, Pool"
+        # The first save in the process loads the catalog's bits.
+        self.hotels[2].save()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(1):
+                hotel.save()
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.search("spa"), ["Hotel C", "Hotel D"])
+
+    def test_saving_a_hotel_catalogs_new_names_on_commit(self):
+        hotel = self.hotels[3]
+        hotel.amenities = "Spa, Sauna"
+        self.hotels[1].amenities = "WiFi, Pool, sauna"
+        self.hotels[1].save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hotel.save()
+            # Until the save commits, Sauna is listed but not filterable.
+            self.assertFalse(Amenity.objects.filter(slug="sauna").exists())
+
+        sauna = Amenity.objects.get(slug="sauna")
+        self.assertEqual(sauna.name, "Sauna")
+        self.assertEqual(self.search("spa"), ["Hotel C", "Hotel D"])
+        self.amenities["sauna"] = sauna
+        self.assertEqual(self.search("sauna"), ["Hotel B", "Hotel D"])
+
+    def test_long_names_are_cut_to_the_catalog_lengths(self):
+        name = "Rooftop infinity pool with a view over the whole old town"
+        with self.captureOnCommitCallbacks(execute=True):
+            amenity_masks([f"{name}, WiFi"])
+
+        amenity = Amenity.objects.get(name__startswith="Rooftop")
+        self.assertEqual(amenity.name, name[:50].rstrip())
+        self.assertLessEqual(len(amenity.slug), 50)
+        self.assertEqual(parse_amenities(name), {amenity.slug: amenity.name})
+
+    def test_imported_names_are_cataloged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            masks = amenity_masks(["Sauna, WiFi", "Gym"])
+
+        sauna = Amenity.objects.get(slug="sauna")
+        gym = Amenity.objects.get(slug="gym")
+        self.assertEqual(
+            masks,
+            [mask_of([sauna.bit, self.amenities["wifi"].bit]), mask_of([gym.bit])],
+        )
+        bits = {amenity.bit for amenity in self.amenities.values()}
+        self.assertEqual(len(bits | {sauna.bit, gym.bit}), 6)
+
+    def test_deleting_an_amenity_frees_its_bit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.amenities["wifi"].delete()
+
+        self.assertEqual(
+            Hotel.objects.get(pk=self.hotels[0].pk).amenity_mask,
+            mask_of([self.amenities["pool"].bit, self.amenities["parking"].bit]),
+        )
+        self.assertEqual(self.search("pool"), ["Hotel A", "Hotel B", "Hotel C"])
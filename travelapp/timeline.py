@@ -0,0 +1,174 @@
+"""The dashboard's booking timeline.
+
+Flight, hotel and package bookings are listed together, newest first, by a
+single UNION ALL query that reads only the columns the dashboard shows.
+Pages continue from a signed cursor on (booking date, kind, id). The cursor
+is applied to each part of the union, through the (user, booking date)
+indexes, so a deep page costs the same one query as the first. Flight and
+hotel bookings that belong to a package are listed once, as the package.
+"""
+import datetime
+
+from django.core import signing
+from django.db.models import CharField, Count, DateField, F, Q, Value
+from django.db.models.functions import Concat
+
+from .models import FlightBooking, HotelBooking, PackageBooking
+from .pagination import CursorPage
+
+# Kinds in the order they sort in on equal booking dates (descending).
+KINDS = ["flight", "hotel", "package"]
+
+STATUS_LABELS = {
+    **dict(FlightBooking.BOOKING_STATUS_CHOICES),
+    **dict(HotelBooking.BOOKING_STATUS_CHOICES),
+    **dict(PackageBooking.BOOKING_STATUS_CHOICES),
+}
+
+_CURSOR_SALT = "travelapp.timeline"
+
+
+def _bookings(kind, user):
+    if kind == "flight":
+        return FlightBooking.objects.filter(user=user, packagebooking__isnull=True)
+    if kind == "hotel":
+        return HotelBooking.objects.filter(user=user, packagebooking__isnull=True)
+    return PackageBooking.objects.filter(user=user)
+
+
+def _columns(kind):
+    """The timeline columns of ``kind``, named alike for every kind."""
+    if kind == "flight":
+        return {
+            "title": Concat(
+                "flight__airline__name",
+                Value(" "),
+                "flight__flight_number",
+                output_field=CharField(),
+            ),
+            "detail": Concat(
+                "flight__source_city__name",
+                Value(" → "),
+                "flight__destination_city__name",
+                output_field=CharField(),
+            ),
+            "starts": F("flight__flight_date"),
+            "ends": Value(None, output_field=DateField()),
+            "travellers": F("passenger_count"),
+        }
+    if kind == "hotel":
+        return {
+            "title": F("hotel__name"),
+            "detail": F("hotel__city__name"),
+            "starts": F("check_in_date"),
+            "ends": F("check_out_date"),
+            "travellers": F("guests_count"),
+        }
+    return {
+        "title": Concat(
+            "flight_booking__flight__flight_number",
+            Value(" + "),
+            "hotel_booking__hotel__name",
+            output_field=CharField(),
+        ),
+        "detail": Concat(
+            "flight_booking__flight__source_city__name",
+            Value(" → "),
+            "flight_booking__flight__destination_city__name",
+            output_field=CharField(),
+        ),
+        "starts": F("flight_booking__flight__flight_date"),
+        "ends": F("hotel_booking__check_out_date"),
+        "travellers": F("flight_booking__passenger_count"),
+    }
+
+
+def _before(kind, key):
+    """Bookings of ``kind`` that sort after ``key`` in the timeline."""
+    booked_at, key_kind, key_id = key
+    if kind < key_kind:
+        return Q(booking_date__lte=booked_at)
+    if kind == key_kind:
+        return Q(booking_date__lt=booked_at) | Q(booking_date=booked_at, id__lt=key_id)
+    return Q(booking_date__lt=booked_at)
+
+
+def booking_timeline(user, cursor=None, per_page=20):
+    """A ``CursorPage`` of ``user``'s bookings, newest first.
+
+    Each row is a dict with the booking's ``kind``, ``booking_id``,
+    ``reference``, ``booked_at``, ``state``, ``state_label``, ``price``,
+    ``title``, ``detail``, ``starts``, ``ends`` and ``travellers``. Later
+    pages only link forward; an invalid cursor gives the first page.
+    """
+    key = _decode(cursor)
+    parts = []
+    for kind in KINDS:
+        bookings = _bookings(kind, user)
+        if key is not None:
+            bookings = bookings.filter(_before(kind, key))
+        parts.append(
+            bookings.order_by().values(
+                kind=Value(kind, output_field=CharField()),
+                booking_id=F("id"),
+                reference=F("booking_reference"),
+                booked_at=F("booking_date"),
+                state=F("status"),
+                price=F("total_price"),
+                **_columns(kind),
+            )
+        )
+    timeline = parts[0].union(*parts[1:], all=True).order_by(
+        "-booked_at", "-kind", "-booking_id"
+    )
+
+    rows = list(timeline[: per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    for row in rows:
+        row["state_label"] = STATUS_LABELS.get(row["state"], row["state"])
+
+    next_cursor = _encode(rows[-1]) if has_next else None
+    return CursorPage(rows, key is not None, has_next, (None, next_cursor), None)
+
+
+def booking_counts(user):
+    """``user``'s booking counts by kind and by status, from one grouped query.
+
+    Returns ``(by_kind, by_status)``: ``by_kind`` maps each kind to its
+    total and its per-status counts, ``by_status`` maps each status label to
+    its count over all kinds.
+    """
+    parts = [
+        _bookings(kind, user)
+        .order_by()
+        .values(kind=Value(kind, output_field=CharField()), state=F("status"))
+        .annotate(count=Count("id"))
+        for kind in KINDS
+    ]
+    by_kind = {kind: {"total": 0} for kind in KINDS}
+    by_status = {}
+    for row in parts[0].union(*parts[1:], all=True):
+        counts = by_kind[row["kind"]]
+        counts["total"] += row["count"]
+        counts[row["state"]] = row["count"]
+        label = STATUS_LABELS.get(row["state"], row["state"])
+        by_status[label] = by_status.get(label, 0) + row["count"]
+    return by_kind, by_status
+
+
+def _encode(row):
+    key = [row["booked_at"].isoformat(), row["kind"], row["booking_id"]]
+    return signing.dumps(key, salt=_CURSOR_SALT)
+
+
+def _decode(cursor):
+    if not cursor:
+        return None
+    try:
+        booked_at, kind, booking_id = signing.loads(cursor, salt=_CURSOR_SALT)
+        if kind not in KINDS:
+            raise ValueError(kind)
+        return datetime.datetime.fromisoformat(booked_at), kind, int(booking_id)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
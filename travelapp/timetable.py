@@ -0,0 +1,246 @@
+"""Array-backed flight timetables for direct flight searches.
+
+With ``FLIGHT_SEARCH_ENGINE = "timetable"``, direct flight searches read a
+per-process snapshot instead of fetching ``Flight`` rows, with their
+airline and both cities joined in, on every search. A date's timetable
+holds each route's scheduled flights in departure order as ``array``
+columns: ids, airlines, departure and arrival times, fares in cents and
+free seats. A search filters the seat column and returns light
+``FlightRow`` tuples; only the rows that end up on the page are turned
+into ``Flight`` objects, by ``hydrate``.
+
+Routes are loaded on first use, all the stale routes of a search by one
+query, and keep the cache version their route had when they were read.
+Bookings, released holds and flight changes bump that version (see
+``travelapp.cache``), so the next search reloads just that route and the
+snapshot follows seat changes without being rebuilt whole.
+"""
+import datetime
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+from functools import lru_cache
+from itertools import compress
+
+from django.db.models import Q
+
+from .cache import flight_route_version_name, get_version
+from .models import Flight
+from .schedules import flights_by_id, scheduled_flights_on_legs
+
+MAX_CACHED_TIMETABLES = 32
+
+# A flight as a search sees it: what ranking, pagination and fares read.
+FlightRow = namedtuple(
+    "FlightRow",
+    [
+        "id",
+        "airline_id",
+        "departure_time",
+        "arrival_time",
+        "economy_price",
+        "business_price",
+        "available_seats",
+    ],
+)
+
+
+class FlightRows(list):
+    """``FlightRow``s of one search, in departure order."""
+
+    # Tells ``CursorPaginator`` how to read the cursors of these rows.
+    model = Flight
+
+
+@lru_cache(maxsize=None)
+def _time(seconds):
+    return datetime.time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _price(cents):
+    return None if cents < 0 else Decimal(cents).scaleb(-2)
+
+
+def _cents(price):
+    return -1 if price is None else int(price * 100)
+
+
+class RouteTimetable:
+    """The scheduled flights of one route and date, as columns."""
+
+    def __init__(self, version, flights):
+        self.version = version
+        self.ids = array("q")
+        self.airline_ids = array("q")
+        self.departures = array("l")
+        self.arrivals = array("l")
+        self.economy_prices = array("q")
+        self.business_prices = array("q")
+        self.seats = array("l")
+        for row in flights:
+            flight_id, airline_id, departure, arrival, economy, business, seats = row
+            self.ids.append(flight_id)
+            self.airline_ids.append(airline_id)
+            self.departures.append(_seconds(departure))
+            self.arrivals.append(_seconds(arrival))
+            self.economy_prices.append(_cents(economy))
+            self.business_prices.append(_cents(business))
+            self.seats.append(seats)
+
+    def search(self, passengers):
+        """``FlightRows`` of the flights with ``passengers`` free seats."""
+        matches = compress(range(len(self.ids)), map(passengers.__le__, self.seats))
+        return FlightRows(
+            FlightRow(
+                self.ids[i],
+                self.airline_ids[i],
+                _time(self.departures[i]),
+                _time(self.arrivals[i]),
+                _price(self.economy_prices[i]),
+                _price(self.business_prices[i]),
+                self.seats[i],
+            )
+            for i in matches
+        )
+
+
+# Per date, the ``RouteTimetable`` of each ``(source id, destination id)``.
+# Searches run in pool threads, so updates to it hold the lock.
+_timetables = OrderedDict()
+_lock = threading.Lock()
+
+
+def timetable_searches(legs, passengers):
+    """Flights with ``passengers`` free seats on each ``(source, destination, date)``.
+
+    Returns ``FlightRows`` keyed on ``(source id, destination id, date)``.
+    Routes not loaded yet or changed since are read with one query, plus
+    the flights their schedules operate that have no row yet.
+    """
+    results = {}
+    stale = {}
+    for source_city, destination_city, flight_date in legs:
+        leg = (
+            getattr(source_city, "pk", source_city),
+            getattr(destination_city, "pk", destination_city),
+            flight_date,
+        )
+        # Read before the flights, so a change in between reloads them.
+        version = get_version(flight_route_version_name(*leg))
+        route = _timetables.get(flight_date, {}).get(leg[:2])
+        if route is None or route.version != version:
+            stale[leg] = version
+        else:
+            results[leg] = route.search(passengers)
+
+    loaded = _load(stale)
+    for leg, route in loaded.items():
+        results[leg] = route.search(passengers)
+    with _lock:
+        for leg, route in loaded.items():
+            _timetables.setdefault(leg[2], {})[leg[:2]] = route
+        for flight_date in {leg[2] for leg in results}:
+            if flight_date in _timetables:
+                _timetables.move_to_end(flight_date)
+        while len(_timetables) > MAX_CACHED_TIMETABLES:
+            _timetables.popitem(last=False)
+    return results
+
+
+def _load(versions):
+    """``RouteTimetable``s of the legs in ``versions``, read by one query."""
+    if not versions:
+        return {}
+    legs_filter = Q()
+    for source_id, destination_id, flight_date in versions:
+        legs_filter |= Q(
+            source_city=source_id,
+            destination_city=destination_id,
+            flight_date=flight_date,
+        )
+    flights = {leg: [] for leg in versions}
+    for row in (
+        Flight.objects.filter(legs_filter, status="SCHEDULED", available_seats__gt=0)
+        .order_by("departure_time", "id")
+        .values_list(
+            "source_city_id",
+            "destination_city_id",
+            "flight_date",
+            "id",
+            "airline_id",
+            "departure_time",
+            "arrival_time",
+            "economy_price",
+            "business_price",
+            "available_seats",
+        )
+    ):
+        flights[row[:3]].append(row[3:])
+    scheduled = scheduled_flights_on_legs(versions)
+    for flight in scheduled:
+        flights[_leg(flight)].append(
+            (
+                flight.id,
+                flight.airline_id,
+                flight.departure_time,
+                flight.arrival_time,
+                flight.economy_price,
+                flight.business_price,
+                flight.available_seats,
+            )
+        )
+    if scheduled:
+        for rows in flights.values():
+            rows.sort(key=lambda row: (row[2], row[0]))
+    return {
+        leg: RouteTimetable(versions[leg], rows) for leg, rows in flights.items()
+    }
+
+
+def _leg(flight):
+    return (flight.source_city_id, flight.destination_city_id, flight.flight_date)
+
+
+def hydrate(items, *fields):
+    """``items`` with their ``FlightRow``s replaced by ``Flight`` objects.
+
+    Items are flights themselves or, given ``fields``, named tuples holding
+    flights in those fields. Rows are fetched with their airline and cities
+    by ``flights_by_id``; items with a flight deleted since its route was
+    loaded are dropped. Items holding ``Flight`` objects only are passed
+    through.
+    """
+    items = list(items)
+
+    def flights_of(item):
+        return [getattr(item, field) for field in fields] if fields else [item]
+
+    ids = {
+        flight.id
+        for item in items
+        for flight in flights_of(item)
+        if isinstance(flight, FlightRow)
+    }
+    if not ids:
+        return items
+    fetched = flights_by_id(ids)
+
+    def replace(flight):
+        return fetched.get(flight.id) if isinstance(flight, FlightRow) else flight
+
+    hydrated = []
+    for item in items:
+        if not fields:
+            item = replace(item)
+        else:
+            item = item._replace(
+                **{field: replace(getattr(item, field)) for field in fields}
+            )
+        if all(flight is not None for flight in flights_of(item)):
+            hydrated.append(item)
+    return hydrated
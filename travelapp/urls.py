@@ -1,4 +1,4 @@
-from django.urls import path, reverse_lazy
+from django.urls import path, re_path, reverse_lazy
 from . import views
 from django.contrib.auth.views import LoginView, LogoutView
 
@@ -28,7 +28,12 @@ urlpatterns = [
     path("dashboard/", views.Dashboard, name="dashboard"),
     # Flight search & booking
     path("flights/", views.FlightView, name="flights"),
-    path("flights/book/<int:flight_id>/", views.FlightBookView, name="book_flight"),
+    # Flights only found in their schedule have negative ids.
+    re_path(
+        r"^flights/book/(?P<flight_id>-?[0-9]+)/$",
+        views.FlightBookView,
+        name="book_flight",
+    ),
     # Hotel search & booking
     path("hotels/", views.HotelView, name="hotels"),
     path("hotels/book/<int:hotel_id>/", views.HotelBookView, name="book_hotel"),
@@ -60,8 +65,24 @@ urlpatterns = [
         views.check_availability_ajax,
         name="check_availability_ajax",
     ),
+    path(
+        "ajax/check-availability/batch/",
+        views.check_availability_batch_ajax,
+        name="check_availability_batch_ajax",
+    ),
 ]
 
+# Collected static files, when no front-end server answers for STATIC_URL.
+# runserver serves them itself while DEBUG is on.
+if not settings.DEBUG:
+    urlpatterns += [
+        path(
+            settings.STATIC_URL.lstrip("/") + "<path:path>",
+            views.StaticFileView,
+            name="static_file",
+        ),
+    ]
+
 # Custom error handlers
 handler404 = "yourapp.views.handler404"  # replace 'yourapp' with the actual app name
 handler500 = "yourapp.views.handler500"
@@ -3,14 +3,26 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
+from django.conf import settings
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.core.paginator import Paginator
 from django.utils import timezone
-from decimal import Decimal
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from asgiref.sync import sync_to_async
+import asyncio
 import uuid
 import datetime
+import mimetypes
+import posixpath
 
 from .forms import *
 from .models import (
@@ -24,15 +36,50 @@ from .models import (
     Airline,
     BookingPayment,
 )
+from .autocomplete import city_index
+from .cache import get_versions
+from .catalog import city_catalog
+from .facets import AttractionFacets, FlightFacets, HotelFacets
+from .http import (
+    bind_search_form,
+    cache_anonymous_page,
+    search_cache_control,
+    search_query,
+)
+from .inventory import (
+    InventoryError,
+    cancel_booking,
+    confirm_booking,
+    hold_flight_booking,
+    hold_hotel_booking,
+    with_free_rooms,
+)
+from .packages import package_price, top_packages
+from .pagination import CursorPaginator
+from .parallel import gather_queries, run_query
+from .routing import connection_search
+from .schedules import flights_by_id, materialize_flight
+from .search import (
+    ATTRACTION_ORDERING,
+    FLIGHT_ORDERING,
+    HOTEL_ORDERING,
+    attraction_search,
+    cached_flight_search,
+    hotel_search,
+    round_trip_search,
+)
+from .timeline import booking_counts, booking_timeline
+from .timetable import hydrate
 
 
+@cache_anonymous_page("cities", "attractions")
 def IndexView(request):
     """Homepage view with quick search forms"""
     flight_form = FlightSearchForm()
     hotel_form = HotelSearchForm()
 
     # Get featured content
-    featured_cities = City.objects.all()[:6]
+    featured_cities = city_catalog.cities[:6]
     popular_attractions = TouristAttraction.objects.all()[:8]
 
     context = {
@@ -44,40 +91,56 @@ def IndexView(request):
     return render(request, "index.html", context)
 
 
-def PackageView(request):
+async def PackageView(request):
     """Package search and booking view"""
     form = FlightSearchForm()
 
     if request.method == "POST":
         form = FlightSearchForm(request.POST)
-        if form.is_valid():
+        if await sync_to_async(form.is_valid)():
             source_city = form.cleaned_data["source_city"]
             destination_city = form.cleaned_data["destination_city"]
             departure_date = form.cleaned_data["departure_date"]
             passengers = form.cleaned_data["passengers"]
             travel_class = form.cleaned_data["travel_class"]
 
-            # Search for flights
-            flights = Flight.objects.filter(
-                source_city=source_city,
-                destination_city=destination_city,
-                flight_date=departure_date,
-                available_seats__gte=passengers,
-                status="SCHEDULED",
-            ).select_related("airline", "source_city", "destination_city")
+            # Hotels in the destination city are searched for the whole
+            # stay when a return date is given and for one night otherwise
+            check_out_date = form.cleaned_data.get("return_date") or (
+                departure_date + datetime.timedelta(days=1)
+            )
 
-            # Search for hotels in destination city
-            hotels = Hotel.objects.filter(
-                city=destination_city, available_rooms__gt=0
-            ).select_related("city")
+            # Flights, hotels and attractions are independent searches
+            flights, hotels, attractions = await gather_queries(
+                lambda: cached_flight_search(
+                    source_city,
+                    destination_city,
+                    departure_date,
+                    passengers,
+                    travel_class,
+                ),
+                lambda: list(
+                    hotel_search(destination_city, 1, departure_date, check_out_date)
+                ),
+                lambda: list(
+                    TouristAttraction.objects.filter(city=destination_city)[:6]
+                ),
+            )
 
-            # Get tourist attractions
-            attractions = TouristAttraction.objects.filter(city=destination_city)[:6]
+            # Best flight + hotel combinations
+            packages = top_packages(
+                flights,
+                hotels,
+                passengers,
+                travel_class,
+                nights=(check_out_date - departure_date).days,
+                discount=settings.PACKAGE_DISCOUNT_PERCENT,
+            )
+            packages = await run_query(hydrate, packages, "flight")
 
             context = {
                 "form": form,
-                "flights": flights,
-                "hotels": hotels,
+                "packages": packages,
                 "attractions": attractions,
                 "search_performed": True,
                 "source_city": source_city,
@@ -86,9 +149,9 @@ def PackageView(request):
                 "passengers": passengers,
                 "travel_class": travel_class,
             }
-            return render(request, "package.html", context)
+            return await sync_to_async(render)(request, "package.html", context)
 
-    return render(request, "package.html", {"form": form})
+    return await sync_to_async(render)(request, "package.html", {"form": form})
 
 
 def registerView(request):
@@ -110,85 +173,160 @@ def registerView(request):
     return render(request, "registration/register.html", {"form": form})
 
 
-def HotelView(request):
+@search_cache_control
+async def HotelView(request):
     """Hotel search view"""
-    form = HotelSearchForm()
+    form, redirect_url = await sync_to_async(bind_search_form)(
+        request, HotelSearchForm
+    )
+    if redirect_url:
+        return redirect(redirect_url)
     hotels = None
+    facets = None
+
+    if form.is_bound and form.is_valid():
+        city = form.cleaned_data["city"]
+        check_in_date = form.cleaned_data["check_in_date"]
+        check_out_date = form.cleaned_data["check_out_date"]
+        guests = form.cleaned_data["guests"]
+        rooms = form.cleaned_data["rooms"]
+        min_rating = form.cleaned_data.get("min_rating")
+        max_price = form.cleaned_data.get("max_price")
+        amenities = form.cleaned_data.get("amenities")
+
+        # Build query
+        hotels = hotel_search(
+            city,
+            rooms,
+            check_in_date,
+            check_out_date,
+            min_rating,
+            max_price,
+            amenities,
+        )
+        hotel_facets = HotelFacets(form)
 
-    if request.method == "POST":
-        form = HotelSearchForm(request.POST)
-        if form.is_valid():
-            city = form.cleaned_data["city"]
-            check_in_date = form.cleaned_data["check_in_date"]
-            check_out_date = form.cleaned_data["check_out_date"]
-            guests = form.cleaned_data["guests"]
-            rooms = form.cleaned_data["rooms"]
-            min_rating = form.cleaned_data.get("min_rating")
-            max_price = form.cleaned_data.get("max_price")
-
-            # Build query
-            hotels = Hotel.objects.filter(
-                city=city, available_rooms__gte=rooms
-            ).select_related("city")
-
-            if min_rating:
-                hotels = hotels.filter(star_rating__gte=min_rating)
-
-            if max_price:
-                hotels = hotels.filter(price_per_night__lte=max_price)
-
-            hotels = hotels.order_by("-star_rating", "price_per_night")
-
-            # Pagination
-            paginator = Paginator(hotels, 12)
-            page_number = request.GET.get("page")
-            hotels = paginator.get_page(page_number)
+        # Facet counts and the page are fetched concurrently
+        paginator = CursorPaginator(
+            hotel_facets.narrow(hotels), 12, HOTEL_ORDERING, with_total=True
+        )
+        facets, hotels = await asyncio.gather(
+            run_query(hotel_facets.count, hotels),
+            paginator.aget_page(request.GET.get("cursor")),
+        )
 
     context = {
         "form": form,
         "hotels": hotels,
+        "facets": facets,
+        "search_query": search_query(form) if hotels is not None else "",
         "search_performed": hotels is not None,
     }
-    return render(request, "hotels.html", context)
+    return await sync_to_async(render)(request, "hotels.html", context)
 
 
-def FlightView(request):
+@search_cache_control
+async def FlightView(request):
     """Flight search view"""
-    form = FlightSearchForm()
+    form, redirect_url = await sync_to_async(bind_search_form)(
+        request, FlightSearchForm
+    )
+    if redirect_url:
+        return redirect(redirect_url)
     flights = None
-
-    if request.method == "POST":
-        form = FlightSearchForm(request.POST)
-        if form.is_valid():
-            source_city = form.cleaned_data["source_city"]
-            destination_city = form.cleaned_data["destination_city"]
-            departure_date = form.cleaned_data["departure_date"]
-            passengers = form.cleaned_data["passengers"]
-            travel_class = form.cleaned_data["travel_class"]
-
-            flights = (
-                Flight.objects.filter(
-                    source_city=source_city,
-                    destination_city=destination_city,
-                    flight_date=departure_date,
-                    available_seats__gte=passengers,
-                    status="SCHEDULED",
+    connections = None
+    facets = None
+    round_trip = False
+
+    if form.is_bound and form.is_valid():
+        source_city = form.cleaned_data["source_city"]
+        destination_city = form.cleaned_data["destination_city"]
+        departure_date = form.cleaned_data["departure_date"]
+        passengers = form.cleaned_data["passengers"]
+        travel_class = form.cleaned_data["travel_class"]
+        round_trip = form.cleaned_data["trip_type"] == "round_trip"
+        flight_facets = FlightFacets(form)
+
+        if round_trip:
+            # Outbound/return pairs, cheapest first
+            flights = await run_query(
+                round_trip_search,
+                source_city,
+                destination_city,
+                departure_date,
+                form.cleaned_data["return_date"],
+                passengers,
+                travel_class,
+                facets=flight_facets,
+            )
+            # Facets count the outbound flights, now in the search cache
+            facets = await run_query(
+                lambda: flight_facets.count(
+                    cached_flight_search(
+                        source_city,
+                        destination_city,
+                        departure_date,
+                        passengers,
+                        travel_class,
+                    )
                 )
-                .select_related("airline", "source_city", "destination_city")
-                .order_by("departure_time")
             )
-
-            # Pagination
-            paginator = Paginator(flights, 10)
-            page_number = request.GET.get("page")
-            flights = paginator.get_page(page_number)
+        elif form.cleaned_data["max_stops"]:
+            # Direct and connecting flights are searched concurrently
+            flights, connections = await gather_queries(
+                lambda: cached_flight_search(
+                    source_city,
+                    destination_city,
+                    departure_date,
+                    passengers,
+                    travel_class,
+                ),
+                lambda: connection_search(
+                    source_city,
+                    destination_city,
+                    departure_date,
+                    passengers,
+                    travel_class,
+                    max_stops=form.cleaned_data["max_stops"],
+                ),
+            )
+        else:
+            flights = await run_query(
+                cached_flight_search,
+                source_city,
+                destination_city,
+                departure_date,
+                passengers,
+                travel_class,
+            )
+        if not round_trip:
+            facets = await run_query(flight_facets.count, flights)
+            flights = flight_facets.narrow(flights)
+
+        # Pagination. Round-trip pairs are generated in price order and
+        # have no sort key to resume from, so they keep page numbers.
+        if round_trip:
+            flights = Paginator(flights, 10).get_page(request.GET.get("page"))
+            flights.object_list = await run_query(
+                hydrate, flights.object_list, "outbound", "inbound"
+            )
+        else:
+            paginator = CursorPaginator(
+                flights, 10, FLIGHT_ORDERING, with_total=True, model=Flight
+            )
+            flights = await paginator.aget_page(request.GET.get("cursor"))
+            flights.object_list = await run_query(hydrate, flights.object_list)
 
     context = {
         "form": form,
         "flights": flights,
+        "round_trip": round_trip,
+        "connections": connections,
+        "facets": facets,
+        "search_query": search_query(form) if flights is not None else "",
         "search_performed": flights is not None,
     }
-    return render(request, "flights.html", context)
+    return await sync_to_async(render)(request, "flights.html", context)
 
 
 @login_required
@@ -196,29 +334,14 @@ def Dashboard(request):
     """User dashboard with booking history"""
     user = request.user
 
-    # Get user's bookings
-    flight_bookings = (
-        FlightBooking.objects.filter(user=user)
-        .select_related("flight", "flight__airline")
-        .order_by("-booking_date")
-    )
-
-    hotel_bookings = (
-        HotelBooking.objects.filter(user=user)
-        .select_related("hotel", "hotel__city")
-        .order_by("-booking_date")
-    )
-
-    package_bookings = (
-        PackageBooking.objects.filter(user=user)
-        .select_related("flight_booking__flight", "hotel_booking__hotel")
-        .order_by("-booking_date")
-    )
+    # One page of all the user's bookings, newest first
+    timeline = booking_timeline(user, request.GET.get("cursor"))
+    counts, status_counts = booking_counts(user)
 
     context = {
-        "flight_bookings": flight_bookings,
-        "hotel_bookings": hotel_bookings,
-        "package_bookings": package_bookings,
+        "timeline": timeline,
+        "counts": counts,
+        "status_counts": status_counts,
     }
     return render(request, "dashboard.html", context)
 
@@ -226,14 +349,13 @@ def Dashboard(request):
 @login_required
 def FlightBookView(request, flight_id):
     """Flight booking view"""
-    flight = get_object_or_404(Flight, id=flight_id)
+    flight = flight_or_404(flight_id)
 
     if request.method == "POST":
         form = FlightBookingForm(request.POST, flight=flight)
         if form.is_valid():
             booking = form.save(commit=False)
             booking.user = request.user
-            booking.flight = flight
             booking.booking_reference = generate_booking_reference()
 
             # Calculate total price
@@ -243,17 +365,22 @@ def FlightBookView(request, flight_id):
             else:
                 booking.total_price = flight.business_price * passenger_count
 
-            booking.save()
-
-            # Update available seats
-            flight.available_seats -= passenger_count
-            flight.save()
-
-            messages.success(
-                request,
-                f"Flight booked successfully! Booking reference: {booking.booking_reference}",
-            )
-            return redirect("payment", booking_type="flight", booking_id=booking.id)
+            try:
+                with transaction.atomic():
+                    # A flight only found in its schedule gets its row now.
+                    booking.flight = materialize_flight(flight)
+                    booking.save()
+                    hold_flight_booking(booking)
+            except InventoryError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f"Flight booked successfully! Booking reference: {booking.booking_reference}",
+                )
+                return redirect(
+                    "payment", booking_type="flight", booking_id=booking.id
+                )
     else:
         form = FlightBookingForm(flight=flight)
 
@@ -281,17 +408,18 @@ def HotelBookView(request, hotel_id):
             nights = (booking.check_out_date - booking.check_in_date).days
             booking.total_price = hotel.price_per_night * nights * booking.rooms_count
 
-            booking.save()
-
-            # Update available rooms
-            hotel.available_rooms -= booking.rooms_count
-            hotel.save()
-
-            messages.success(
-                request,
-                f"Hotel booked successfully! Booking reference: {booking.booking_reference}",
-            )
-            return redirect("payment", booking_type="hotel", booking_id=booking.id)
+            try:
+                with transaction.atomic():
+                    booking.save()
+                    hold_hotel_booking(booking)
+            except InventoryError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f"Hotel booked successfully! Booking reference: {booking.booking_reference}",
+                )
+                return redirect("payment", booking_type="hotel", booking_id=booking.id)
     else:
         form = HotelBookingForm(hotel=hotel)
 
@@ -312,9 +440,9 @@ def PackageBookView(request):
         messages.error(
             request, "Please select both flight and hotel for package booking."
         )
-        return redirect("package_view")
+        return redirect("package")
 
-    flight = get_object_or_404(Flight, id=flight_id)
+    flight = flight_or_404(flight_id)
     hotel = get_object_or_404(Hotel, id=hotel_id)
 
     if request.method == "POST":
@@ -326,7 +454,6 @@ def PackageBookView(request):
             # Create flight booking
             flight_booking = flight_form.save(commit=False)
             flight_booking.user = request.user
-            flight_booking.flight = flight
             flight_booking.booking_reference = generate_booking_reference()
 
             passenger_count = flight_booking.passenger_count
@@ -335,8 +462,6 @@ def PackageBookView(request):
             else:
                 flight_booking.total_price = flight.business_price * passenger_count
 
-            flight_booking.save()
-
             # Create hotel booking
             hotel_booking = hotel_form.save(commit=False)
             hotel_booking.user = request.user
@@ -348,37 +473,40 @@ def PackageBookView(request):
                 hotel.price_per_night * nights * hotel_booking.rooms_count
             )
 
-            hotel_booking.save()
-
             # Create package booking
             package_booking = package_form.save(commit=False)
             package_booking.user = request.user
-            package_booking.flight_booking = flight_booking
-            package_booking.hotel_booking = hotel_booking
             package_booking.booking_reference = generate_booking_reference()
 
             # Calculate package price with discount
-            subtotal = flight_booking.total_price + hotel_booking.total_price
-            discount_amount = subtotal * (
-                package_booking.package_discount / Decimal("100")
+            _, _, package_booking.total_price = package_price(
+                flight_booking.total_price,
+                hotel_booking.total_price,
+                package_booking.package_discount,
             )
-            package_booking.total_price = subtotal - discount_amount
-
-            package_booking.save()
 
-            # Update availability
-            flight.available_seats -= passenger_count
-            flight.save()
-            hotel.available_rooms -= hotel_booking.rooms_count
-            hotel.save()
-
-            messages.success(
-                request,
-                f"Package booked successfully! Booking reference: {package_booking.booking_reference}",
-            )
-            return redirect(
-                "payment", booking_type="package", booking_id=package_booking.id
-            )
+            # Seats and rooms are taken together: if either is gone the
+            # whole package is rolled back.
+            try:
+                with transaction.atomic():
+                    flight_booking.flight = materialize_flight(flight)
+                    flight_booking.save()
+                    hold_flight_booking(flight_booking)
+                    hotel_booking.save()
+                    hold_hotel_booking(hotel_booking)
+                    package_booking.flight_booking = flight_booking
+                    package_booking.hotel_booking = hotel_booking
+                    package_booking.save()
+            except InventoryError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(
+                    request,
+                    f"Package booked successfully! Booking reference: {package_booking.booking_reference}",
+                )
+                return redirect(
+                    "payment", booking_type="package", booking_id=package_booking.id
+                )
     else:
         flight_form = FlightBookingForm(flight=flight, prefix="flight")
         hotel_form = HotelBookingForm(hotel=hotel, prefix="hotel")
@@ -398,37 +526,59 @@ def PackageBookView(request):
 def PaymentView(request, booking_type, booking_id):
     """Payment processing view"""
     booking = None
+    package = None
 
     if booking_type == "flight":
         booking = get_object_or_404(FlightBooking, id=booking_id, user=request.user)
+        package = PackageBooking.objects.filter(flight_booking=booking).first()
     elif booking_type == "hotel":
         booking = get_object_or_404(HotelBooking, id=booking_id, user=request.user)
+        package = PackageBooking.objects.filter(hotel_booking=booking).first()
     elif booking_type == "package":
         booking = get_object_or_404(PackageBooking, id=booking_id, user=request.user)
 
+    # The flight and hotel of a package are paid for with the package
+    if package is not None:
+        return redirect("payment", booking_type="package", booking_id=package.id)
+
+    if booking.status != "PENDING":
+        messages.error(request, "This booking is not awaiting payment.")
+        return redirect("dashboard")
+
     if request.method == "POST":
         form = PaymentForm(request.POST)
         if form.is_valid():
-            # Create payment record
-            payment = BookingPayment()
-            payment.amount = booking.total_price
-            payment.payment_method = form.cleaned_data["payment_method"]
-            payment.transaction_id = generate_transaction_id()
-            payment.status = "COMPLETED"  # In real app, this would be 'PROCESSING'
-
-            # Link to appropriate booking
-            if booking_type == "flight":
-                payment.flight_booking = booking
-            elif booking_type == "hotel":
-                payment.hotel_booking = booking
-            elif booking_type == "package":
-                payment.package_booking = booking
-
-            payment.save()
-
-            # Update booking status
-            booking.status = "CONFIRMED"
-            booking.save()
+            with transaction.atomic():
+                # Mark the booking paid and turn the held seats/rooms into
+                # a sale; a concurrent payment finds it paid already.
+                confirmed = confirm_booking(booking)
+
+                if confirmed:
+                    # Create payment record
+                    payment = BookingPayment()
+                    payment.amount = booking.total_price
+                    payment.payment_method = form.cleaned_data["payment_method"]
+                    payment.transaction_id = generate_transaction_id()
+                    payment.status = "COMPLETED"  # In real app, this would be 'PROCESSING'
+
+                    # Link to appropriate booking
+                    if booking_type == "flight":
+                        payment.flight_booking = booking
+                    elif booking_type == "hotel":
+                        payment.hotel_booking = booking
+                    elif booking_type == "package":
+                        payment.package_booking = booking
+
+                    payment.save()
+
+            if confirmed is None:
+                messages.error(request, "This booking is not awaiting payment.")
+                return redirect("dashboard")
+            if not confirmed:
+                messages.error(
+                    request, "Your reservation has expired. Please book again."
+                )
+                return redirect("dashboard")
 
             messages.success(
                 request, f"Payment successful! Transaction ID: {payment.transaction_id}"
@@ -458,30 +608,14 @@ def CancelBookingView(request, booking_type, booking_id):
         booking = get_object_or_404(PackageBooking, id=booking_id, user=request.user)
 
     if request.method == "POST":
-        if booking_type == "flight":
-            # Restore available seats
-            booking.flight.available_seats += booking.passenger_count
-            booking.flight.save()
-        elif booking_type == "hotel":
-            # Restore available rooms
-            booking.hotel.available_rooms += booking.rooms_count
-            booking.hotel.save()
-        elif booking_type == "package":
-            # Restore both seats and rooms
-            booking.flight_booking.flight.available_seats += (
-                booking.flight_booking.passenger_count
-            )
-            booking.flight_booking.flight.save()
-            booking.hotel_booking.hotel.available_rooms += (
-                booking.hotel_booking.rooms_count
-            )
-            booking.hotel_booking.hotel.save()
-
-        # Update booking status
-        booking.status = "CANCELLED"
-        booking.save()
+        # Update booking status and restore seats and/or rooms
+        with transaction.atomic():
+            cancelled = cancel_booking(booking)
 
-        messages.success(request, "Booking cancelled successfully.")
+        if cancelled:
+            messages.success(request, "Booking cancelled successfully.")
+        else:
+            messages.error(request, "This booking has already been cancelled.")
         return redirect("dashboard")
 
     context = {
@@ -491,58 +625,77 @@ def CancelBookingView(request, booking_type, booking_id):
     return render(request, "cancel_booking.html", context)
 
 
-def PlacesView(request):
+@search_cache_control
+async def PlacesView(request):
     """Tourist attractions view"""
-    form = AttractionFilterForm()
+    form, redirect_url = await sync_to_async(bind_search_form)(
+        request, AttractionFilterForm
+    )
+    if redirect_url:
+        return redirect(redirect_url)
     attractions = None
+    facets = None
 
-    if request.method == "POST":
-        form = AttractionFilterForm(request.POST)
-        if form.is_valid():
-            city = form.cleaned_data.get("city")
-            category = form.cleaned_data.get("category")
-            max_entry_fee = form.cleaned_data.get("max_entry_fee")
-
-            attractions = TouristAttraction.objects.all().select_related("city")
-
-            if city:
-                attractions = attractions.filter(city=city)
-
-            if category:
-                attractions = attractions.filter(category=category)
-
-            if max_entry_fee is not None:
-                attractions = attractions.filter(
-                    Q(entry_fee__lte=max_entry_fee) | Q(entry_fee__isnull=True)
-                )
+    if form.is_bound and form.is_valid():
+        city = form.cleaned_data.get("city")
+        max_entry_fee = form.cleaned_data.get("max_entry_fee")
 
-            attractions = attractions.order_by("city__name", "name")
+        attractions = attraction_search(city, max_entry_fee=max_entry_fee)
+        attraction_facets = AttractionFacets(form)
 
-            # Pagination
-            paginator = Paginator(attractions, 12)
-            page_number = request.GET.get("page")
-            attractions = paginator.get_page(page_number)
+        # Facet counts and the page are fetched concurrently
+        paginator = CursorPaginator(
+            attraction_facets.narrow(attractions),
+            12,
+            ATTRACTION_ORDERING,
+            with_total=True,
+        )
+        facets, attractions = await asyncio.gather(
+            run_query(attraction_facets.count, attractions),
+            paginator.aget_page(request.GET.get("cursor")),
+        )
 
     context = {
         "form": form,
         "attractions": attractions,
+        "facets": facets,
+        "search_query": search_query(form) if attractions is not None else "",
         "search_performed": attractions is not None,
     }
-    return render(request, "places.html", context)
+    return await sync_to_async(render)(request, "places.html", context)
 
 
+@cache_anonymous_page("cities", "attractions")
 def AttractionDetailView(request, attraction_id):
     """Individual attraction detail view"""
-    attraction = get_object_or_404(TouristAttraction, id=attraction_id)
+
+    def get_attraction():
+        return get_object_or_404(
+            TouristAttraction.objects.select_related("city"), id=attraction_id
+        )
+
+    # The detail fragment is cached per attraction until an attraction or
+    # city changes. A cached fragment proves the attraction exists, so it
+    # is only loaded when the fragment has to be rendered.
+    fragment_version = get_versions("cities", "attractions")
+    fragment_key = make_template_fragment_key(
+        "attraction_detail", [attraction_id, fragment_version]
+    )
+    if cache.has_key(fragment_key):
+        attraction = SimpleLazyObject(get_attraction)
+    else:
+        attraction = get_attraction()
 
     # Get other attractions in the same city
     related_attractions = TouristAttraction.objects.filter(
-        city=attraction.city
+        city__attractions=attraction_id
     ).exclude(id=attraction_id)[:4]
 
     context = {
+        "attraction_id": attraction_id,
         "attraction": attraction,
         "related_attractions": related_attractions,
+        "fragment_version": fragment_version,
     }
     return render(request, "attraction_detail.html", context)
 
@@ -568,46 +721,219 @@ def AboutView(request):
     return render(request, "about.html")
 
 
+# Static files
+# Pre-compressed copies written by collectstatic, in order of preference.
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, per its Accept-Encoding header."""
+    accepted = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = next((param[2:] for param in params if param[:2] == "q="), "1")
+        try:
+            if float(quality) > 0:
+                accepted.add(coding.lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+def StaticFileView(request, path):
+    """Serve a collected static file, pre-compressed when the client accepts it.
+
+    Only routed when DEBUG is off and no front-end server answers for
+    STATIC_URL. Fingerprinted names never change content, so they are
+    cached for a year; other names are revalidated after an hour.
+    """
+    name = posixpath.normpath(path).lstrip("/")
+    if name.startswith("..") or not staticfiles_storage.exists(name):
+        raise Http404("Static file not found")
+
+    accepted = accepted_encodings(request)
+    served, encoding = name, None
+    for coding, extension in STATIC_ENCODINGS:
+        if coding in accepted and staticfiles_storage.exists(name + extension):
+            served, encoding = name + extension, coding
+            break
+
+    content_type, _ = mimetypes.guess_type(name)
+    response = FileResponse(
+        staticfiles_storage.open(served),
+        content_type=content_type or "application/octet-stream",
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if name in staticfiles_storage.hashed_files.values():
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=3600)
+    return response
+
+
 # AJAX Views for dynamic content
+def cities_etag(request):
+    # Answers only change when the city catalog does.
+    return f"cities-{city_index().version}"
+
+
+@cache_control(public=True, max_age=300)
+@condition(etag_func=cities_etag)
 def get_cities_ajax(request):
     """AJAX view to get cities for autocomplete"""
     query = request.GET.get("q", "")
-    cities = City.objects.filter(name__icontains=query)[:10]
-    data = [{"id": city.id, "text": f"{city.name}, {city.country}"} for city in cities]
+    cities = city_index().search(query, limit=10)
+    data = [
+        {
+            "id": city.id,
+            "text": f"{city.name}, {city.country}",
+            "code": city.airport_code,
+        }
+        for city in cities
+    ]
     return JsonResponse({"results": data})
 
 
-def check_availability_ajax(request):
+async def check_availability_ajax(request):
     """AJAX view to check real-time availability"""
     booking_type = request.GET.get("type")
     item_id = request.GET.get("id")
-    quantity = int(request.GET.get("quantity", 1))
+    try:
+        quantity = quantity_from(request.GET.get("quantity", 1))
+    except (TypeError, ValueError):
+        return invalid_request()
+    travel_class = request.GET.get("class", "ECONOMY")
 
     if booking_type == "flight":
-        flight = get_object_or_404(Flight, id=item_id)
-        available = flight.available_seats >= quantity
-        return JsonResponse(
-            {
-                "available": available,
-                "available_quantity": flight.available_seats,
-                "price": float(flight.economy_price),
-            }
-        )
+        flight = await run_query(flight_or_404, item_id)
+        return JsonResponse(flight_availability(flight, quantity, travel_class))
     elif booking_type == "hotel":
-        hotel = get_object_or_404(Hotel, id=item_id)
-        available = hotel.available_rooms >= quantity
-        return JsonResponse(
-            {
-                "available": available,
-                "available_quantity": hotel.available_rooms,
-                "price": float(hotel.price_per_night),
-            }
-        )
+        try:
+            check_in, check_out = stay_from_request(request)
+        except ValueError:
+            return invalid_request()
+        # The hotel and its free rooms, in one query
+        hotels = with_free_rooms(Hotel.objects.all(), check_in, check_out)
+        hotel = await run_query(get_object_or_404, hotels, id=item_id)
+        return JsonResponse(hotel_availability(hotel, quantity))
+
+    return invalid_request()
+
+
+MAX_AVAILABILITY_ITEMS = 50
+
+
+async def check_availability_batch_ajax(request):
+    """AJAX view to check the availability of a whole page of results.
+
+    ``items`` is a comma-separated list of ``type:id:quantity`` entries,
+    e.g. ``flight:12:2,hotel:5:1``. ``class`` picks the flight fare and
+    ``check_in``/``check_out`` the hotel stay, as for
+    ``check_availability_ajax``. All flights are answered by one query and
+    all hotels by another, run concurrently, whatever the number of items.
+    """
+    try:
+        items = []
+        for item in request.GET.get("items", "").split(","):
+            booking_type, item_id, *quantity = item.split(":")
+            if booking_type not in ("flight", "hotel"):
+                raise ValueError(booking_type)
+            quantity = quantity_from(quantity[0]) if quantity else 1
+            items.append((booking_type, int(item_id), quantity))
+        check_in, check_out = stay_from_request(request)
+    except (TypeError, ValueError):
+        return invalid_request()
+    if len(items) > MAX_AVAILABILITY_ITEMS:
+        return invalid_request("Too many items")
+    travel_class = request.GET.get("class", "ECONOMY")
+
+    flight_ids = [item_id for kind, item_id, _ in items if kind == "flight"]
+    hotel_ids = [item_id for kind, item_id, _ in items if kind == "hotel"]
+    hotel_query = with_free_rooms(
+        Hotel.objects.filter(id__in=hotel_ids).only("total_rooms", "price_per_night"),
+        check_in,
+        check_out,
+    )
+    flights, hotels = await gather_queries(
+        lambda: list(flights_by_id(flight_ids).items()) if flight_ids else [],
+        lambda: list(hotel_query) if hotel_ids else [],
+    )
+    found = {}
+    found.update((("flight", flight_id), flight) for flight_id, flight in flights)
+    found.update((("hotel", hotel.id), hotel) for hotel in hotels)
+
+    results = {}
+    for booking_type, item_id, quantity in items:
+        obj = found.get((booking_type, item_id))
+        if obj is None:
+            result = {"error": "Not found"}
+        elif booking_type == "flight":
+            result = flight_availability(obj, quantity, travel_class)
+        else:
+            result = hotel_availability(obj, quantity)
+        results[f"{booking_type}:{item_id}"] = result
+    return JsonResponse({"results": results})
+
+
+def invalid_request(error="Invalid request"):
+    """JSON error response for an availability request that can't be read."""
+    return JsonResponse({"error": error}, status=400)
 
-    return JsonResponse({"error": "Invalid request"})
+
+def quantity_from(value):
+    """Seats or rooms asked for, at least one; raises ``ValueError`` if not."""
+    quantity = int(value)
+    if quantity < 1:
+        raise ValueError(f"Invalid quantity: {value}")
+    return quantity
+
+
+def stay_from_request(request):
+    """Hotel stay from ``check_in``/``check_out``, defaulting to tonight."""
+    check_in = datetime.date.fromisoformat(
+        request.GET.get("check_in", datetime.date.today().isoformat())
+    )
+    default_check_out = check_in + datetime.timedelta(days=1)
+    check_out = datetime.date.fromisoformat(
+        request.GET.get("check_out", default_check_out.isoformat())
+    )
+    return check_in, check_out
+
+
+def flight_availability(flight, quantity, travel_class):
+    price = (
+        flight.business_price if travel_class == "BUSINESS" else flight.economy_price
+    )
+    return {
+        "available": flight.available_seats >= quantity,
+        "available_quantity": flight.available_seats,
+        "price": float(price) if price is not None else None,
+    }
+
+
+def hotel_availability(hotel, quantity):
+    return {
+        "available": hotel.free_rooms >= quantity,
+        "available_quantity": hotel.free_rooms,
+        "price": float(hotel.price_per_night),
+    }
 
 
 # Utility functions
+def flight_or_404(flight_id):
+    """The stored or scheduled flight with ``flight_id``, or a 404."""
+    try:
+        flight_id = int(flight_id)
+    except (TypeError, ValueError):
+        raise Http404("No such flight.")
+    flight = flights_by_id([flight_id]).get(flight_id)
+    if flight is None:
+        raise Http404("No such flight.")
+    return flight
+
+
 def generate_booking_reference():
     """Generate unique booking reference"""
     return str(uuid.uuid4()).upper()[:10]